@@ -112,7 +112,7 @@ class MainWindow(QMainWindow):
 
     def handleTimer(self):
         times = self._renderWidget.renderTimeEstimates()
-        self.statistics.setText("Render time: " + str(round(times[0],2)) + "ms, GPU time: " + str(round(times[1],2)) + "ms")
+        self.statistics.setText("Render time: " + str(round(times[0],2)) + "ms, GPU time: " + str(round(times[1],2)) + "ms, Primitives: " + str(times[2]))
 
 
     def clearStatistics(self):
@@ -46,6 +46,9 @@ class RenderWidget(QWidget):
         self.actorCombo.addItem("Pyramid 2", Renderer.ActorType.PYRAMID_2)
         self.actorCombo.addItem("Sphere (Polar)", Renderer.ActorType.SPHERE_POLAR)
         self.actorCombo.addItem("Sphere (Icos)", Renderer.ActorType.SPHERE_ICOS)
+        self.actorCombo.addItem("Torus", Renderer.ActorType.TORUS)
+        self.actorCombo.addItem("Capsule", Renderer.ActorType.CAPSULE)
+        self.actorCombo.addItem("Superquadric", Renderer.ActorType.SUPERQUADRIC)
         self.actorCombo.currentIndexChanged.connect(self._renderer.changeActor)
         self._bottomLayout.addWidget(self.actorCombo)
 
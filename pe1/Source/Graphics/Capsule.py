@@ -0,0 +1,77 @@
+import math
+import numpy as np
+from OpenGL import GL
+from Source.Graphics.Actor import Actor
+from Source.Graphics.parametric import parametricSurface
+
+class Capsule(Actor):
+
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals', '_indices']
+
+    ## initialization
+    def __init__(self, renderer,  **kwargs):
+        """Initialize actor."""
+        super(Capsule, self).__init__(renderer, **kwargs)
+
+        self._radius = kwargs.get("radius", 0.5)
+        self._height = kwargs.get("height", 1.0)
+        self._resolution = kwargs.get("resolution", 24)
+        self._rings = kwargs.get("rings", 8)
+
+        self._vertices = None
+
+        ## create actor
+        self.initialize()
+
+
+    @property
+    def radius(self):
+        """Returns the radius of the capsule"""
+        return self._radius
+
+
+    @property
+    def height(self):
+        """Returns the length of the cylinder between the two half spheres"""
+        return self._height
+
+
+    def generateGeometry(self):
+        """Generate geometry"""
+        h2 = self._height * 0.5
+        rings = self._rings
+
+        def surface(u, v):
+            """Angle u around the y axis, v counts rings of the top half sphere, the side and the bottom half sphere"""
+            polar = np.clip(v, 0, rings) + np.clip(v - rings - 1, 0, rings)
+            polar = polar * (0.5 * math.pi / rings)
+            normals = np.stack((np.sin(polar) * np.cos(u), np.cos(polar), -np.sin(polar) * np.sin(u)), axis=-1)
+            offset = np.where(v <= rings, h2, -h2)
+            positions = normals * self._radius
+            positions[..., 1] += offset
+            return positions, normals
+
+        mesh = parametricSurface(surface, self._resolution, 2 * rings + 1, (0.0, 2.0 * math.pi), (0.0, 2 * rings + 1), poles=(True, True))
+        self._vertices = mesh['vertices']
+        self._normals = mesh['normals']
+        self._indices = mesh['indices']
+
+
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Capsule', self._radius, self._height, self._resolution, self._rings)
+
+
+    def initialize(self):
+        """Creates capsule geometry"""
+        if self._vertices is None:
+            self.acquireGeometry()
+
+        ## create object
+        self.create(self._vertices, normals=self._normals, indices=self._indices)
+
+
+    def render(self):
+        """Render capsule"""
+        self.drawElements(GL.GL_TRIANGLES)
@@ -2,9 +2,14 @@ import math
 import numpy as np
 from OpenGL import GL
 from Source.Graphics.Actor import Actor
+from Source.Graphics.level_of_detail import LevelOfDetail
+from Source.Graphics.parametric import parametricSurface, capSurface, combine, flip
 
 class Cone(Actor):
 
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals', '_indices']
+
     ## initialization
     def __init__(self, renderer,  **kwargs):
         """Initialize actor."""
@@ -16,6 +21,14 @@ class Cone(Actor):
 
         self._vertices = None
 
+        ## resolutions picked from the size on screen, starting with the coarsest
+        if kwargs.get("lods", None):
+            self._detail = LevelOfDetail(kwargs.get("lods"))
+            self._resolution = self._detail.resolutions[0]
+
+        ## generate the surface in the vertex shader instead of uploading it
+        self._gpu = kwargs.get("gpu", False)
+
         ## create actor
         self.initialize()
         
@@ -40,75 +53,74 @@ class Cone(Actor):
 
     def generateGeometry(self):
         """Generate geometry"""
-        
-        ## circle coordinates in x-z plane
         h2 = self._height * 0.5
-        angle = np.linspace(0.0, 2.0*math.pi, self._resolution, endpoint=False)
-        angle = np.append(angle, [0.0])
+        step = 2.0 * math.pi / self._resolution
 
         ## scaling factors for vertex normals
         cosn = (self._height / np.sqrt( self._height * self._height + self._radius * self._radius ))
         sinn = (self._radius / np.sqrt( self._height * self._height + self._radius * self._radius ))
 
-        x = np.cos(angle) * self._radius
-        y = np.zeros(self._resolution+1)
-        z = np.sin(angle) * self._radius
+        def base(u):
+            """Circle coordinates in x-z plane"""
+            return np.stack((np.cos(u) * self._radius, np.full(u.shape, -h2), np.sin(u) * self._radius), axis=-1)
 
-        ## normals
-        nx = np.cos(angle) * cosn
-        ny = sinn * np.ones(self._resolution+1)
-        nz = np.sin(angle) * cosn
-        
-        #t = 1.0
-        #delta = 1.0 / self._resolution
-        vertices, normals = [], []
-        #texcoords = []
-        for i in list(range(self._resolution)):
+        def normal(u):
+            """Normals along the base circle"""
+            return np.stack((np.cos(u) * cosn, np.full(u.shape, sinn), np.sin(u) * cosn), axis=-1)
+
+        def side(u, v):
+            """Lines from the apex, v = 0, to the base circle"""
+            positions = (1.0 - v[..., None]) * np.array([0.0, h2, 0.0]) + v[..., None] * base(u)
+            normals = normal(u)
+            ## the apex of each triangle takes the mean normal of its base corners
+            normals[v == 0.0] = ((normals + normal(u + step)) * 0.5)[v == 0.0]
+            return positions, normals
 
-            vertices.append([0.0, h2, 0.0])
-            normals.append([(nx[i]+nx[i+1])*0.5, (ny[i]+ny[i+1])*0.5, (nz[i]+nz[i+1])*0.5])
-            #texcoords.append([t-delta*0.5, 1])
+        mesh = combine(
+            parametricSurface(side, self._resolution, 1, (0.0, 2.0 * math.pi), poles=(True, False)),
+            flip(parametricSurface(capSurface(base, [0.0, -h2, 0.0], [0.0, -1.0, 0.0]),
+                                   self._resolution, 1, (0.0, 2.0 * math.pi), poles=(True, False))))
+        self._vertices = mesh['vertices']
+        self._normals = mesh['normals']
+        self._indices = mesh['indices']
 
-            vertices.append([x[i], -h2, z[i]])
-            normals.append([nx[i], ny[i], nz[i]])
-            #texcoords.append([t, 0.0])
 
-            vertices.append([x[i+1], -h2, z[i+1]])
-            normals.append([nx[i+1], ny[i+1], nz[i+1]])
-            #texcoords.append([t-delta, 0.0])
+    def boundingRadius(self):
+        """Returns the radius of a sphere around the untransformed geometry"""
+        return math.sqrt(self._radius * self._radius + 0.25 * self._height * self._height)
 
-            #t -= delta
 
-        vertices_side = np.array(vertices, dtype=np.float32)
-        normals_side = np.array(normals, dtype=np.float32)
-        #textcoords_side = np.array(normals, dtype=np.float32)
-        self._num_vertices_side = len(vertices_side)
+    def setLevelResolution(self, resolution):
+        """Sets the resolution of the next geometry, or of the procedural one"""
+        self._resolution = resolution
+        self._vertices = None
+        if self._procedural is not None:
+            self.setProceduralResolution(resolution, 1)
 
-        ##  bottom cap
-        vertices, normals = [[0.0, -h2, 0.0]], [[0.0, -1.0, 0.0]]
-        for i in list(reversed(range(self._resolution+1))):
-            vertices.append([x[i], -h2, z[i]])
-            normals.append([0.0, -1.0, 0.0])
-        vertices_bot = np.array(vertices, dtype=np.float32)
-        normals_bot = np.array(normals, dtype=np.float32)
-        self._num_vertices_bot = len(vertices_bot)
 
-        self._vertices = np.concatenate((vertices_side, vertices_bot))
-        self._normals = np.concatenate((normals_side, normals_bot))
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Cone', self._radius, self._height, self._resolution)
 
 
     def initialize(self):
         """Creates cone geometry"""
+        if self._gpu:
+            self.createProcedural(Actor.Surface.Cone, self._resolution, 1, self._radius, self._height)
+            return
+
         if self._vertices is None:
-            self.generateGeometry()
+            self.acquireGeometry()
 
         ## create object
-        self.create(self._vertices, normals=self._normals)
+        self.create(self._vertices, normals=self._normals, indices=self._indices)
 
 
     def render(self):
         """Render cube"""
-        GL.glDrawArrays(GL.GL_TRIANGLES, 0, self._num_vertices_side)
-        GL.glDrawArrays(GL.GL_TRIANGLE_FAN, self._num_vertices_side, self._num_vertices_bot)
+        if self._procedural is not None:
+            self.drawArrays(GL.GL_TRIANGLES)
+        else:
+            self.drawElements(GL.GL_TRIANGLES)
 
     
\ No newline at end of file
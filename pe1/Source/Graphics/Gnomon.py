@@ -51,4 +51,5 @@ class Gnomon(Scene):
     	max_width = self._maxsize * self._viewer.devicePixelRatio()
     	max_height = self._maxsize * self._viewer.devicePixelRatio()
 
-    	GL.glViewport(int(width - max_width), 0, int(max_width), int(max_height))
\ No newline at end of file
+    	GL.glViewport(int(width - max_width), 0, int(max_width), int(max_height))
+    	self.setViewportSize(max_width, max_height)
\ No newline at end of file
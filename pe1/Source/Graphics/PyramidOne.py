@@ -43,7 +43,7 @@ class Pyramid(Actor):
 		self.create(self.vertices_, normals=self.normals_, indices=self.indices_)
 
 	def render(self):
-		GL.glDrawElements(self._render_mode, self.numberOfIndices, GL.GL_UNSIGNED_INT, None)
+		self.drawElements(self._render_mode)
 from OpenGL import GL
 from Source.Graphics.Actor import Actor
 
@@ -88,4 +88,4 @@ class Pyramid(Actor):
 		self.create(self.vertices_, normals=self.normals_, indices=self.indices_)
 
 	def render(self):
-		GL.glDrawElements(self._render_mode, self.numberOfIndices, GL.GL_UNSIGNED_INT, None)
\ No newline at end of file
+		self.drawElements(self._render_mode)
\ No newline at end of file
@@ -45,13 +45,11 @@ class Pyramid(Actor):
 		self.create(self.vertices_, normals=self.normals_)
 
 	def render(self):
-		GL.glDrawArrays(self._render_mode, 0, len(self.vertices_))
+		self.drawArrays(self._render_mode, len(self.vertices_))
 
 		self._normal_visualizing_shader.bind()
 		self._normal_visualizing_shader.setUniformValue("modelMatrix", self._transform)
-		self._normal_visualizing_shader.setUniformValue("viewMatrix", self._scene.camera.viewMatrix)
-		self._normal_visualizing_shader.setUniformValue("projectionMatrix", self._scene.camera.projectionMatrix)
 		self._normal_visualizing_shader.setUniformValue("normalMatrix", self._transform.normalMatrix())
 		
-		GL.glDrawArrays(self._render_mode, 0, len(self.vertices_))
+		self.drawArrays(self._render_mode, len(self.vertices_))
 		self._normal_visualizing_shader.release()
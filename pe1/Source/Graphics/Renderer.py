@@ -26,6 +26,11 @@ import Source.Graphics.PyramidOne as PyramidOne
 import Source.Graphics.PyramidTwo as PyramidTwo
 from Source.Graphics.SpherePolar import SpherePolar
 from Source.Graphics.SphereIcos import SphereIcos
+from Source.Graphics.SphereImpostors import SphereImpostors
+from Source.Graphics.Torus import Torus
+from Source.Graphics.Capsule import Capsule
+from Source.Graphics.Superquadric import Superquadric
+from Source.Graphics.mesh_arena import defaultArena
 
 from enum import IntEnum
 
@@ -40,6 +45,9 @@ class Renderer(QOpenGLWidget):
         PYRAMID_2 = 6
         SPHERE_POLAR = 7,
         SPHERE_ICOS = 8,
+        TORUS = 9,
+        CAPSULE = 10,
+        SUPERQUADRIC = 11,
 
     ## initialization
     def __init__(self, parent=None, **kwargs):
@@ -146,6 +154,7 @@ class Renderer(QOpenGLWidget):
             self._elapsed_timer.restart()
             self._frameElapsed = 0
             self._gpuElapsed = 0
+            self._primitivesGenerated = 0
 
             self._initialized = True
 
@@ -155,6 +164,9 @@ class Renderer(QOpenGLWidget):
             SCENE = 0 #polar spheres
             #SCENE = 1 #tessalation spheres
             #SCENE = 2 #test scene
+            #SCENE = 3 #field of small spheres with levels of detail
+            #SCENE = 4 #sphere field drawn as impostors or as meshes, compare the GPU times
+            #SCENE = 5 #city of 1000 buildings sharing the buffers of a mesh arena
             if(SCENE == 0):
                 xform1 = QMatrix4x4()
                 xform2 = QMatrix4x4()
@@ -189,6 +201,41 @@ class Renderer(QOpenGLWidget):
                                     innerLevel=1, outerLevel=5, transform=xform1,
                                     mode=GL.GL_PATCHES, colors=True)
                 self._world.addActor(self._actor1)
+            elif(SCENE == 3):
+                for i in range(-20, 20):
+                    for j in range(-20, 20):
+                        xform = QMatrix4x4()
+                        xform.translate(i * 0.5, 0.0, j * 0.5)
+                        self._world.addActor(SpherePolar(self._world, 0.15, 64, 32, transform=xform, lods=[8, 16, 32, 64]))
+            elif(SCENE == 4):
+                IMPOSTORS = True
+                count = 1000000 if IMPOSTORS else 10000
+                rng = np.random.default_rng(0)
+                centers = rng.uniform(-2.0, 2.0, (count, 3))
+                radii = rng.uniform(0.005, 0.015, count) * (1000000 / count) ** (1.0 / 3.0)
+                if IMPOSTORS:
+                    self._world.addActor(SphereImpostors(self._world, centers, radii, colors=rng.uniform(0.2, 1.0, (count, 3))))
+                else:
+                    for center, radius in zip(centers, radii):
+                        xform = QMatrix4x4()
+                        xform.translate(*center)
+                        xform.scale(radius)
+                        self._world.addActor(SpherePolar(self._world, 1.0, 16, 8, transform=xform))
+            elif(SCENE == 5):
+                ARENA = True
+                rng = np.random.default_rng(0)
+                for i in range(-16, 16):
+                    for j in range(-16, 16):
+                        if (i * 32 + j) % 43 == 0:
+                            continue
+                        xform = QMatrix4x4()
+                        height = rng.uniform(0.2, 1.5)
+                        xform.translate(i * 0.3, height * 0.5, j * 0.3)
+                        xform.scale(0.1, height * 0.5, 0.1)
+                        if (i + j) % 7 == 0:
+                            self._world.addActor(Cylinder(self._world, arena=defaultArena if ARENA else None, transform=xform))
+                        else:
+                            self._world.addActor(Cube(self._world, arena=defaultArena if ARENA else None, transform=xform))
 
         else:
             
@@ -198,8 +245,9 @@ class Renderer(QOpenGLWidget):
             ## initialize gnomon
             self._gnomon.initialize()
 
-        ## initialize OpenGL timer
+        ## initialize OpenGL timer and primitive counter
         self._query = GL.glGenQueries(1)
+        self._primitivesQuery = GL.glGenQueries(1)
 
 
     def clear(self):
@@ -209,7 +257,7 @@ class Renderer(QOpenGLWidget):
 
 
     def renderTimeEstimates(self):
-        return [self._frameElapsed, self._gpuElapsed]
+        return [self._frameElapsed, self._gpuElapsed, self._primitivesGenerated]
 
 
     @property
@@ -261,13 +309,15 @@ class Renderer(QOpenGLWidget):
         ## record render time statistics
         if self._statistics:
 
-            ## begin GPU time query
+            ## begin GPU time query, and count the triangles leaving tessellation
             GL.glBeginQuery(GL.GL_TIME_ELAPSED, self._query)
+            GL.glBeginQuery(GL.GL_PRIMITIVES_GENERATED, self._primitivesQuery)
 
             ## render scene
             self.renderScene()
 
             ## finish GPU time query
+            GL.glEndQuery(GL.GL_PRIMITIVES_GENERATED)
             GL.glEndQuery(GL.GL_TIME_ELAPSED)
 
             ## record render time statistics, need to stall the CPU a bit
@@ -275,6 +325,7 @@ class Renderer(QOpenGLWidget):
             while not ready:
                 ready = GL.glGetQueryObjectiv(self._query, GL.GL_QUERY_RESULT_AVAILABLE)
             self._gpuElapsed = GL.glGetQueryObjectuiv(self._query, GL.GL_QUERY_RESULT ) / 1000000.0
+            self._primitivesGenerated = GL.glGetQueryObjectuiv(self._primitivesQuery, GL.GL_QUERY_RESULT)
 
             ## delete query object
             #GL.glDeleteQueries( self._query )
@@ -290,6 +341,8 @@ class Renderer(QOpenGLWidget):
     def resizeGL(self, width, height):
         """ Called by the Qt libraries whenever the window is resized"""
         self._world.camera.setAspectRatio(width / float(height if height > 0.0 else 1.0))
+        ## Qt sets the viewport to the framebuffer, in device pixels
+        self._world.setViewportSize(width * self.devicePixelRatio(), height * self.devicePixelRatio())
 
 
     def pan(self, point, state='start'):
@@ -525,6 +578,12 @@ class Renderer(QOpenGLWidget):
             self.currentActor_ = SphereIcos(self._world, radius=1.0, innerLevel=2, outerLevel=2, transform=xform, mode=GL.GL_PATCHES)
         elif index == Renderer.ActorType.SPHERE_POLAR:
             self.currentActor_ = SpherePolar(self._world, 1.0, 40, 40, transform=xform)
+        elif index == Renderer.ActorType.TORUS:
+            self.currentActor_ = Torus(self._world, transform=xform)
+        elif index == Renderer.ActorType.CAPSULE:
+            self.currentActor_ = Capsule(self._world, transform=xform)
+        elif index == Renderer.ActorType.SUPERQUADRIC:
+            self.currentActor_ = Superquadric(self._world, transform=xform)
         self._world.addActor(self.currentActor_)
         
 
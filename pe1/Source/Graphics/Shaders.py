@@ -1,3 +1,7 @@
+import re
+import ctypes
+import numpy as np
+from OpenGL import GL
 from PyQt5.QtCore import QObject
 from PyQt5.QtGui import QOpenGLShader, QOpenGLShaderProgram
 
@@ -6,6 +10,9 @@ class Shaders(QObject):
 
     __instance = None
 
+    ## camera and light uniform block written once per frame by the scene, see frameData
+    FrameDataBinding = 0
+
     def __new__(cls):
         if Shaders.__instance is None:
             Shaders.__instance = QObject.__new__(cls)
@@ -18,121 +25,169 @@ class Shaders(QObject):
 
         ## create tessalation shader to subdivide icosahedron
         self.__instance._subdivTessalationShader = QOpenGLShaderProgram()
-        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs())
-        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs())
-        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes())
-        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs())
+        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs()))
+        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs()))
+        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes()))
+        self.__instance._subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs()))
         self.__instance._subdivTessalationShader.link()
 
         ## create tessalation shader to subdivide icosahedron WITHOUT LIGHT
         self.__instance._subdivTessalationShaderNoLight = QOpenGLShaderProgram()
-        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs())
-        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs())
-        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_nl())
-        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs_nl())
+        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs()))
+        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs()))
+        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_nl()))
+        self.__instance._subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs_nl()))
         self.__instance._subdivTessalationShaderNoLight.link()
 
         ## create tessalation shader to subdivide icosahedron FLAT
         self.__instance._subdivTessalationShaderFLAT = QOpenGLShaderProgram()
-        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs())
-        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs())
-        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_flat())
-        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs_flat())
+        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs()))
+        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs()))
+        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_flat()))
+        self.__instance._subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs_flat()))
         self.__instance._subdivTessalationShaderFLAT.link()
 
         # COLOR
         ## create tessalation shader to subdivide icosahedron
         self.__instance._color_subdivTessalationShader = QOpenGLShaderProgram()
-        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs_c())
-        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs_c())
-        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_c())
-        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs_c())
+        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs_c()))
+        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs_c()))
+        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_c()))
+        self.__instance._color_subdivTessalationShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs_c()))
         self.__instance._color_subdivTessalationShader.link()
 
         # COLOR
         ## create tessalation shader to subdivide icosahedron WITHOUT LIGHT
         self.__instance._color_subdivTessalationShaderNoLight = QOpenGLShaderProgram()
-        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs_c())
-        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs_c())
-        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_c_nl())
-        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs_c_nl())
+        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs_c()))
+        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs_c()))
+        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_c_nl()))
+        self.__instance._color_subdivTessalationShaderNoLight.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs_c_nl()))
         self.__instance._color_subdivTessalationShaderNoLight.link()
 
         # COLOR
         ## create tessalation shader to subdivide icosahedron FLAT
         self.__instance._color_subdivTessalationShaderFLAT = QOpenGLShaderProgram()
-        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs_c())
-        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs_c())
-        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_cflat())
-        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.si_fs_c_flat())
+        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs_c()))
+        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs_c()))
+        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_cflat()))
+        self.__instance._color_subdivTessalationShaderFLAT.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.si_fs_c_flat()))
         self.__instance._color_subdivTessalationShaderFLAT.link()
 
         ## create background shader program
         self.__instance._backgroundShader = QOpenGLShaderProgram()
-        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeColorNoTransformVertexShader())
-        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeColorNoTransformVertexShader()))
+        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._backgroundShader.link()
 
         ## create uniform material shader with no lighting 
         self.__instance._wireframeMaterialShader = QOpenGLShaderProgram()
-        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.wireframeMaterialVertexShader())
-        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.wireframeMaterialVertexShader()))
+        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._wireframeMaterialShader.link()
 
         ## create uniform material shader with no lighting 
         self.__instance._uniformMaterialShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialVertexShader())
-        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialVertexShader()))
+        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._uniformMaterialShader.link()
 
         ## create uniform material with no lighting calculations
         self.__instance._attributeColorShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeColorTransformVertexShader())
-        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeColorTransformVertexShader()))
+        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._attributeColorShader.link()
 
         ## create Phong mesh shader
         self.__instance._uniformMaterialPhongShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialPhongVertexShader())
-        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.uniformMaterialPhongFragmentShader())
+        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexShader()))
+        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentShader()))
         self.__instance._uniformMaterialPhongShader.link()
 
         ## create color-based Phong mesh shader
         self.__instance._attributeColorPhongShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeMaterialPhongVertexShader())
-        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.attributeMaterialPhongFragmentShader())
+        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeMaterialPhongVertexShader()))
+        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.attributeMaterialPhongFragmentShader()))
         self.__instance._attributeColorPhongShader.link()
 
         ## create Phong mesh shader
         self.__instance._uniformMaterialPhongFlatShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialPhongVertexFlatShader())
-        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.uniformMaterialPhongFragmentFlatShader())
+        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexFlatShader()))
+        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentFlatShader()))
         self.__instance._uniformMaterialPhongFlatShader.link()
 
         ## create color-based Phong mesh shader
         self.__instance._attributeColorPhongFlatShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeMaterialPhongVertexFlatShader())
-        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.attributeMaterialPhongFragmentFlatShader())
+        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeMaterialPhongVertexFlatShader()))
+        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.attributeMaterialPhongFragmentFlatShader()))
         self.__instance._attributeColorPhongFlatShader.link()
 
         ## create simple textured-based mesh shader
         self.__instance._texturedShader = QOpenGLShaderProgram()
-        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.texturedVertexShader())
-        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.texturedFragmentShader())
+        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.texturedVertexShader()))
+        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.texturedFragmentShader()))
         self.__instance._texturedShader.link()    
 
         ## create simple textured-based mesh flat shader
         self.__instance._texturedFlatShader = QOpenGLShaderProgram()
-        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.texturedVertexFlatShader())
-        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.texturedFragmentFlatShader())
+        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.texturedVertexFlatShader()))
+        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.texturedFragmentFlatShader()))
         self.__instance._texturedFlatShader.link()    
 
         self.__instance._normalVisShader = QOpenGLShaderProgram()
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.normalVisVertexShader())
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Geometry, Shaders.normalVisGeometryShader())
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.normalVisFragmentShader())
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.normalVisVertexShader()))
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Geometry, Shaders.frameData(Shaders.normalVisGeometryShader()))
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.normalVisFragmentShader()))
         self.__instance._normalVisShader.link()
 
+        ## create shaders capturing the tessellated sphere once with transform feedback
+        self.__instance._subdivCaptureShader = QOpenGLShaderProgram()
+        self.__instance._subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs()))
+        self.__instance._subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs()))
+        self.__instance._subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_capture()))
+        Shaders.captureVaryings(self.__instance._subdivCaptureShader, ["capturedPosition", "capturedNormal"])
+        self.__instance._subdivCaptureShader.link()
+
+        self.__instance._color_subdivCaptureShader = QOpenGLShaderProgram()
+        self.__instance._color_subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.si_vs_c()))
+        self.__instance._color_subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.frameData(Shaders.si_tcs_c()))
+        self.__instance._color_subdivCaptureShader.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.frameData(Shaders.si_tes_capture(colors=True)))
+        Shaders.captureVaryings(self.__instance._color_subdivCaptureShader, ["capturedPosition", "capturedNormal", "capturedColor"])
+        self.__instance._color_subdivCaptureShader.link()
+
+        ## create shaders drawing procedural surfaces without vertex buffers
+        self.__instance._proceduralMaterialShader = QOpenGLShaderProgram()
+        self.__instance._proceduralMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialVertexShader())))
+        self.__instance._proceduralMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
+        self.__instance._proceduralMaterialShader.link()
+
+        self.__instance._proceduralPhongShader = QOpenGLShaderProgram()
+        self.__instance._proceduralPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialPhongVertexShader())))
+        self.__instance._proceduralPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentShader()))
+        self.__instance._proceduralPhongShader.link()
+
+        self.__instance._proceduralPhongFlatShader = QOpenGLShaderProgram()
+        self.__instance._proceduralPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialPhongVertexFlatShader())))
+        self.__instance._proceduralPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentFlatShader()))
+        self.__instance._proceduralPhongFlatShader.link()
+
+        ## sphere impostors, one ray cast quad per instance
+        self.__instance._sphereImpostorPhongShader = QOpenGLShaderProgram()
+        self.__instance._sphereImpostorPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.sphereImpostorVertexShader()))
+        self.__instance._sphereImpostorPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.sphereImpostorPhongFragmentShader()))
+        self.__instance._sphereImpostorPhongShader.link()
+
+        self.__instance._sphereImpostorMaterialShader = QOpenGLShaderProgram()
+        self.__instance._sphereImpostorMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.sphereImpostorVertexShader()))
+        self.__instance._sphereImpostorMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.sphereImpostorMaterialFragmentShader()))
+        self.__instance._sphereImpostorMaterialShader.link()
+
+        ## GLSL 4.0 has no binding layout qualifier for blocks
+        for each in vars(self.__instance).values():
+            if isinstance(each, QOpenGLShaderProgram):
+                block = GL.glGetUniformBlockIndex(each.programId(), "FrameData")
+                if block != GL.GL_INVALID_INDEX:
+                    GL.glUniformBlockBinding(each.programId(), block, Shaders.FrameDataBinding)
 
 
     @classmethod
@@ -152,6 +207,57 @@ class Shaders(QObject):
         """
         return vertexShaderSource
 
+    @classmethod
+    def si_tcs_levels(cls):
+        ## shared by the control shaders, levels either fixed or from the projected size of every edge
+        levelSource = (
+        '''
+		uniform int innerSubdivisionLevel;
+		uniform int outerSubdivisionLevel;
+
+		uniform bool adaptiveSubdivision;
+		uniform vec2 viewportSize;
+		uniform float pixelsPerSegment;
+		uniform int maxSubdivisionLevel;
+
+		uniform mat4 viewMatrix;
+		uniform mat4 modelMatrix;
+		uniform mat4 projectionMatrix;
+		uniform float radius;
+
+		// segments for the edge between two patch corners, a function of the unordered pair
+		// so the two patches sharing an edge agree on it and leave no cracks
+		float edgeLevel(vec3 a, vec3 b)
+		{
+			vec4 first = viewMatrix * modelMatrix * vec4(radius * normalize(a), 1.0);
+			vec4 second = viewMatrix * modelMatrix * vec4(radius * normalize(b), 1.0);
+			vec4 center = projectionMatrix * (0.5 * (first + second));
+
+			// pixel diameter of the sphere around the edge, independent of its orientation
+			float pixels = distance(first.xyz, second.xyz) * projectionMatrix[1][1] * 0.5 * viewportSize.y / max(center.w, 1e-3);
+			return clamp(ceil(pixels / pixelsPerSegment), 1.0, float(maxSubdivisionLevel));
+		}
+
+		void setTessellationLevels()
+		{
+			if (adaptiveSubdivision) {
+				// outer level i belongs to the edge opposite corner i
+				gl_TessLevelOuter[0] = edgeLevel(vPosition[1], vPosition[2]);
+				gl_TessLevelOuter[1] = edgeLevel(vPosition[2], vPosition[0]);
+				gl_TessLevelOuter[2] = edgeLevel(vPosition[0], vPosition[1]);
+				gl_TessLevelInner[0] = max(gl_TessLevelOuter[0], max(gl_TessLevelOuter[1], gl_TessLevelOuter[2]));
+			}
+			else {
+				gl_TessLevelInner[0] = innerSubdivisionLevel;
+				gl_TessLevelOuter[0] = outerSubdivisionLevel;
+				gl_TessLevelOuter[1] = outerSubdivisionLevel;
+				gl_TessLevelOuter[2] = outerSubdivisionLevel;
+			}
+		}
+		'''
+        )
+        return levelSource
+
     @classmethod
     def si_tcs(cls):
         controlTessalationShaderSource = (
@@ -162,24 +268,18 @@ class Shaders(QObject):
 		smooth in vec3 vPosition[];
         smooth in vec3 vNormal[];
 
-		uniform int innerSubdivisionLevel;
-		uniform int outerSubdivisionLevel;
-        uniform vec2 uvplane[12];
+		''' + cls.si_tcs_levels() + '''
 
 		out vec3 tcPosition[];
 		out vec3 tcNormal[];
-        smooth out vec2 tcUVplane[];
 
 		void main()
 		{
 
 			tcPosition[gl_InvocationID] = vPosition[gl_InvocationID];
             tcNormal[gl_InvocationID] = vNormal[gl_InvocationID];
-            tcUVplane[gl_InvocationID] = uvplane[gl_InvocationID];
-			gl_TessLevelInner[0] = innerSubdivisionLevel;
-			gl_TessLevelOuter[0] = outerSubdivisionLevel;
-			gl_TessLevelOuter[1] = outerSubdivisionLevel;
-			gl_TessLevelOuter[2] = outerSubdivisionLevel;
+			if (gl_InvocationID == 0)
+				setTessellationLevels();
 		}
 		'''
         )
@@ -194,7 +294,6 @@ class Shaders(QObject):
 
 		in vec3 tcPosition[];
         in vec3 tcNormal[];
-        smooth in vec2 tcUVplane[];
 
         uniform mat4 viewMatrix;
         uniform mat4 modelMatrix;
@@ -207,6 +306,7 @@ class Shaders(QObject):
         out vec3 tePatchDistance;
         out vec4 tePosition;
         out vec4 teNormal;
+        smooth out vec2 teUV;
         smooth out vec3 lightDirection;
         smooth out float attenuation;
 
@@ -224,11 +324,9 @@ class Shaders(QObject):
 			vec3 n2 = gl_TessCoord.z * tcNormal[2];
             vec3 normal = vec3(normalize(n0 + n1 + n2));
 
-            //uvplane values
-			vec2 uv0 = gl_TessCoord.x * tcUVplane[0];
-			vec2 uv1 = gl_TessCoord.y * tcUVplane[1];
-			vec2 uv2 = gl_TessCoord.z * tcUVplane[2];
-            vec2 uv = vec2(normalize(uv0 + uv1 + uv2));
+            //spherical texture coordinates of the point on the sphere
+            vec3 direction = pos / radius;
+            teUV = vec2(atan(direction.z, direction.x) / (2.0 * 3.14159265) + 0.5, asin(clamp(direction.y, -1.0, 1.0)) / 3.14159265 + 0.5);
             
             //light values
             if (lightPosition.w == 0.0) {
@@ -520,8 +618,7 @@ class Shaders(QObject):
         smooth in vec3 vNormal[];
         smooth in vec3 vColor[];
 
-		uniform int innerSubdivisionLevel;
-		uniform int outerSubdivisionLevel;
+		''' + cls.si_tcs_levels() + '''
 
 		out vec3 tcPosition[];
 		out vec3 tcNormal[];
@@ -531,10 +628,8 @@ class Shaders(QObject):
 			tcPosition[gl_InvocationID] = vPosition[gl_InvocationID];
             tcNormal[gl_InvocationID] = vNormal[gl_InvocationID];
             tcColor[gl_InvocationID] = vColor[gl_InvocationID];
-			gl_TessLevelInner[0] = innerSubdivisionLevel;
-			gl_TessLevelOuter[0] = outerSubdivisionLevel;
-			gl_TessLevelOuter[1] = outerSubdivisionLevel;
-			gl_TessLevelOuter[2] = outerSubdivisionLevel;
+			if (gl_InvocationID == 0)
+				setTessellationLevels();
 		}
 		'''
         )
@@ -853,6 +948,46 @@ class Shaders(QObject):
         return fragmentShaderSource
 
 
+    @classmethod
+    def si_tes_capture(cls, colors=False):
+        ## object space triangles written to a buffer by transform feedback, see captureVaryings
+        evalShader = (
+            """
+		#version 400 core
+		layout(triangles, equal_spacing, ccw) in;
+
+		in vec3 tcPosition[];
+        in vec3 tcNormal[];
+        """ + ("in vec3 tcColor[];" if colors else "") + """
+
+        uniform float radius;
+
+        out vec3 capturedPosition;
+        out vec3 capturedNormal;
+        """ + ("out vec3 capturedColor;" if colors else "") + """
+
+		void main()
+		{
+            vec3 p = gl_TessCoord.x * tcPosition[0] + gl_TessCoord.y * tcPosition[1] + gl_TessCoord.z * tcPosition[2];
+            vec3 n = gl_TessCoord.x * tcNormal[0] + gl_TessCoord.y * tcNormal[1] + gl_TessCoord.z * tcNormal[2];
+            capturedPosition = radius * normalize(p);
+            capturedNormal = normalize(n);
+            """ + ("capturedColor = normalize(gl_TessCoord.x * tcColor[0] + gl_TessCoord.y * tcColor[1] + gl_TessCoord.z * tcColor[2]);" if colors else "") + """
+			gl_Position = vec4(capturedPosition, 1.0);
+		}
+		"""
+        )
+        return evalShader
+
+
+    @staticmethod
+    def captureVaryings(program, names):
+        """Record the named outputs of a program interleaved by transform feedback, call before linking"""
+        names = (ctypes.c_char_p * len(names))(*[name.encode() for name in names])
+        GL.glTransformFeedbackVaryings(program.programId(), len(names),
+            ctypes.cast(names, ctypes.POINTER(ctypes.POINTER(GL.GLchar))), GL.GL_INTERLEAVED_ATTRIBS)
+
+
     @classmethod
     def attributeColorTransformVertexShader(cls):
         vertexShaderSource = """
@@ -1585,6 +1720,301 @@ class Shaders(QObject):
             fragColor = vec4(1.0, 1.0, 0.0, 1.0);
         }"""
 
+    @classmethod
+    def proceduralSurface(cls):
+        ## vertex of a cone, cylinder or latitude-longitude sphere from gl_VertexID alone, replaces the vertex attributes
+        surfaceSource = """
+        uniform int surfaceType;
+        uniform int uResolution;
+        uniform int vResolution;
+        uniform float radius;
+        uniform float height;
+
+        const float PI = 3.14159265358979;
+
+        // two triangles per quad, quads numbered along u, then v, then band
+        const ivec2 corners[6] = ivec2[6](ivec2(0, 0), ivec2(0, 1), ivec2(1, 1), ivec2(0, 0), ivec2(1, 1), ivec2(1, 0));
+
+        void surfacePoint(out vec3 position, out vec3 normal)
+        {
+            int quad = gl_VertexID / 6;
+            int row = quad / uResolution;
+            int band = row / vResolution;
+
+            // bottom caps face down, their triangles are wound the other way
+            bool flipped = (surfaceType == 0 && band == 1) || (surfaceType == 1 && band == 2);
+            ivec2 corner = corners[flipped ? 5 - gl_VertexID % 6 : gl_VertexID % 6];
+            float step = 2.0 * PI / float(uResolution);
+            float u = float(quad % uResolution + corner.x) * step;
+            int line = row % vResolution + corner.y;
+            float t = float(line) / float(vResolution);
+            float h2 = 0.5 * height;
+
+            if (surfaceType == 0) {
+                vec3 rim = vec3(cos(u) * radius, -h2, sin(u) * radius);
+                if (band == 0) {
+                    // the apex takes the mean normal of the two rim corners of its triangle
+                    vec2 slope = vec2(height, radius) * inversesqrt(height * height + radius * radius);
+                    normal = vec3(cos(u) * slope.x, slope.y, sin(u) * slope.x);
+                    if (line == 0)
+                        normal = 0.5 * (normal + vec3(cos(u + step) * slope.x, slope.y, sin(u + step) * slope.x));
+                    position = mix(vec3(0.0, h2, 0.0), rim, t);
+                }
+                else {
+                    normal = vec3(0.0, -1.0, 0.0);
+                    position = mix(vec3(0.0, -h2, 0.0), rim, t);
+                }
+            }
+            else if (surfaceType == 1) {
+                vec3 rim = vec3(-sin(u) * radius, 0.0, -cos(u) * radius);
+                if (band == 0) {
+                    normal = vec3(0.0, 1.0, 0.0);
+                    position = mix(vec3(0.0, h2, 0.0), rim + vec3(0.0, h2, 0.0), t);
+                }
+                else if (band == 1) {
+                    normal = vec3(-sin(u), 0.0, -cos(u));
+                    position = rim + vec3(0.0, h2 - t * height, 0.0);
+                }
+                else {
+                    normal = vec3(0.0, -1.0, 0.0);
+                    position = mix(vec3(0.0, -h2, 0.0), rim - vec3(0.0, h2, 0.0), t);
+                }
+            }
+            else {
+                float polar = t * PI;
+                normal = vec3(sin(polar) * cos(u), sin(polar) * sin(u), cos(polar));
+                position = radius * normal;
+            }
+        }
+        """
+        return surfaceSource
+
+
+    @classmethod
+    def procedural(cls, vertexShaderSource):
+        """Returns a vertex shader with its position and normal attributes generated by proceduralSurface"""
+        vertexShaderSource = vertexShaderSource.replace("layout(location = 0) in vec3 position;", cls.proceduralSurface())
+        vertexShaderSource = vertexShaderSource.replace("layout(location = 1) in vec3 normal;", "")
+        return vertexShaderSource.replace("void main()\n        {", "void main()\n        {\n            vec3 position, normal;\n            surfacePoint(position, normal);", 1)
+
+
+    @classmethod
+    def frameDataBlock(cls):
+        ## camera and light shared by every program, 208 bytes in std140, see packFrameData
+        blockSource = """
+        layout(std140) uniform FrameData {
+            mat4 viewMatrix;
+            mat4 projectionMatrix;
+            vec4 lightPosition;
+            vec3 lightAttenuation;
+            Light light;
+        };
+        """
+        return blockSource
+
+
+    @classmethod
+    def frameData(cls, source):
+        """Returns a shader stage with its camera and light uniforms replaced by the FrameData block"""
+        declaration = re.compile(r"^[ \t]*uniform (mat4 viewMatrix|mat4 projectionMatrix|vec4 lightPosition|vec3 lightAttenuation|Light light);[ \t]*\n", re.M)
+        if not declaration.search(source):
+            return source
+        source = declaration.sub("", source)
+        ## the block holds a Light, declared after the stage's own definition or added after the version
+        struct = re.search(r"struct Light \{[^}]*\};", source)
+        if struct is None:
+            struct = re.search(r"#version[^\n]*\n", source)
+            return source[:struct.end()] + cls.frameLight() + cls.frameDataBlock() + source[struct.end():]
+        return source[:struct.end()] + cls.frameDataBlock() + source[struct.end():]
+
+
+    @classmethod
+    def frameLight(cls):
+        lightSource = """
+        struct Light {
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+        };
+        """
+        return lightSource
+
+
+    @staticmethod
+    def packFrameData(viewMatrix, projectionMatrix, lightPosition, lightAttenuation, ambient, diffuse, specular):
+        """Returns the FrameData block as std140 floats, matrices column major and vec3 padded to vec4"""
+        data = np.zeros(52, dtype=np.float32)
+        data[0:16] = viewMatrix.data()
+        data[16:32] = projectionMatrix.data()
+        data[32:36] = [lightPosition.x(), lightPosition.y(), lightPosition.z(), lightPosition.w()]
+        for offset, vector in ((36, lightAttenuation), (40, ambient), (44, diffuse), (48, specular)):
+            data[offset:offset + 3] = [vector.x(), vector.y(), vector.z()]
+        return data
+
+
+    @classmethod
+    def sphereImpostorVertexShader(cls):
+        vertexShaderSource = """
+        #version 400
+        layout(location = 0) in vec3 center;
+        layout(location = 1) in float sphereRadius;
+        layout(location = 2) in vec3 color;
+        uniform mat4 modelMatrix;
+        uniform mat4 viewMatrix;
+        uniform mat4 projectionMatrix;
+
+        flat out vec3 sphereCenter;
+        flat out float radius;
+        flat out vec3 sphereColor;
+        smooth out vec3 quadPosition;
+
+        void main()
+        {
+            // one quad per instance, corners of a triangle strip from gl_VertexID
+            vec2 corner = vec2(float(gl_VertexID & 1), float(gl_VertexID >> 1)) * 2.0 - 1.0;
+            float scale = max(max(length(modelMatrix[0].xyz), length(modelMatrix[1].xyz)), length(modelMatrix[2].xyz));
+            sphereCenter = (viewMatrix * modelMatrix * vec4(center, 1.0)).xyz;
+            radius = sphereRadius * scale;
+            sphereColor = color;
+
+            vec3 right = vec3(1.0, 0.0, 0.0);
+            vec3 up = vec3(0.0, 1.0, 0.0);
+            float halfSize = radius;
+            if (projectionMatrix[2][3] != 0.0) {
+                // perspective, the quad faces the eye and spans the silhouette cone where it crosses the center
+                float distance = length(sphereCenter);
+                vec3 toEye = -sphereCenter / distance;
+                right = normalize(abs(toEye.y) < 0.999 ? cross(vec3(0.0, 1.0, 0.0), toEye) : vec3(1.0, 0.0, 0.0));
+                up = cross(toEye, right);
+                halfSize = distance > radius ? radius * distance * inversesqrt(distance * distance - radius * radius) : 0.0;
+            }
+            quadPosition = sphereCenter + halfSize * (corner.x * right + corner.y * up);
+            gl_Position = projectionMatrix * vec4(quadPosition, 1.0);
+        }
+        """
+        return vertexShaderSource
+
+
+    @classmethod
+    def sphereImpostorRayCast(cls):
+        ## nearest hit of the eye ray through the quad with the sphere, shared by the impostor fragment shaders
+        rayCastSource = """
+        uniform mat4 projectionMatrix;
+
+        flat in vec3 sphereCenter;
+        flat in float radius;
+        flat in vec3 sphereColor;
+        smooth in vec3 quadPosition;
+
+        vec3 sphereHit(out vec3 normal)
+        {
+            // rays leave the eye in perspective, run along -z from the quad in orthographic projection
+            bool perspective = projectionMatrix[2][3] != 0.0;
+            vec3 origin = perspective ? vec3(0.0) : vec3(quadPosition.xy, 0.0);
+            vec3 direction = perspective ? normalize(quadPosition) : vec3(0.0, 0.0, -1.0);
+            vec3 offset = origin - sphereCenter;
+            float b = dot(direction, offset);
+            float discriminant = b * b - dot(offset, offset) + radius * radius;
+            if (discriminant < 0.0)
+                discard;
+            vec3 position = origin + (-b - sqrt(discriminant)) * direction;
+            normal = (position - sphereCenter) / radius;
+
+            // depth of the hit instead of the quad
+            vec4 clip = projectionMatrix * vec4(position, 1.0);
+            gl_FragDepth = 0.5 * (gl_DepthRange.diff * clip.z / clip.w + gl_DepthRange.near + gl_DepthRange.far);
+            return position;
+        }
+        """
+        return rayCastSource
+
+
+    @classmethod
+    def sphereImpostorPhongFragmentShader(cls):
+        fragmentShaderSource = """
+        #version 400
+        struct Material {
+            vec3 emission;
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+            float shininess;
+        };
+
+        struct Light {
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+        };
+        """ + cls.sphereImpostorRayCast() + """
+        uniform Material material;
+        uniform Light light;
+        uniform vec4 lightPosition;
+        uniform vec3 lightAttenuation;
+        uniform bool instanceColors;
+
+        out vec4 fragColor;
+
+        void main()
+        {
+            vec3 N;
+            vec3 vertexPosition = sphereHit(N);
+
+            // light direction and attenuation of the hit
+            vec3 L = normalize(lightPosition.xyz);
+            float attenuation = 1.0;
+            if (lightPosition.w != 0.0) {
+                L = normalize(lightPosition.xyz - vertexPosition);
+                float distance = length(lightPosition.xyz - vertexPosition);
+                attenuation = 1.0 / (lightAttenuation.x + lightAttenuation.y * distance + lightAttenuation.z * distance * distance);
+            }
+
+            // ambient term
+            vec3 ambient = material.ambient * light.ambient;
+
+            // diffuse term
+            vec3 diffuse = light.diffuse * (instanceColors ? sphereColor : material.diffuse) * max(dot(N, L), 0.0);
+
+            // specular term
+            vec3 E = normalize(-vertexPosition);
+            vec3 R = normalize(-reflect(L, N));
+            vec3 specular = light.specular * material.specular * pow(max(dot(R, E), 0.0), material.shininess);
+
+            // final intensity
+            vec3 intensity = material.emission + clamp(ambient + attenuation * (diffuse + specular), 0.0, 1.0);
+            fragColor = vec4(intensity, 1.0);
+        }
+        """
+        return fragmentShaderSource
+
+
+    @classmethod
+    def sphereImpostorMaterialFragmentShader(cls):
+        fragmentShaderSource = """
+        #version 400
+        struct Material {
+            vec3 emission;
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+            float shininess;
+        };
+        """ + cls.sphereImpostorRayCast() + """
+        uniform Material material;
+        uniform bool instanceColors;
+
+        out vec4 fragColor;
+
+        void main()
+        {
+            vec3 normal;
+            sphereHit(normal);
+            fragColor = vec4(instanceColors ? sphereColor : material.diffuse, 1.0);
+        }
+        """
+        return fragmentShaderSource
+
+
     def backgroundShader(self):
         return self.__instance._backgroundShader
 
@@ -1624,6 +2054,12 @@ class Shaders(QObject):
     def color_subdivTessalationShaderFLAT(self):
         return self.__instance._color_subdivTessalationShaderFLAT
 
+    def subdivCaptureShader(self):
+        return self.__instance._subdivCaptureShader
+
+    def color_subdivCaptureShader(self):
+        return self.__instance._color_subdivCaptureShader
+
 
     def attributeColorPhongFlatShader(self):
         return self.__instance._attributeColorPhongFlatShader
@@ -1636,3 +2072,18 @@ class Shaders(QObject):
 
     def normalVisShader(self):
         return self.__instance._normalVisShader
+
+    def proceduralMaterialShader(self):
+        return self.__instance._proceduralMaterialShader
+
+    def proceduralPhongShader(self):
+        return self.__instance._proceduralPhongShader
+
+    def proceduralPhongFlatShader(self):
+        return self.__instance._proceduralPhongFlatShader
+
+    def sphereImpostorPhongShader(self):
+        return self.__instance._sphereImpostorPhongShader
+
+    def sphereImpostorMaterialShader(self):
+        return self.__instance._sphereImpostorMaterialShader
@@ -1,11 +1,14 @@
-import math
 import numpy as np
 from OpenGL import GL
 from Source.Graphics.Actor import Actor
-from PyQt5.QtGui import QVector2D
+from Source.Graphics.icosphere import baseIcosahedron, icosphere, levelForTessellation
+from PyQt5.QtGui import QOpenGLBuffer, QOpenGLShader, QOpenGLVertexArrayObject, QVector2D
 
 class SphereIcos(Actor):
 
+    ## subdivision uniforms last sent to each of the shared tessellation programs
+    SentUniforms = {}
+
     ## initialization
     def __init__(self, renderer,  **kwargs):
         """Initialize actor."""
@@ -16,8 +19,49 @@ class SphereIcos(Actor):
         self._radius = kwargs.get("radius", 1.0)
         self._rgb_colors = kwargs.get("colors", False)
 
+        ## adaptive mode sizes every edge to its length on screen, up to maxLevel segments
+        self._adaptive = kwargs.get("adaptive", False)
+        self._pixelsPerSegment = kwargs.get("pixelsPerSegment", 8.0)
+        self._maxLevel = kwargs.get("maxLevel", 64)
+
+        ## draw a single ray cast quad instead of tessellating
+        self._impostor = kwargs.get("impostor", False)
+
+        ## subdivide on the CPU when the context has no tessellation stages
+        self._cpu_subdivision = (self._render_mode == GL.GL_PATCHES and
+            not QOpenGLShader.hasOpenGLShaders(QOpenGLShader.TessellationControl))
+        if self._cpu_subdivision:
+            self._render_mode = GL.GL_TRIANGLES
+        else:
+            ## the evaluation shader projects patch corners onto the sphere, quantized positions would skip the model matrix
+            self._layout = None
+
+        ## tessellate once into a buffer and redraw it as plain triangles until the levels change
+        self._capture = (kwargs.get("capture", False) and self._render_mode == GL.GL_PATCHES and
+            not self._cpu_subdivision and not self._impostor)
+        self._captured = None
+        self._capacity = 0
+        self._transform_feedback = None
+        self._patches = None
+        self._feedback = None
+        if self._capture:
+            ## the captured triangles are drawn from a vertex array of their own
+            self._arena = None
+            self._capture_shader = (self.shaderCollection.color_subdivCaptureShader() if self._rgb_colors
+                else self.shaderCollection.subdivCaptureShader())
+
         ## register shaders
-        if self._rgb_colors:
+        if (self._cpu_subdivision or self._capture) and self._rgb_colors:
+            self.setSolidShader(self.shaderCollection.attributeColorPhongShader())
+            self.setSolidFlatShader(self.shaderCollection.attributeColorPhongFlatShader())
+            self.setNoLightSolidShader(self.shaderCollection.attributeColorShader())
+            self.setWireframeShader(self.shaderCollection.uniformMaterialShader())
+        elif self._cpu_subdivision or self._capture:
+            self.setSolidShader(self.shaderCollection.uniformMaterialPhongShader())
+            self.setSolidFlatShader(self.shaderCollection.uniformMaterialPhongFlatShader())
+            self.setNoLightSolidShader(self.shaderCollection.uniformMaterialShader())
+            self.setWireframeShader(self.shaderCollection.uniformMaterialPhongShader())
+        elif self._rgb_colors:
             self.setSolidShader(self.shaderCollection.color_subdivTessalationShader())
             self.setSolidFlatShader(self.shaderCollection.color_subdivTessalationShaderFLAT())
             self.setNoLightSolidShader(self.shaderCollection.color_subdivTessalationShaderNoLight())
@@ -38,109 +82,26 @@ class SphereIcos(Actor):
         self.initialize()
 
 
-    def addVertex(self, v, vertices):
-        """Add a vertex into the array"""
-        vn = v / np.linalg.norm(v) * self._radius
-        vertices += [[vn[0], vn[1], vn[2]]]
-        return len(vertices)-1
-
-
-    def getMiddlePoint(self, p1, p2, vertices, indexCache):
-        """Returns index of point in the middle of p1 and p2"""
-
-        ## first check if we have it already
-        firstIsSmaller = p1 < p2;
-        smallerIndex = p1 if p1 < p2 else p2
-        greaterIndex = p2 if p1 < p2 else p1
-        key = (smallerIndex << 32) + greaterIndex
-
-        try:
-            ret = indexCache[key]
-            return ret
-        except:
-            pass
-
-        ## not in cache, calculate it
-        point1 = vertices[p1]
-        point2 = vertices[p2]
-        middle = ((point1[0] + point2[0]) / 2.0, (point1[1] + point2[1]) / 2.0, (point1[2] + point2[2]) / 2.0)
-
-        ## add vertex makes sure point is on unit sphere
-        index = self.addVertex(np.array(middle), vertices)
-
-        ## store it, return index
-        indexCache[key] = index
-
-        return index
-
-
     def generateGeometry(self):
         """Generate vertices"""
-        vertices = []
-        indices = []
-        uv = []
-
-        t = (1.0 + math.sqrt(5.0)) / 2.0
-        self.addVertex(np.array((-1.0,  t,  0)), vertices)
-        self.addVertex(np.array(( 1.0,  t,  0)), vertices)
-        self.addVertex(np.array((-1.0, -t,  0)), vertices)
-        self.addVertex(np.array(( 1.0, -t,  0)), vertices)
-
-        self.addVertex(np.array(( 0, -1.0,  t)), vertices)
-        self.addVertex(np.array(( 0,  1.0,  t)), vertices)
-        self.addVertex(np.array(( 0, -1.0, -t)), vertices)
-        self.addVertex(np.array(( 0,  1.0, -t)), vertices)
-
-        self.addVertex(np.array(( t,  0, -1.0)), vertices)
-        self.addVertex(np.array(( t,  0,  1.0)), vertices)
-        self.addVertex(np.array((-t,  0, -1.0)), vertices)
-        self.addVertex(np.array((-t,  0,  1.0)), vertices)
-
-        for i in range (len(vertices)):
-            v = vertices[i]/np.linalg.norm(vertices[i])
-            uv += [[math.atan2(v[2], v[0])/(2*math.pi), 0.5  + math.asin(v[1])/0.5]]
-        ## 5 faces around point 0
-        indices += [[0, 11, 5]]
-        indices += [[0, 11, 5]]
-        indices += [[0, 5, 1]]
-        indices += [[0, 1, 7]]
-        indices += [[0, 7, 10]]
-        indices += [[0, 10, 11]]
-
-        ## 5 adjacent faces 
-        indices += [[1, 5, 9]]
-        indices += [[5, 11, 4]]
-        indices += [[11, 10, 2]]
-        indices += [[10, 7, 6]]
-        indices += [[7, 1, 8]]
-
-        ## 5 faces around point 3
-        indices += [[3, 9, 4]]
-        indices += [[3, 4, 2]]
-        indices += [[3, 2, 6]]
-        indices += [[3, 6, 8]]
-        indices += [[3, 8, 9]]
-
-        ## 5 adjacent faces 
-        indices += [[4, 9, 5]]
-        indices += [[2, 4, 11]]
-        indices += [[6, 2, 10]]
-        indices += [[8, 6, 7]]
-        indices += [[9, 8, 1]]
-        
-        aux = []
-        for i in range (len(vertices)):
-            aux += [QVector2D(vertices[i][0], vertices[i][1])]
-
-        self._vertices = np.array(vertices, dtype=np.float32)
+        if self._cpu_subdivision:
+            vertices, indices = icosphere(levelForTessellation(max(self._inLevel, self._ouLevel)), self._radius)
+        else:
+            ## texture coordinates are computed per tessellated vertex in the evaluation shader
+            vertices, indices = baseIcosahedron(self._radius)
+
+        self._vertices = vertices.astype(np.float32)
         if self._rgb_colors:
-            self._colors = np.abs(np.array(vertices, dtype=np.float32))
-        self._normals = np.array(vertices, dtype=np.float32)
-        self._indices = np.array(indices, dtype=np.uint32)
-        self._uv = np.array(aux, dtype=QVector2D)
+            self._colors = np.abs(self._vertices)
+        self._normals = self._vertices
+        self._indices = indices.astype(np.uint32)
 
     def initialize(self):
         """Creates icosahedron geometry"""
+        if self._impostor:
+            self.createImpostors([0.0, 0.0, 0.0], self._radius)
+            return
+
         if self._vertices is None:
             self.generateGeometry()
 
@@ -150,19 +111,152 @@ class SphereIcos(Actor):
         self.create(self._vertices, colors=self._colors if self._rgb_colors else None,
             normals=self._normals,
             indices=self._indices)
-            
+        if self._capture:
+            self.createCapture()
+
+
+    def createCapture(self):
+        """Keep the patches for capturing, the vertex array drawn reads the captured triangles instead"""
+        self._patches = self._vao
+        self._vao = QOpenGLVertexArrayObject()
+        self._feedback = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self._feedback.setUsagePattern(QOpenGLBuffer.DynamicCopy)
+        self._feedback.create()
+        self._capacity = 0
+        self._captured = None
+
+        ## interleaved position, normal and color, in the order of the capture varyings
+        attributes = ['position', 'normal'] + (['color'] if self._rgb_colors else [])
+        stride = 3 * len(attributes) * np.dtype(np.float32).itemsize
+        shaders = [self._solid_shader, self._solid_flat_shader, self._nolight_solid_shader,
+            self._wireframe_shader, self._nolight_wireframe_shader]
+        self._vao.create()
+        self._vao.bind()
+        self._feedback.bind()
+        for index, name in enumerate(attributes):
+            for each in shaders:
+                each.setAttributeBuffer(name, GL.GL_FLOAT, index * 3 * np.dtype(np.float32).itemsize, 3, stride)
+                each.enableAttributeArray(name)
+        self._feedback.release(QOpenGLBuffer.VertexBuffer)
+        self._vao.release()
+
+
+    def captureKey(self):
+        """Returns what the captured triangles depend on, adaptive levels also follow the camera"""
+        key = self.subdivisionUniforms()
+        if self._adaptive:
+            camera = self._scene.camera
+            key += (tuple(self._transform.data()), tuple(camera.viewMatrix.data()), tuple(camera.projectionMatrix.data()))
+        return key
+
+
+    def capture(self):
+        """Tessellate the patches into the feedback buffer, drawn later without reading back how many triangles it holds"""
+        program = self._capture_shader
+        program.bind()
+        program.setUniformValue("modelMatrix", self._transform)
+        self.sendSubdivisionUniforms(program)
+
+        ## equal spacing cuts a patch with all levels at most m into at most 3m^2/2 triangles, reached when all are m
+        m = self._maxLevel if self._adaptive else max(self._inLevel, self._ouLevel, 1)
+        capacity = (self.numberOfIndices // 3) * (3 * m * m + 1) // 2
+        vertexSize = (9 if self._rgb_colors else 6) * np.dtype(np.float32).itemsize
+        if self._transform_feedback is None:
+            ## older PyOpenGL returns a single name, newer an array of one
+            self._transform_feedback = int(np.ravel(GL.glGenTransformFeedbacks(1))[0])
+        GL.glBindTransformFeedback(GL.GL_TRANSFORM_FEEDBACK, self._transform_feedback)
+        if capacity > self._capacity:
+            self._capacity = capacity
+            self._feedback.bind()
+            self._feedback.allocate(capacity * 3 * vertexSize)
+            self._feedback.release(QOpenGLBuffer.VertexBuffer)
+            GL.glBindBufferBase(GL.GL_TRANSFORM_FEEDBACK_BUFFER, 0, self._feedback.bufferId())
+
+        self._patches.bind()
+        GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+        GL.glBeginTransformFeedback(GL.GL_TRIANGLES)
+        GL.glDrawElements(GL.GL_PATCHES, self.numberOfIndices, GL.GL_UNSIGNED_INT, None)
+        GL.glEndTransformFeedback()
+        GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+        GL.glBindTransformFeedback(GL.GL_TRANSFORM_FEEDBACK, 0)
+        self._patches.release()
+        program.release()
+
+
+    def setLevels(self, innerLevel, outerLevel):
+        """Sets the tessellation levels, sent to the shader at the next frame"""
+        self._inLevel = innerLevel
+        self._ouLevel = outerLevel
+
+
+    def setAdaptive(self, adaptive, pixelsPerSegment=None, maxLevel=None):
+        """Switches between fixed and screen space tessellation levels"""
+        self._adaptive = adaptive
+        if pixelsPerSegment is not None:
+            self._pixelsPerSegment = pixelsPerSegment
+        if maxLevel is not None:
+            self._maxLevel = maxLevel
+
+
+    def subdivisionUniforms(self):
+        """Returns the values of the subdivision uniforms"""
+        viewport = tuple(self._scene.viewportSize()) if self._adaptive else None
+        return (self._inLevel, self._ouLevel, self._radius, self._adaptive, viewport, self._pixelsPerSegment, self._maxLevel)
+
+
+    def sendSubdivisionUniforms(self, program):
+        """Sends the subdivision uniforms to a tessellation program, only when they changed"""
+        values = self.subdivisionUniforms()
+        if SphereIcos.SentUniforms.get(program) != values:
+            inLevel, ouLevel, radius, adaptive, viewport, pixelsPerSegment, maxLevel = values
+            program.setUniformValue("innerSubdivisionLevel", inLevel)
+            program.setUniformValue("outerSubdivisionLevel", ouLevel)
+            program.setUniformValue("radius", radius)
+            program.setUniformValue("adaptiveSubdivision", int(adaptive))
+            if adaptive:
+                program.setUniformValue("viewportSize", QVector2D(float(viewport[0]), float(viewport[1])))
+                program.setUniformValue("pixelsPerSegment", float(pixelsPerSegment))
+                program.setUniformValue("maxSubdivisionLevel", int(maxLevel))
+            SphereIcos.SentUniforms[program] = values
+
+
+    def setUniformBindings(self, wireframe=False):
+        """Sets up uniform shader bindings, subdivision uniforms only when they changed"""
+        super(SphereIcos, self).setUniformBindings(wireframe)
+        if self._cpu_subdivision or self._impostor or self._capture:
+            return
+        self.sendSubdivisionUniforms(self._active_shader)
+
+
+    def beginRendering(self, draw_style, lighting, shading, passNumber):
+        """Capture the tessellation again when what it depends on changed, once for all passes"""
+        if self._capture:
+            key = self.captureKey()
+            if key != self._captured:
+                self.capture()
+                self._captured = key
+        super(SphereIcos, self).beginRendering(draw_style, lighting, shading, passNumber)
+
 
     def render(self):
         """Render icosahedron"""
-        self._active_shader.bind()
-        self._active_shader.setUniformValue("innerSubdivisionLevel", self._inLevel)
-        self._active_shader.setUniformValue("outerSubdivisionLevel", self._ouLevel)
-        self._active_shader.setUniformValue("radius", self._radius)
-        if (self._active_shader == self._solid_shader and self._render_mode == GL.GL_PATCHES):
-            for i in range (self.numberOfVertices):
-                s = "uvplane[" + str(i) + "]"
-                self._active_shader.setAttributeValue(s, self._uv[i])
-        GL.glDrawElements(self._render_mode, self.numberOfIndices, GL.GL_UNSIGNED_INT, None)
-        self._active_shader.release()
-
-    
\ No newline at end of file
+        if self._impostors:
+            GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, self._impostors)
+            return
+        if self._capture:
+            ## the vertex count stays on the GPU, the CPU never waits for the capture
+            GL.glDrawTransformFeedback(GL.GL_TRIANGLES, self._transform_feedback)
+            return
+        self.drawElements(self._render_mode)
+
+
+    def destroy(self):
+        """Free the patches and captured triangles as well"""
+        super(SphereIcos, self).destroy()
+        if self._patches is not None:
+            self._patches.destroy()
+            self._feedback.destroy()
+            self._patches = None
+        if self._transform_feedback is not None:
+            GL.glDeleteTransformFeedbacks(1, [self._transform_feedback])
+            self._transform_feedback = None
@@ -0,0 +1,54 @@
+import numpy as np
+from OpenGL import GL
+from Source.Graphics.Actor import Actor
+
+class SphereImpostors(Actor):
+
+    ## initialization
+    def __init__(self, renderer, centers, radii=1.0, colors=None, **kwargs):
+        """Initialize actor."""
+        super(SphereImpostors, self).__init__(renderer, **kwargs)
+
+        ## one sphere per row, radii may be a single value shared by all
+        self._centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        self._radii = np.broadcast_to(np.asarray(radii, dtype=np.float32).ravel(), (len(self._centers),))
+        self._colors = colors
+
+        ## spheres moved every frame with setSpheres are streamed through a ring of buffers
+        self._dynamic = kwargs.get("dynamic", False)
+
+        ## create actor
+        self.initialize()
+
+
+    @property
+    def count(self):
+        """Returns the number of spheres"""
+        return len(self._centers)
+
+
+    def boundingRadius(self):
+        """Returns the radius of a sphere around every untransformed sphere"""
+        if not len(self._centers):
+            return 0.0
+        return float(np.max(np.linalg.norm(self._centers, axis=1) + self._radii))
+
+
+    def initialize(self):
+        """Creates the per sphere buffers"""
+        self.createImpostors(self._centers, self._radii, self._colors, stream=self._dynamic)
+
+
+    def setSpheres(self, centers, radii=None, colors=None):
+        """Move dynamic spheres, radii and colors given at creation are kept when None"""
+        self._centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        if radii is not None:
+            self._radii = np.broadcast_to(np.asarray(radii, dtype=np.float32).ravel(), (len(self._centers),))
+        if colors is not None:
+            self._colors = colors
+        self.updateImpostors(self._centers, self._radii, self._colors)
+
+
+    def render(self):
+        """Render spheres"""
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, self._impostors)
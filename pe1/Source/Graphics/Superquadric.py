@@ -0,0 +1,82 @@
+import math
+import numpy as np
+from OpenGL import GL
+from Source.Graphics.Actor import Actor
+from Source.Graphics.parametric import parametricSurface
+
+class Superquadric(Actor):
+
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals', '_indices']
+
+    ## initialization
+    def __init__(self, renderer,  **kwargs):
+        """Initialize actor."""
+        super(Superquadric, self).__init__(renderer, **kwargs)
+
+        ## superellipsoid with radii along x, y and z, squareness along y and around it
+        self._radii = tuple(kwargs.get("radii", (1.0, 1.0, 1.0)))
+        self._vertical_exponent = kwargs.get("verticalExponent", 0.5)
+        self._horizontal_exponent = kwargs.get("horizontalExponent", 0.5)
+        self._resolution = kwargs.get("resolution", 32)
+        self._rings = kwargs.get("rings", 16)
+
+        self._vertices = None
+
+        ## create actor
+        self.initialize()
+
+
+    @property
+    def radii(self):
+        """Returns the radii along x, y and z"""
+        return self._radii
+
+
+    def generateGeometry(self):
+        """Generate geometry"""
+        a, b, c = self._radii
+        e1, e2 = self._vertical_exponent, self._horizontal_exponent
+
+        def power(x, e):
+            """Signed power, keeps the octant of every point"""
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.sign(x) * np.abs(x) ** e
+
+        def surface(u, v):
+            """Longitude u around the y axis and polar angle v from the top"""
+            cu, su = np.cos(u), -np.sin(u)
+            cv, sv = np.cos(v), np.sin(v)
+            positions = np.stack((a * power(sv, e1) * power(cu, e2), b * power(cv, e1), c * power(sv, e1) * power(su, e2)), axis=-1)
+            normals = np.stack((power(sv, 2.0 - e1) * power(cu, 2.0 - e2) / a, power(cv, 2.0 - e1) / b,
+                                power(sv, 2.0 - e1) * power(su, 2.0 - e2) / c), axis=-1)
+            ## exponents above 2 leave the normal undefined where a coordinate vanishes, use the direction from the center
+            direction = positions / np.maximum(np.linalg.norm(positions, axis=-1, keepdims=True), 1e-12)
+            with np.errstate(invalid='ignore'):
+                length = np.linalg.norm(normals, axis=-1, keepdims=True)
+                normals = np.where(np.isfinite(length) & (length > 0.0), normals / np.where(length > 0.0, length, 1.0), direction)
+            return positions, normals
+
+        mesh = parametricSurface(surface, self._resolution, self._rings, (0.0, 2.0 * math.pi), (0.0, math.pi), poles=(True, True))
+        self._vertices = mesh['vertices']
+        self._normals = mesh['normals']
+        self._indices = mesh['indices']
+
+
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Superquadric', self._radii, self._vertical_exponent, self._horizontal_exponent, self._resolution, self._rings)
+
+
+    def initialize(self):
+        """Creates superquadric geometry"""
+        if self._vertices is None:
+            self.acquireGeometry()
+
+        ## create object
+        self.create(self._vertices, normals=self._normals, indices=self._indices)
+
+
+    def render(self):
+        """Render superquadric"""
+        self.drawElements(GL.GL_TRIANGLES)
@@ -0,0 +1,71 @@
+import math
+import numpy as np
+from OpenGL import GL
+from Source.Graphics.Actor import Actor
+from Source.Graphics.parametric import parametricSurface
+
+class Torus(Actor):
+
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals', '_indices']
+
+    ## initialization
+    def __init__(self, renderer,  **kwargs):
+        """Initialize actor."""
+        super(Torus, self).__init__(renderer, **kwargs)
+
+        self._radius = kwargs.get("radius", 1.0)
+        self._tube_radius = kwargs.get("tubeRadius", 0.25)
+        self._resolution = kwargs.get("resolution", 32)
+        self._tube_resolution = kwargs.get("tubeResolution", 16)
+
+        self._vertices = None
+
+        ## create actor
+        self.initialize()
+
+
+    @property
+    def radius(self):
+        """Returns the distance from the center to the middle of the tube"""
+        return self._radius
+
+
+    @property
+    def tubeRadius(self):
+        """Returns the radius of the tube"""
+        return self._tube_radius
+
+
+    def generateGeometry(self):
+        """Generate geometry"""
+
+        def surface(u, v):
+            """Angle u around the y axis and v around the tube"""
+            normals = np.stack((np.cos(v) * np.cos(u), np.sin(v), np.cos(v) * np.sin(u)), axis=-1)
+            centers = np.stack((np.cos(u), np.zeros(u.shape), np.sin(u)), axis=-1) * self._radius
+            return centers + normals * self._tube_radius, normals
+
+        mesh = parametricSurface(surface, self._resolution, self._tube_resolution, (0.0, 2.0 * math.pi), (0.0, 2.0 * math.pi))
+        self._vertices = mesh['vertices']
+        self._normals = mesh['normals']
+        self._indices = mesh['indices']
+
+
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Torus', self._radius, self._tube_radius, self._resolution, self._tube_resolution)
+
+
+    def initialize(self):
+        """Creates torus geometry"""
+        if self._vertices is None:
+            self.acquireGeometry()
+
+        ## create object
+        self.create(self._vertices, normals=self._normals, indices=self._indices)
+
+
+    def render(self):
+        """Render torus"""
+        self.drawElements(GL.GL_TRIANGLES)
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from PyQt5.QtGui import QOpenGLContext
+
+
+class GeometryRegistry:
+    """Process wide, reference counted geometry shared by identical primitives"""
+
+    ## geometries without users kept for reuse, e.g. by transform handles rebuilt on every key press
+    Retained = 32
+
+    def __init__(self, retained=Retained):
+        """Initialize registry"""
+        self._retained = retained
+        ## key -> [attribute values, users]
+        self._arrays = {}
+        ## (key, context) -> [vertex buffer, index buffer, users]
+        self._buffers = {}
+        ## unused entries, oldest first
+        self._idleArrays = OrderedDict()
+        self._idleBuffers = OrderedDict()
+
+
+    def acquire(self, key, generate):
+        """Returns the generated attribute values of a key, calling generate only when not already present"""
+        entry = self._arrays.get(key)
+        if entry is None:
+            entry = self._arrays[key] = [generate(), 0]
+        self._idleArrays.pop(key, None)
+        entry[1] += 1
+        return entry[0]
+
+
+    def buffers(self, key):
+        """Returns the vertex and index buffers of a key in the current context, None if not uploaded"""
+        slot = (key, QOpenGLContext.currentContext())
+        entry = self._buffers.get(slot)
+        if entry is None:
+            return None
+        self._idleBuffers.pop(slot, None)
+        entry[2] += 1
+        return entry[0], entry[1]
+
+
+    def storeBuffers(self, key, vbo, ibo):
+        """Share buffers uploaded by the first user of a key in the current context"""
+        self._buffers[(key, QOpenGLContext.currentContext())] = [vbo, ibo, 1]
+
+
+    def release(self, key, buffers=True):
+        """Drop one user of a key, unused geometry is kept until more than retained are idle"""
+        slot = (key, QOpenGLContext.currentContext())
+        entry = self._buffers.get(slot) if buffers else None
+        if entry is not None:
+            entry[2] -= 1
+            if entry[2] == 0:
+                self._idleBuffers[slot] = None
+        entry = self._arrays.get(key)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._idleArrays[key] = None
+        self.trim(self._retained)
+
+
+    def trim(self, retained=0):
+        """Free idle geometry beyond the retained count, buffers only of the current context"""
+        while len(self._idleArrays) > retained:
+            key, _ = self._idleArrays.popitem(last=False)
+            del self._arrays[key]
+        context = QOpenGLContext.currentContext()
+        idle = [slot for slot in self._idleBuffers if slot[1] == context]
+        for slot in idle[:max(0, len(self._idleBuffers) - retained)]:
+            vbo, ibo, _ = self._buffers.pop(slot)
+            vbo.destroy()
+            ibo.destroy()
+            del self._idleBuffers[slot]
+
+
+    def statistics(self):
+        """Returns the number of shared array and buffer sets, their users and how many are idle"""
+        return {
+            'arrays': len(self._arrays),
+            'arrayUsers': sum(users for _, users in self._arrays.values()),
+            'idleArrays': len(self._idleArrays),
+            'buffers': len(self._buffers),
+            'bufferUsers': sum(users for _, _, users in self._buffers.values()),
+            'idleBuffers': len(self._idleBuffers)}
+
+
+## registry shared by every actor
+defaultRegistry = GeometryRegistry()
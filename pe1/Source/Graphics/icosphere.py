@@ -0,0 +1,63 @@
+import math
+import numpy as np
+
+
+def project(vertices, radius):
+    """Scale every row onto the sphere of the given radius"""
+    return vertices / np.linalg.norm(vertices, axis=1, keepdims=True) * radius
+
+
+def baseIcosahedron(radius=1.0):
+    """Returns the vertices and faces of the icosahedron every icosphere starts from"""
+    t = (1.0 + math.sqrt(5.0)) / 2.0
+    vertices = np.array([
+        (-1.0,  t,  0), ( 1.0,  t,  0), (-1.0, -t,  0), ( 1.0, -t,  0),
+        ( 0, -1.0,  t), ( 0,  1.0,  t), ( 0, -1.0, -t), ( 0,  1.0, -t),
+        ( t,  0, -1.0), ( t,  0,  1.0), (-t,  0, -1.0), (-t,  0,  1.0)])
+
+    ## 5 faces around point 0 (the first one twice), 5 adjacent faces,
+    ## 5 faces around point 3 and their 5 adjacent faces
+    faces = np.array([
+        [0, 11, 5], [0, 11, 5], [0, 5, 1], [0, 1, 7], [0, 7, 10], [0, 10, 11],
+        [1, 5, 9], [5, 11, 4], [11, 10, 2], [10, 7, 6], [7, 1, 8],
+        [3, 9, 4], [3, 4, 2], [3, 2, 6], [3, 6, 8], [3, 8, 9],
+        [4, 9, 5], [2, 4, 11], [6, 2, 10], [8, 6, 7], [9, 8, 1]], dtype=np.int64)
+    return project(vertices, radius), faces
+
+
+def subdivide(vertices, faces, radius=1.0):
+    """Split every triangle into 4, adding one vertex per unique edge in first-use order"""
+    ## edges (0, 1), (1, 2), (2, 0) of every face, packed into one key per undirected edge
+    first = faces.ravel()
+    second = faces[:, [1, 2, 0]].ravel()
+    keys = (np.minimum(first, second) << 32) + np.maximum(first, second)
+    _, firstUse, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    ## number new vertices in the order the edges are first met
+    order = np.argsort(firstUse)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    edges = firstUse[order]
+    middle = project((vertices[first[edges]] + vertices[second[edges]]) / 2.0, radius)
+    midpoints = (len(vertices) + rank[inverse.ravel()]).reshape(-1, 3)
+
+    a, b, c = midpoints[:, 0], midpoints[:, 1], midpoints[:, 2]
+    split = np.stack((
+        np.stack((faces[:, 0], a, c), axis=1),
+        np.stack((faces[:, 1], b, a), axis=1),
+        np.stack((faces[:, 2], c, b), axis=1),
+        np.stack((a, b, c), axis=1)), axis=1)
+    return np.concatenate((vertices, middle)), split.reshape(-1, 3)
+
+
+def icosphere(level, radius=1.0):
+    """Returns the vertices and faces of an icosahedron subdivided level times"""
+    vertices, faces = baseIcosahedron(radius)
+    for _ in range(level):
+        vertices, faces = subdivide(vertices, faces, radius)
+    return vertices, faces
+
+
+def levelForTessellation(segments):
+    """Returns the subdivision level splitting edges into at least as many segments as a tessellation level"""
+    return max(0, int(math.ceil(math.log2(max(segments, 1)))))
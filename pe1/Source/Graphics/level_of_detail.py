@@ -0,0 +1,43 @@
+import math
+
+
+class LevelOfDetail:
+    """Resolutions of a primitive picked from its radius on screen, with hysteresis against flicker"""
+
+    ## screen pixels spanned by one segment of the silhouette
+    PixelsPerSegment = 8.0
+
+    ## fraction a level must be exceeded by, or undercut by, before switching
+    Hysteresis = 0.25
+
+    def __init__(self, resolutions, pixelsPerSegment=PixelsPerSegment, hysteresis=Hysteresis):
+        """Initialize with resolutions from coarsest to finest"""
+        self.resolutions = sorted(resolutions)
+        self.pixelsPerSegment = pixelsPerSegment
+        self.hysteresis = hysteresis
+
+
+    def segments(self, pixelRadius):
+        """Returns the segments around a silhouette of the given radius in pixels"""
+        return 2.0 * math.pi * pixelRadius / self.pixelsPerSegment
+
+
+    def first(self, wanted, margin):
+        """Returns the coarsest level with at least wanted segments after scaling by margin, else the finest"""
+        for index, resolution in enumerate(self.resolutions):
+            if resolution * margin >= wanted:
+                return index
+        return len(self.resolutions) - 1
+
+
+    def select(self, current, pixelRadius):
+        """Returns the level to draw, keeping the current one unless the radius moved well past it"""
+        wanted = self.segments(pixelRadius)
+        ## refine once the current level is clearly too coarse, coarsen to a level that is clearly enough
+        finer = self.first(wanted, 1.0)
+        if finer > current and wanted > self.resolutions[current] * (1.0 + self.hysteresis):
+            return finer
+        coarser = self.first(wanted, 1.0 - self.hysteresis)
+        if coarser < current:
+            return coarser
+        return current
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def parametricSurface(surface, uResolution, vResolution, uRange=(0.0, 1.0), vRange=(0.0, 1.0), poles=(False, False)):
+    """Returns indexed geometry of a surface sampled on a (vResolution + 1) x (uResolution + 1) grid"""
+    ## surface(u, v) returns positions and normals of shape u.shape + (3,) for arrays of parameters,
+    ## optionally followed by texture coordinates, otherwise the parameters scaled to [0, 1]
+    u = np.linspace(uRange[0], uRange[1], uResolution + 1)
+    v = np.linspace(vRange[0], vRange[1], vResolution + 1)
+    u, v = np.meshgrid(u, v)
+    result = surface(u, v)
+    if len(result) > 2:
+        texcoords = result[2]
+    else:
+        texcoords = np.stack(np.meshgrid(np.linspace(0.0, 1.0, uResolution + 1), np.linspace(0.0, 1.0, vResolution + 1)), axis=-1)
+
+    ## quad corners a, b along u and c, d one row further along v
+    a = np.arange(vResolution)[:, None] * (uResolution + 1) + np.arange(uResolution)
+    b, c, d = a + 1, a + uResolution + 1, a + uResolution + 2
+    lower = np.stack((a, c, d), axis=-1)
+    upper = np.stack((a, d, b), axis=-1)
+
+    ## a pole is a first or last row collapsed to a point, the triangle with two corners on it is degenerate
+    keepLower = np.ones(vResolution, dtype=bool)
+    keepUpper = np.ones(vResolution, dtype=bool)
+    keepUpper[0] &= not poles[0]
+    keepLower[-1] &= not poles[1]
+    triangles = np.stack((lower, upper), axis=2)
+    keep = np.stack((keepLower, keepUpper), axis=-1)[:, None, :].repeat(uResolution, axis=1)
+
+    return {
+        'vertices': np.asarray(result[0], dtype=np.float32).reshape(-1, 3),
+        'normals': np.asarray(result[1], dtype=np.float32).reshape(-1, 3),
+        'texcoords': np.asarray(texcoords, dtype=np.float32).reshape(-1, 2),
+        'indices': triangles[keep].astype(np.uint32)}
+
+
+def capSurface(curve, center, normal):
+    """Returns a flat surface filling a closed planar curve(u), v runs from the center to the curve"""
+    center = np.asarray(center, dtype=np.float64)
+    normal = np.asarray(normal, dtype=np.float64)
+
+    def surface(u, v):
+        positions = center + v[..., None] * (curve(u) - center)
+        return positions, np.broadcast_to(normal, positions.shape)
+    return surface
+
+
+def combine(*meshes):
+    """Concatenate indexed meshes into one, offsetting the indices of every part"""
+    offsets = np.cumsum([0] + [len(mesh['vertices']) for mesh in meshes])
+    combined = {name: np.concatenate([mesh[name] for mesh in meshes]) for name in ('vertices', 'normals', 'texcoords')}
+    combined['indices'] = np.concatenate([mesh['indices'] + np.uint32(offset) for mesh, offset in zip(meshes, offsets)])
+    return combined
+
+
+def flip(mesh):
+    """Returns a mesh with the winding of its triangles reversed"""
+    flipped = dict(mesh)
+    flipped['indices'] = mesh['indices'][:, ::-1]
+    return flipped
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Time a field of spheres drawn as ray cast impostors and as SpherePolar meshes, one draw per sphere like the actors."""
+## Run from the pe1 directory: python benchmarks/bench_impostors.py [--counts N ...] [--mesh-limit N] [--resolution R]
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+from OpenGL import GL
+from PyQt5.QtGui import (QGuiApplication, QMatrix4x4, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat,
+                         QOpenGLShader, QOpenGLShaderProgram, QVector3D, QVector4D)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from Source.Graphics.Shaders import Shaders
+from Source.Graphics.parametric import parametricSurface
+from bench_tessellation import createContext
+
+## spheres in the field
+Counts = [1000, 10000, 100000, 1000000]
+
+
+def createProgram(vertexShader, fragmentShader):
+    """Link a vertex and a fragment shader"""
+    program = QOpenGLShaderProgram()
+    program.addShaderFromSourceCode(QOpenGLShader.Vertex, vertexShader)
+    program.addShaderFromSourceCode(QOpenGLShader.Fragment, fragmentShader)
+    if not program.link():
+        raise RuntimeError(program.log())
+    return program
+
+
+def createField(count, seed=0):
+    """Returns centers, radii and colors of spheres scattered in a cube seen by the camera"""
+    rng = np.random.default_rng(seed)
+    side = 0.5 * count ** (1.0 / 3.0)
+    centers = rng.uniform(-side, side, (count, 3)).astype(np.float32)
+    radii = rng.uniform(0.1, 0.2, count).astype(np.float32)
+    colors = rng.uniform(0.2, 1.0, (count, 3)).astype(np.float32)
+    return centers, radii, colors, side
+
+
+def uploadArrays(arrays, divisor=0, indices=None):
+    """Upload planar attribute arrays to locations 0, 1, 2..., returns the vertex array and its buffers"""
+    vao = GL.glGenVertexArrays(1)
+    GL.glBindVertexArray(vao)
+    buffers = []
+    for location, values in enumerate(arrays):
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, values.nbytes, values, GL.GL_STATIC_DRAW)
+        GL.glEnableVertexAttribArray(location)
+        GL.glVertexAttribPointer(location, values.shape[1] if values.ndim > 1 else 1, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+        GL.glVertexAttribDivisor(location, divisor)
+        buffers.append(buffer)
+    if indices is not None:
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, buffer)
+        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL.GL_STATIC_DRAW)
+        buffers.append(buffer)
+    GL.glBindVertexArray(0)
+    return vao, buffers
+
+
+def setCommonUniforms(program, side, args):
+    """Camera, material and a headlight shared by both paths"""
+    projection = QMatrix4x4()
+    projection.perspective(45.0, args.width / args.height, 0.1, 10.0 * side + 100.0)
+    view = QMatrix4x4()
+    view.lookAt(QVector3D(0.0, 0.0, 3.0 * side), QVector3D(0.0, 0.0, 0.0), QVector3D(0.0, 1.0, 0.0))
+    program.setUniformValue("viewMatrix", view)
+    program.setUniformValue("projectionMatrix", projection)
+    program.setUniformValue("modelMatrix", QMatrix4x4())
+    program.setUniformValue("normalMatrix", QMatrix4x4().normalMatrix())
+    program.setUniformValue("material.emission", QVector3D(0.0, 0.0, 0.0))
+    program.setUniformValue("material.ambient", QVector3D(0.1, 0.1, 0.1))
+    program.setUniformValue("material.diffuse", QVector3D(0.6, 0.6, 0.6))
+    program.setUniformValue("material.specular", QVector3D(1.0, 1.0, 1.0))
+    program.setUniformValue("material.shininess", 32.0)
+    program.setUniformValue("light.ambient", QVector3D(0.5, 0.5, 0.5))
+    program.setUniformValue("light.diffuse", QVector3D(1.0, 1.0, 1.0))
+    program.setUniformValue("light.specular", QVector3D(1.0, 1.0, 1.0))
+    program.setUniformValue("lightPosition", QVector4D(0.0, 0.0, 1.0, 0.0))
+    program.setUniformValue("lightAttenuation", QVector3D(1.0, 0.0, 0.0))
+
+
+def timeFrames(draw, frames):
+    """Returns the mean GPU and CPU milliseconds of drawing a frame"""
+    ## older PyOpenGL returns a single name, newer an array of one
+    query = int(np.ravel(GL.glGenQueries(1))[0])
+    gpu = 0.0
+    start = time.perf_counter()
+    for _ in range(frames):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        GL.glBeginQuery(GL.GL_TIME_ELAPSED, query)
+        draw()
+        GL.glEndQuery(GL.GL_TIME_ELAPSED)
+        gpu += GL.glGetQueryObjectuiv(query, GL.GL_QUERY_RESULT) / 1000000.0
+    cpu = (time.perf_counter() - start) * 1000.0
+    GL.glDeleteQueries(1, [query])
+    return gpu / frames, cpu / frames
+
+
+def timeImpostors(program, count, args):
+    """Draw every sphere of the field as one instanced quad"""
+    centers, radii, colors, side = createField(count)
+    vao, buffers = uploadArrays([centers, radii, colors], divisor=1)
+    program.bind()
+    setCommonUniforms(program, side, args)
+    program.setUniformValue("instanceColors", 1)
+
+    def draw():
+        GL.glBindVertexArray(vao)
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, count)
+    result = timeFrames(draw, args.frames)
+    program.release()
+    GL.glDeleteBuffers(len(buffers), buffers)
+    GL.glDeleteVertexArrays(1, [vao])
+    return result
+
+
+def timeMeshes(program, count, args):
+    """Draw every sphere of the field as a SpherePolar mesh with its own model matrix"""
+    centers, radii, _, side = createField(count)
+
+    def surface(u, v):
+        normals = np.stack((np.sin(v) * np.cos(u), np.sin(v) * np.sin(u), np.cos(v)), axis=-1)
+        return normals, normals
+    mesh = parametricSurface(surface, args.resolution, args.resolution // 2, (0.0, 2.0 * np.pi), (0.0, np.pi), poles=(True, True))
+    vao, buffers = uploadArrays([mesh['vertices'], mesh['normals']], indices=mesh['indices'])
+    indices = mesh['indices'].size
+    program.bind()
+    setCommonUniforms(program, side, args)
+
+    transforms = []
+    for center, radius in zip(centers, radii):
+        transform = QMatrix4x4()
+        transform.translate(*map(float, center))
+        transform.scale(float(radius))
+        transforms.append((transform, transform.normalMatrix()))
+
+    def draw():
+        GL.glBindVertexArray(vao)
+        for transform, normalMatrix in transforms:
+            program.setUniformValue("modelMatrix", transform)
+            program.setUniformValue("normalMatrix", normalMatrix)
+            GL.glDrawElements(GL.GL_TRIANGLES, indices, GL.GL_UNSIGNED_INT, None)
+    result = timeFrames(draw, args.frames)
+    program.release()
+    GL.glDeleteBuffers(len(buffers), buffers)
+    GL.glDeleteVertexArrays(1, [vao])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs='+', default=Counts, help="numbers of spheres")
+    parser.add_argument("--mesh-limit", type=int, default=100000, help="largest field drawn as meshes")
+    parser.add_argument("--resolution", type=int, default=32, help="segments around a mesh sphere")
+    parser.add_argument("--frames", type=int, default=10, help="frames averaged per measurement")
+    parser.add_argument("--width", type=int, default=1280, help="framebuffer width in pixels")
+    parser.add_argument("--height", type=int, default=800, help="framebuffer height in pixels")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    context, surface = createContext()
+    glformat = QOpenGLFramebufferObjectFormat()
+    glformat.setAttachment(QOpenGLFramebufferObject.Depth)
+    framebuffer = QOpenGLFramebufferObject(args.width, args.height, glformat)
+    framebuffer.bind()
+    GL.glViewport(0, 0, args.width, args.height)
+    GL.glEnable(GL.GL_DEPTH_TEST)
+
+    impostors = createProgram(Shaders.sphereImpostorVertexShader(), Shaders.sphereImpostorPhongFragmentShader())
+    meshes = createProgram(Shaders.uniformMaterialPhongVertexShader(), Shaders.uniformMaterialPhongFragmentShader())
+
+    report = []
+    for count in args.counts:
+        entry = {'spheres': count}
+        entry['impostor_gpu_ms'], entry['impostor_cpu_ms'] = timeImpostors(impostors, count, args)
+        if count <= args.mesh_limit:
+            entry['mesh_gpu_ms'], entry['mesh_cpu_ms'] = timeMeshes(meshes, count, args)
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+
+    framebuffer.release()
+    context.doneCurrent()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
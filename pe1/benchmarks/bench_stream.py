@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Time moving a field of impostors every frame, rewriting one buffer in place against writing a ring of fenced slices."""
+## Run from the pe1 directory: python benchmarks/bench_stream.py [--counts N ...] [--frames F]
+import os
+import sys
+import json
+import time
+import ctypes
+import argparse
+import numpy as np
+
+from OpenGL import GL
+from PyQt5.QtGui import QGuiApplication, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from Source.Graphics.Shaders import Shaders
+from Source.Graphics.stream_buffer import StreamBuffer
+from bench_tessellation import createContext
+from bench_impostors import createProgram, createField, setCommonUniforms
+
+## spheres moved every frame
+Counts = [10000, 100000, 1000000]
+
+
+def pointAttributes(offset, count):
+    """Point center, radius and color at planar blocks starting at offset, read once per instance"""
+    for location, size in enumerate((3, 1, 3)):
+        GL.glEnableVertexAttribArray(location)
+        GL.glVertexAttribPointer(location, size, GL.GL_FLOAT, GL.GL_FALSE, 0, ctypes.c_void_p(offset))
+        GL.glVertexAttribDivisor(location, 1)
+        offset += count * size * np.dtype(np.float32).itemsize
+
+
+def timeFrames(move, draw, frames):
+    """Returns the mean CPU milliseconds of moving and drawing a frame, waiting for the GPU at the end"""
+    start = time.perf_counter()
+    for frame in range(frames):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        move(frame)
+        draw()
+    GL.glFinish()
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def timeSubData(count, args):
+    """Rewrite the instance buffer with glBufferSubData every frame, like Actor.updateBuffer"""
+    centers, radii, colors, _ = createField(count)
+    data = np.concatenate((centers.ravel(), radii, colors.ravel()))
+    vao = GL.glGenVertexArrays(1)
+    GL.glBindVertexArray(vao)
+    buffer = GL.glGenBuffers(1)
+    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer)
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data, GL.GL_DYNAMIC_DRAW)
+    pointAttributes(0, count)
+
+    def move(frame):
+        data[:centers.size] = (centers + 0.01 * frame).ravel()
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, data.nbytes, data)
+
+    def draw():
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, count)
+    result = timeFrames(move, draw, args.frames)
+    GL.glBindVertexArray(0)
+    GL.glDeleteBuffers(1, [buffer])
+    GL.glDeleteVertexArrays(1, [vao])
+    return result
+
+
+def timeStream(count, args, persistent):
+    """Write every frame into the next slice of a stream buffer, waiting only on its fence"""
+    centers, radii, colors, _ = createField(count)
+    stream = StreamBuffer((centers.size + radii.size + colors.size) * np.dtype(np.float32).itemsize, persistent=persistent)
+    stream.create()
+    vao = GL.glGenVertexArrays(1)
+    GL.glBindVertexArray(vao)
+
+    def move(frame):
+        data = stream.map().view(np.float32)
+        np.add(centers.ravel(), 0.01 * frame, out=data[:centers.size])
+        data[centers.size:centers.size + radii.size] = radii
+        data[centers.size + radii.size:centers.size + radii.size + colors.size] = colors.ravel()
+        stream.unmap()
+        stream.bind()
+        pointAttributes(stream.offset, count)
+
+    def draw():
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, count)
+        stream.fence()
+    result = timeFrames(move, draw, args.frames)
+    GL.glBindVertexArray(0)
+    stalls = stream.stalls
+    stream.destroy()
+    GL.glDeleteVertexArrays(1, [vao])
+    return result, stalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs='+', default=Counts, help="numbers of spheres")
+    parser.add_argument("--frames", type=int, default=30, help="frames averaged per measurement")
+    parser.add_argument("--width", type=int, default=1280, help="framebuffer width in pixels")
+    parser.add_argument("--height", type=int, default=800, help="framebuffer height in pixels")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    context, surface = createContext()
+    glformat = QOpenGLFramebufferObjectFormat()
+    glformat.setAttachment(QOpenGLFramebufferObject.Depth)
+    framebuffer = QOpenGLFramebufferObject(args.width, args.height, glformat)
+    framebuffer.bind()
+    GL.glViewport(0, 0, args.width, args.height)
+    GL.glEnable(GL.GL_DEPTH_TEST)
+
+    program = createProgram(Shaders.sphereImpostorVertexShader(), Shaders.sphereImpostorPhongFragmentShader())
+    program.bind()
+    program.setUniformValue("instanceColors", 1)
+
+    report = []
+    for count in args.counts:
+        setCommonUniforms(program, createField(count)[3], args)
+        entry = {'spheres': count, 'subdata_ms': timeSubData(count, args)}
+        entry['mapped_ms'], entry['mapped_stalls'] = timeStream(count, args, False)
+        if StreamBuffer.hasPersistentMapping():
+            entry['persistent_ms'], entry['persistent_stalls'] = timeStream(count, args, True)
+        report.append(entry)
+    print(json.dumps(report, indent=2))
+
+    program.release()
+    framebuffer.release()
+    context.doneCurrent()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Count the triangles SphereIcos tessellates with fixed and with screen space levels at several distances."""
+## Run from the pe1 directory: python benchmarks/bench_tessellation.py [--level N] [--pixels P] [--max-level M]
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+from OpenGL import GL
+from PyQt5.QtGui import (QGuiApplication, QMatrix4x4, QOffscreenSurface, QOpenGLContext, QOpenGLShader,
+                         QOpenGLShaderProgram, QSurfaceFormat, QVector2D, QVector3D)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Source.Graphics.Shaders import Shaders
+from Source.Graphics.icosphere import baseIcosahedron
+
+## camera distances from the sphere center, in sphere radii
+Distances = [2.0, 4.0, 8.0, 16.0, 32.0, 64.0]
+
+
+def createContext():
+    """Make an OpenGL 4.0 core context current on an offscreen surface"""
+    glformat = QSurfaceFormat()
+    glformat.setVersion(4, 0)
+    glformat.setProfile(QSurfaceFormat.CoreProfile)
+    context = QOpenGLContext()
+    context.setFormat(glformat)
+    if not context.create():
+        raise RuntimeError("could not create an OpenGL 4.0 context")
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    context.makeCurrent(surface)
+    return context, surface
+
+
+def createProgram():
+    """Link the SphereIcos tessellation stages, fragments are discarded so no fragment shader is needed"""
+    program = QOpenGLShaderProgram()
+    program.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.si_vs())
+    program.addShaderFromSourceCode(QOpenGLShader.TessellationControl, Shaders.si_tcs())
+    program.addShaderFromSourceCode(QOpenGLShader.TessellationEvaluation, Shaders.si_tes_nl())
+    if not program.link():
+        raise RuntimeError(program.log())
+    return program
+
+
+def createPatches():
+    """Upload the base icosahedron, returns the vertex array and the number of indices"""
+    vertices, faces = baseIcosahedron()
+    vertices = vertices.astype(np.float32)
+    indices = faces.astype(np.uint32)
+    vao = GL.glGenVertexArrays(1)
+    GL.glBindVertexArray(vao)
+    buffers = GL.glGenBuffers(2)
+    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffers[0])
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL.GL_STATIC_DRAW)
+    ## positions double as normals, like SphereIcos
+    for location in (0, 1):
+        GL.glEnableVertexAttribArray(location)
+        GL.glVertexAttribPointer(location, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+    GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, buffers[1])
+    GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL.GL_STATIC_DRAW)
+    return vao, indices.size
+
+
+def countPrimitives(program, count, distance, args, adaptive):
+    """Draw the patches once and return the number of triangles leaving tessellation"""
+    projection = QMatrix4x4()
+    projection.perspective(45.0, args.width / args.height, 0.1, 1000.0)
+    view = QMatrix4x4()
+    view.lookAt(QVector3D(0.0, 0.0, distance), QVector3D(0.0, 0.0, 0.0), QVector3D(0.0, 1.0, 0.0))
+
+    program.bind()
+    program.setUniformValue("modelMatrix", QMatrix4x4())
+    program.setUniformValue("viewMatrix", view)
+    program.setUniformValue("projectionMatrix", projection)
+    program.setUniformValue("normalMatrix", QMatrix4x4().normalMatrix())
+    program.setUniformValue("radius", 1.0)
+    program.setUniformValue("innerSubdivisionLevel", args.level)
+    program.setUniformValue("outerSubdivisionLevel", args.level)
+    program.setUniformValue("adaptiveSubdivision", int(adaptive))
+    program.setUniformValue("viewportSize", QVector2D(args.width, args.height))
+    program.setUniformValue("pixelsPerSegment", args.pixels)
+    program.setUniformValue("maxSubdivisionLevel", args.max_level)
+
+    ## older PyOpenGL returns a single name, newer an array of one
+    query = int(np.ravel(GL.glGenQueries(1))[0])
+    GL.glBeginQuery(GL.GL_PRIMITIVES_GENERATED, query)
+    GL.glDrawElements(GL.GL_PATCHES, count, GL.GL_UNSIGNED_INT, None)
+    GL.glEndQuery(GL.GL_PRIMITIVES_GENERATED)
+    primitives = int(GL.glGetQueryObjectuiv(query, GL.GL_QUERY_RESULT))
+    GL.glDeleteQueries(1, [query])
+    program.release()
+    return primitives
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--level", type=int, default=16, help="fixed inner and outer tessellation level")
+    parser.add_argument("--pixels", type=float, default=8.0, help="target pixels per segment in adaptive mode")
+    parser.add_argument("--max-level", type=int, default=64, help="largest adaptive level")
+    parser.add_argument("--width", type=int, default=1280, help="viewport width in pixels")
+    parser.add_argument("--height", type=int, default=800, help="viewport height in pixels")
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    context, surface = createContext()
+    program = createProgram()
+    vao, count = createPatches()
+
+    ## only the primitive counts matter, nothing reaches the framebuffer
+    GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+    report = []
+    for distance in Distances:
+        report.append({
+            'distance': distance,
+            'fixed': countPrimitives(program, count, distance, args, False),
+            'adaptive': countPrimitives(program, count, distance, args, True)})
+    GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+    print(json.dumps(report, indent=2))
+
+    context.doneCurrent()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
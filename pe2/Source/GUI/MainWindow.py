@@ -78,6 +78,10 @@ class MainWindow(QMainWindow):
 
         ## set the renderer as main widget
         self.setCentralWidget(self._renderWidget)
+
+        ## preload models in the background
+        self._renderWidget.preloader.progress.connect(self.showPreloadProgress)
+        self._renderWidget.preloader.start()
        
 
     def new(self):
@@ -115,6 +119,13 @@ class MainWindow(QMainWindow):
         self.statistics.setText("Render time: " + str(round(times[0],2)) + "ms, GPU time: " + str(round(times[1],2)) + "ms")
 
 
+    def showPreloadProgress(self, done, total, name):
+        if done < total:
+            self.statusBar().showMessage("Preloading models: " + str(done) + "/" + str(total))
+        else:
+            self.statusBar().showMessage("Ready", 3000)
+
+
     def clearStatistics(self):
         self.statistics.setText(" ")
 
@@ -122,6 +133,7 @@ class MainWindow(QMainWindow):
     def closeEvent(self, closeEvent):
         """Intercept close event and perform clean-up"""
         print("intercept")
+        self._renderWidget.preloader.release()
         ## then propagae event
         super(MainWindow, self).closeEvent(closeEvent)
 
@@ -4,6 +4,7 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 from Source.Graphics.Renderer import Renderer
+from Source.Graphics.model_preload import ModelPreloader
 
 class RenderWidget(QWidget):
 
@@ -60,6 +61,9 @@ class RenderWidget(QWidget):
         for i in range(len(available)): self.actorCombo.addItem(available[i])
         #for i in range(len(available)): available[i] = o_dir + available[i] + ".obj"
         self._renderer.setActors(available)
+        ## parse every model up front, started by the main window
+        self.preloader = ModelPreloader(o_dir, available)
+        self._renderer.setPreloader(self.preloader)
         ## register view functions
         self._viewFunc = [
             self._renderer.viewLeft,
@@ -9,6 +9,9 @@ from PyQt5.QtWidgets import QOpenGLWidget
 from OpenGL import GL
 from Source.Graphics.Shaders import Shaders
 from Source.Graphics.Material import Material
+from Source.Graphics.geometry_registry import defaultRegistry
+from Source.Graphics.vertex_layout import VertexLayout
+from Source.Graphics.stream_buffer import StreamBuffer
 
 ##  Abstract base class for different actor implementations.
 class Actor(QObject):
@@ -32,6 +35,17 @@ class Actor(QObject):
         TriangleFan =  GL.GL_TRIANGLE_FAN
         Modes = [Points, Lines, LineLoop, LineStrip, Triangles, TriangleStrip, TriangleFan]
 
+    ## attributes set by generateGeometry that identical primitives share, see geometryKey
+    SharedGeometry = []
+
+
+    ##  Surfaces the procedural shaders generate from gl_VertexID, see Shaders.proceduralSurface.
+    class Surface:
+        Cone = 0        ## Side and bottom cap.
+        Cylinder = 1    ## Top cap, side and bottom cap.
+        Sphere = 2      ## Latitude-longitude grid.
+        Bands = {Cone: 2, Cylinder: 3, Sphere: 1}
+
 
     ## initialization
     def __init__(self, scene, **kwargs):
@@ -67,11 +81,42 @@ class Actor(QObject):
         self._ibo = QOpenGLBuffer(QOpenGLBuffer.IndexBuffer)
         self._num_vertices = 0
         self._num_indices = 0
+        self._index_type = GL.GL_UNSIGNED_INT
 
         self._hasNormals = False
         self._hasColors = False
         self._hasTextureCoords = False
         self._hasIndices = False
+
+        ## encoding and arrangement of the vertex buffer, planar float blocks when None, see VertexLayout
+        self._layout = kwargs.get("layout", None)
+        self._layout_attributes = None
+        self._layout_bounds = None
+        ## maps positions quantized against the bounding box back to object space
+        self._dequantize = None
+
+        ## mesh arena sub-allocating the buffers of many actors, and the ranges of this actor in it
+        self._arena = kwargs.get("arena", None)
+        self._allocation = None
+
+        ## set while the geometry is shared through the registry
+        self._geometry_key = None
+        self._shared_buffers = False
+
+        ## ring of vertex or instance data rewritten every frame, see createStream
+        self._ring = None
+        self._ring_attributes = None
+        self._ring_shaders = None
+        self._ring_capacity = 0
+        self._ring_divisor = 0
+
+        ## (surface, u resolution, v resolution, radius, height) of geometry generated in the vertex shader
+        self._procedural = None
+
+        ## levels of detail set up by primitives, and the buffers of levels drawn before
+        self._detail = None
+        self._detail_level = 0
+        self._detail_states = {}
         self._hasFaces = False
 
         self._texture = None
@@ -325,6 +370,93 @@ class Actor(QObject):
         return self._num_indices
 
 
+    @property
+    def indexType(self):
+        """Returns the GL type of the index buffer, unsigned short or unsigned int"""
+        return self._index_type
+
+
+    def createProcedural(self, surface, uResolution, vResolution, radius, height):
+        """Create an empty vertex array, the procedural shaders generate every vertex from its index"""
+        self.setSolidShader(self.shaderCollection.proceduralPhongShader())
+        self.setSolidFlatShader(self.shaderCollection.proceduralPhongFlatShader())
+        self.setNoLightSolidShader(self.shaderCollection.proceduralMaterialShader())
+        self.setWireframeShader(self.shaderCollection.proceduralMaterialShader())
+        self.setNoLightWireframeShader(self.shaderCollection.proceduralMaterialShader())
+        self._procedural = (surface, uResolution, vResolution, radius, height)
+        self._num_vertices = Actor.Surface.Bands[surface] * uResolution * vResolution * 6
+        self._vao.create()
+
+
+    def setProceduralResolution(self, uResolution, vResolution=1):
+        """Changes the resolution of procedural geometry, nothing is uploaded"""
+        surface, _, _, radius, height = self._procedural
+        self._procedural = (surface, uResolution, vResolution, radius, height)
+        self._num_vertices = Actor.Surface.Bands[surface] * uResolution * vResolution * 6
+
+
+    def boundingRadius(self):
+        """Returns the radius of a sphere around the untransformed geometry, None if unknown"""
+        return None
+
+
+    def setLevelResolution(self, resolution):
+        """Sets the resolution of a level of detail, primitives that have them rebuild their geometry"""
+        pass
+
+
+    def projectedRadius(self, frame):
+        """Returns the radius in pixels of the bounding sphere, seen through the (view, projection, view projection) matrices of the frame"""
+        _, projection, viewProjection = frame
+        scale = max(self._transform.column(i).toVector3D().length() for i in range(3))
+        center = viewProjection * self._transform.column(3)
+        if center.w() <= 0.0:
+            return 0.0
+        return self.boundingRadius() * scale * projection[1, 1] * 0.5 * self._scene.viewportSize()[1] / center.w()
+
+
+    def updateLevel(self, frame):
+        """Switch to the level of detail matching the projected size through the frame matrices"""
+        level = self._detail.select(self._detail_level, self.projectedRadius(frame))
+        if level == self._detail_level:
+            return
+        resolution = self._detail.resolutions[level]
+        if self._procedural is not None:
+            self._detail_level = level
+            self.setLevelResolution(resolution)
+            return
+
+        ## keep the buffers of the level left, identical primitives share every level through the registry
+        self._detail_states[self._detail_level] = self.levelState()
+        self._detail_level = level
+        if level in self._detail_states:
+            self.setLevelState(self._detail_states.pop(level))
+            self.setLevelResolution(resolution)
+            return
+        self._vao = QOpenGLVertexArrayObject()
+        self._vbo = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self._ibo = QOpenGLBuffer(QOpenGLBuffer.IndexBuffer)
+        self._geometry_key = None
+        self._shared_buffers = False
+        self._allocation = None
+        self.setLevelResolution(resolution)
+        self.initialize()
+
+
+    def levelState(self):
+        """Returns the vertex array, buffers and registry entry drawn by this actor"""
+        return (self._vao, self._vbo, self._ibo, self._num_vertices, self._num_indices,
+                self._geometry_key, self._shared_buffers, self._layout_attributes, self._layout_bounds, self._dequantize,
+                self._allocation)
+
+
+    def setLevelState(self, state):
+        """Draw the vertex array, buffers and registry entry of another level"""
+        (self._vao, self._vbo, self._ibo, self._num_vertices, self._num_indices,
+         self._geometry_key, self._shared_buffers, self._layout_attributes, self._layout_bounds, self._dequantize,
+         self._allocation) = state
+
+
     def mapBuffer(self, offset, count, access):
         """Map the given buffer into a numpy array"""
         vbo_ptr = self._vbo.mapRange( offset, count, access )
@@ -339,28 +471,166 @@ class Actor(QObject):
         self._vbo.unmap()
 
 
-    def updateBuffer(self, vertices=None, normals=None, colors=None, texcoords=None):
-        """Update buffer with new data"""
+    @staticmethod
+    def bufferData(values):
+        """Returns the bytes of any buffer protocol object and their count, copied only when not contiguous"""
+        view = memoryview(values)
+        if not view.c_contiguous:
+            view = memoryview(np.ascontiguousarray(values))
+        return view, view.nbytes
+
+
+    @staticmethod
+    def mergeRanges(ranges):
+        """Returns sorted (offset, count) ranges with overlapping and adjacent ones joined"""
+        merged = []
+        for offset, count in sorted(ranges):
+            if merged and offset <= merged[-1][0] + merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], offset + count - merged[-1][0])
+            elif count > 0:
+                merged.append([offset, count])
+        return [tuple(each) for each in merged]
+
+
+    def updateBuffer(self, vertices=None, normals=None, colors=None, texcoords=None, first=0, ranges=None):
+        """Update buffer with new data starting at vertex first, or only the (offset, count) vertex ranges of whole arrays"""
+        if self._allocation is not None:
+            raise ValueError("meshes of an arena are not updated in place")
+        if self._layout is not None:
+            self.updateLayoutBuffer(vertices, normals, colors, texcoords, first, ranges)
+            return
+        attributes = [(vertices, None, 3), (normals, '_offsetNormals', 3), (colors, '_offsetColors', 3), (texcoords, '_offsetTexCoords', 2)]
         self._vbo.bind()
-        if vertices is not None:
-            vertices = vertices.tostring()
-            #vertices = np.fromstring(vertices, dtype="uint8")
-            self._vbo.write(0, vertices, len(vertices))
-          #buffer = self.mapBuffer(0, len(vertices), QOpenGLBuffer.RangeWrite | QOpenGLBuffer.RangeInvalidate)
-            #buffer[:len(vertices)] = vertices
-            #self.unmapBuffer()
-        if normals is not None:
-            normals = normals.tostring()
-            self._vbo.write(self._offsetNormals, normals, len(normals))
-        if colors is not None:
-            colors = colors.tostring()
-            self._vbo.write(self._offsetColors, colors, len(colors))
-        if texcoords is not None:
-            texcoords = texcoords.tostring()
-            self._vbo.write(self._offsetTexCoords, texcoords, len(texcoords))
+        for values, name, components in attributes:
+            if values is None:
+                continue
+            offset = getattr(self, name) if name is not None else 0
+            stride = components * np.dtype(np.float32).itemsize
+            if ranges is None:
+                data, count = self.bufferData(values)
+                self._vbo.write(offset + first * stride, data, count)
+                continue
+            ## only the dirty vertices are uploaded, straight from the caller's array
+            values = np.asarray(values).reshape(-1)
+            for start, count in self.mergeRanges(ranges):
+                data, size = self.bufferData(values[start * components:(start + count) * components])
+                self._vbo.write(offset + start * stride, data, size)
+        self._vbo.release()
+
+
+    def updateLayoutBuffer(self, vertices=None, normals=None, colors=None, texcoords=None, first=0, ranges=None):
+        """Encode new data with the vertex layout, interleaved layouts take every attribute of the vertices updated"""
+        values = {'position': vertices, 'normal': normals, 'color': colors, 'texcoord': texcoords}
+        values = {name: value for name, value in values.items() if value is not None}
+        names = [attribute[0] for attribute in self._layout_attributes]
+        if self._layout.interleaved and sorted(values) != sorted(names):
+            raise ValueError("interleaved vertices are updated with all of " + ", ".join(names))
+
+        ## whole arrays are written at first, otherwise only their ranges are encoded
+        components = dict(VertexLayout.Attributes)
+        if ranges is None:
+            name = next(iter(values))
+            ranges = [(0, np.asarray(values[name]).size // components[name])]
+        else:
+            first = 0
+        self._vbo.bind()
+        for start, count in self.mergeRanges(ranges):
+            ## positions outside the bounding box of create are clamped to it
+            encoded = {name: self._layout.encodeAttribute(name,
+                np.asarray(value).reshape(-1, components[name])[start:start + count], self._layout_bounds)
+                for name, value in values.items()}
+            if self._layout.interleaved:
+                data, attributes = self._layout.pack(encoded)
+                data, size = self.bufferData(data)
+                self._vbo.write((first + start) * attributes[0][5], data, size)
+                continue
+            for name, _, _, _, offset, stride in self._layout_attributes:
+                if name in encoded:
+                    data, size = self.bufferData(encoded[name])
+                    self._vbo.write(offset + (first + start) * stride, data, size)
         self._vbo.release()
 
 
+    def createStream(self, capacity, attributes, divisor=0, slices=StreamBuffer.Slices):
+        """Create a ring of float (name, components) attributes for capacity vertices, or instances when divisor is 1"""
+        shaders = [self._solid_shader, self._solid_flat_shader, self._wireframe_shader, self._nolight_solid_shader,
+            self._nolight_wireframe_shader, self._normal_visualizing_shader]
+        self._ring_shaders = list({id(each): each for each in shaders}.values())
+        self._ring_capacity = capacity
+        self._ring_divisor = divisor
+
+        ## planar blocks inside every slice, like create
+        self._ring_attributes = []
+        offset = 0
+        for name, components in attributes:
+            self._ring_attributes.append((name, components, offset))
+            offset += capacity * components * np.dtype(np.float32).itemsize
+        self._ring = StreamBuffer(offset, slices)
+        self._ring.create()
+
+        self._vao.create()
+        self._vao.bind()
+        self._ring.bind()
+        for name, _, _ in self._ring_attributes:
+            for each in self._ring_shaders:
+                each.enableAttributeArray(name)
+                if divisor and each.attributeLocation(name) >= 0:
+                    GL.glVertexAttribDivisor(each.attributeLocation(name), divisor)
+        self._ring.release()
+        self._vao.release()
+
+
+    def beginStream(self):
+        """Returns the next slice of the stream as one (capacity, components) float array per attribute, written in place"""
+        data = self._ring.map().view(np.float32)
+        views = {}
+        for name, components, offset in self._ring_attributes:
+            start = offset // np.dtype(np.float32).itemsize
+            views[name] = data[start:start + self._ring_capacity * components].reshape(self._ring_capacity, components)
+        return views
+
+
+    def endStream(self, count):
+        """Finish writing count vertices or instances, the attributes read them from the slice just written"""
+        self._ring.unmap()
+        self._vao.bind()
+        self._ring.bind()
+        for name, components, offset in self._ring_attributes:
+            for each in self._ring_shaders:
+                each.setAttributeBuffer(name, GL.GL_FLOAT, self._ring.offset + offset, components,
+                    components * np.dtype(np.float32).itemsize)
+        self._ring.release()
+        self._vao.release()
+        if not self._ring_divisor:
+            self._num_vertices = count
+
+
+    def geometryKey(self):
+        """Returns the registry key of primitives whose geometry can be shared, None if not shared"""
+        return None
+
+
+    def acquireGeometry(self):
+        """Generate geometry, or take it from an identical primitive"""
+        key = self.geometryKey()
+        if key is None:
+            self.generateGeometry()
+            return
+        ## buffers of the same geometry differ between vertex layouts
+        if self._layout is not None:
+            key = key + (self._layout.key(),)
+        if self._arena is not None:
+            key = key + (self._arena,)
+
+        def generate():
+            self.generateGeometry()
+            return {name: getattr(self, name) for name in self.SharedGeometry if hasattr(self, name)}
+
+        for name, value in defaultRegistry.acquire(key, generate).items():
+            setattr(self, name, value)
+        self._geometry_key = key
+
+
     def create(self, vertices, normals=None, colors=None, texcoords=None, indices=None, faces=None, usage=QOpenGLBuffer.StaticDraw):
         """Create object vertex arrays and buffers"""
         
@@ -368,13 +638,31 @@ class Actor(QObject):
         shaders = [self._solid_shader, self._wireframe_shader, self._nolight_solid_shader, 
             self._nolight_wireframe_shader, self._normal_visualizing_shader]
 
+        ## compact or interleaved vertices are encoded by the vertex layout
+        if self._layout is not None:
+            if faces is not None or isinstance(vertices, (int, np.integer)):
+                raise ValueError("faces and buffers filled later are only stored as planar floats")
+            self.createLayout(shaders, vertices, normals, colors, texcoords, indices, usage)
+            return
+
+        ## meshes of an arena are ranges of its shared buffers
+        if self._arena is not None:
+            if faces is not None or isinstance(vertices, (int, np.integer)):
+                raise ValueError("faces and buffers filled later are not stored in an arena")
+            self.createArena(vertices, normals, colors, texcoords, indices)
+            return
+
         ## bind vao
         self._vao.create()
         self._vao.bind()
 
-        ## define total sizes
-        vertices = vertices.tostring()
-        total_vertices = len(vertices)
+        ## define total sizes, a vertex count instead of vertices and True instead of
+        ## attribute arrays only allocate the buffer, to be filled with updateBuffer
+        if isinstance(vertices, (int, np.integer)):
+            total_vertices = int(vertices) * 3 * np.dtype(np.float32).itemsize
+            vertices = None
+        else:
+            vertices, total_vertices = self.bufferData(vertices)
         total_normals = 0
         total_colors = 0
         total_texcoords = 0
@@ -384,65 +672,75 @@ class Actor(QObject):
 
         if normals is not None:
             self._hasNormals = True
-            normals = normals.tostring()
-            total_normals = len(normals)
+            normals, total_normals = (None, total_vertices) if normals is True else self.bufferData(normals)
 
         if colors is not None:
             self._hasColors = True
-            colors = colors.tostring()
-            total_colors = len(colors)
+            colors, total_colors = (None, total_vertices) if colors is True else self.bufferData(colors)
 
         if texcoords is not None:
             self._hasTextureCoords = True
-            texcoords = texcoords.tostring()
-            total_texcoords = len(texcoords)
+            texcoords, total_texcoords = (None, total_vertices * 2 // 3) if texcoords is True else self.bufferData(texcoords)
 
         if indices is not None:
             self._hasIndices = True
-            indices = indices.tostring()
-            total_indices = len(indices)
-            self._num_indices = total_indices // np.dtype(np.uint32).itemsize
+            self._index_type = GL.GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL.GL_UNSIGNED_INT
+            indices, total_indices = self.bufferData(np.asarray(indices, dtype=np.uint16 if indices.dtype == np.uint16 else np.uint32))
+            self._num_indices = total_indices // (2 if self._index_type == GL.GL_UNSIGNED_SHORT else 4)
             #print('total indices=', self._num_indices)
         
         if faces is not None:
             self._hasFaces = True
-            faces = faces.tostring()
-            total_faces = len(faces)
+            faces, total_faces = self.bufferData(faces)
+
+        ## identical primitives share the buffers uploaded by the first one
+        shared = defaultRegistry.buffers(self._geometry_key) if self._geometry_key is not None else None
+        if shared is not None:
+            self._vbo, self._ibo = shared
+            vertices = normals = colors = texcoords = indices = faces = None
+            self._shared_buffers = True
 
         ## create vertex buffer object
-        self._vbo.setUsagePattern(usage)
-        self._vbo.create()
+        if shared is None:
+            self._vbo.setUsagePattern(usage)
+            self._vbo.create()
         self._vbo.bind()
 
         ## populate vertex buffer object with data
         offset = 0
-        self._vbo.allocate(total_vertices + total_normals + total_colors + total_texcoords + total_faces)
-        self._vbo.write(offset, vertices, total_vertices)
+        if shared is None:
+            self._vbo.allocate(total_vertices + total_normals + total_colors + total_texcoords + total_faces)
+        if vertices is not None:
+            self._vbo.write(offset, vertices, total_vertices)
         for each in shaders:
             each.setAttributeBuffer('position', GL.GL_FLOAT, offset, 3, 3 * np.dtype(np.float32).itemsize)
         offset += total_vertices
         self._offsetNormals = offset
         
         if self._hasNormals:
-            self._vbo.write(offset, normals, total_normals)
+            if normals is not None:
+                self._vbo.write(offset, normals, total_normals)
             for each in shaders:
                 each.setAttributeBuffer('normal', GL.GL_FLOAT, offset, 3, 3 * np.dtype(np.float32).itemsize)
             offset += total_normals
         if self._hasColors:
             self._offsetColors = offset
-            self._vbo.write(offset, colors, total_colors)
+            if colors is not None:
+                self._vbo.write(offset, colors, total_colors)
             for each in shaders:
                 each.setAttributeBuffer('color', GL.GL_FLOAT, offset, 3, 3 * np.dtype(np.float32).itemsize)
             offset += total_colors
         if self._hasTextureCoords:
             self._offsetTexCoords = offset
-            self._vbo.write(offset, texcoords, total_texcoords)
+            if texcoords is not None:
+                self._vbo.write(offset, texcoords, total_texcoords)
             for each in shaders:
                 each.setAttributeBuffer('texcoord', GL.GL_FLOAT, offset, 2, 2 * np.dtype(np.float32).itemsize)
             offset += total_texcoords
         if self._hasFaces:
             self._offsetFaces = offset
-            self._vbo.write(offset, faces, total_faces)
+            if faces is not None:
+                self._vbo.write(offset, faces, total_faces)
             for each in shaders:
                 each.setAttributeBuffer('faces', GL.GL_INT, offset, 9, 9 * np.dtype(np.int).itemsize)
             offset += total_faces
@@ -466,12 +764,14 @@ class Actor(QObject):
                 each.enableAttributeArray('faces')
         ## create index buffer object if required by the actor
         if self._hasIndices:
-            self._ibo.setUsagePattern(usage)
-            self._ibo.create()
+            if shared is None:
+                self._ibo.setUsagePattern(usage)
+                self._ibo.create()
             self._ibo.bind()
 
-            self._ibo.allocate(total_indices)
-            self._ibo.write(0, indices, total_indices)
+            if shared is None:
+                self._ibo.allocate(total_indices)
+                self._ibo.write(0, indices, total_indices)
 
         ## release vao
         self._vao.release()
@@ -480,13 +780,127 @@ class Actor(QObject):
         if self._hasIndices:
             self._ibo.release(QOpenGLBuffer.IndexBuffer)
 
+        ## the first user of a shared geometry hands its buffers to the registry
+        if self._geometry_key is not None and shared is None:
+            defaultRegistry.storeBuffers(self._geometry_key, self._vbo, self._ibo)
+            self._shared_buffers = True
+
+
+    def createLayout(self, shaders, vertices, normals, colors, texcoords, indices, usage):
+        """Create the vertex buffer with the attributes encoded and arranged by the vertex layout"""
+        self._vao.create()
+        self._vao.bind()
+        data, attributes, bounds = self._layout.encode(vertices, normals, colors, texcoords)
+        self._layout_attributes = attributes
+        self._layout_bounds = bounds
+        self._dequantize = None
+        if bounds is not None:
+            self._dequantize = QMatrix4x4()
+            self._dequantize.translate(*[float(value) for value in bounds[0]])
+            self._dequantize.scale(*[float(value) for value in bounds[1]])
+        self._num_vertices = np.asarray(vertices).size // 3
+        self._hasNormals = normals is not None
+        self._hasColors = colors is not None
+        self._hasTextureCoords = texcoords is not None
+        if indices is not None:
+            self._hasIndices = True
+            self._index_type = GL.GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL.GL_UNSIGNED_INT
+            indices, total_indices = self.bufferData(np.asarray(indices, dtype=np.uint16 if indices.dtype == np.uint16 else np.uint32))
+            self._num_indices = total_indices // (2 if self._index_type == GL.GL_UNSIGNED_SHORT else 4)
+
+        ## identical primitives share the buffers uploaded by the first one
+        shared = defaultRegistry.buffers(self._geometry_key) if self._geometry_key is not None else None
+        if shared is not None:
+            self._vbo, self._ibo = shared
+            self._shared_buffers = True
+        else:
+            self._vbo.setUsagePattern(usage)
+            self._vbo.create()
+        self._vbo.bind()
+        if shared is None:
+            self._vbo.allocate(data.nbytes)
+            self._vbo.write(0, *self.bufferData(data))
+
+        ## attribute pointers as part of the vao state, compact integer types are normalized
+        for name, glType, size, normalized, offset, stride in attributes:
+            for each in shaders:
+                location = each.attributeLocation(name)
+                if location < 0:
+                    continue
+                GL.glVertexAttribPointer(location, size, glType, GL.GL_TRUE if normalized else GL.GL_FALSE, stride, ctypes.c_void_p(offset))
+                GL.glEnableVertexAttribArray(location)
+        self._vbo.release(QOpenGLBuffer.VertexBuffer)
+
+        if self._hasIndices:
+            if shared is None:
+                self._ibo.setUsagePattern(usage)
+                self._ibo.create()
+            self._ibo.bind()
+            if shared is None:
+                self._ibo.allocate(total_indices)
+                self._ibo.write(0, indices, total_indices)
+
+        self._vao.release()
+        if self._hasIndices:
+            self._ibo.release(QOpenGLBuffer.IndexBuffer)
+
+        ## the first user of a shared geometry hands its buffers to the registry
+        if self._geometry_key is not None and shared is None:
+            defaultRegistry.storeBuffers(self._geometry_key, self._vbo, self._ibo)
+            self._shared_buffers = True
+
+
+    def arenaPool(self):
+        """Returns the arena pool holding the current level of this actor, None when it has its own buffers"""
+        return None if self._allocation is None else self._allocation.pool
+
+
+    def createArena(self, vertices, normals, colors, texcoords, indices):
+        """Allocate the vertices and indices from the arena, shared by identical primitives like buffers"""
+        if self._layout is not None:
+            raise ValueError("meshes of an arena are stored as interleaved floats")
+        self._num_vertices = np.asarray(vertices).size // 3
+        self._hasNormals = normals is not None
+        self._hasColors = colors is not None
+        self._hasTextureCoords = texcoords is not None
+        self._hasIndices = indices is not None
+        self._num_indices = np.asarray(indices).size if self._hasIndices else 0
+
+        shared = defaultRegistry.buffers(self._geometry_key) if self._geometry_key is not None else None
+        if shared is not None:
+            self._allocation = shared[0]
+            self._shared_buffers = True
+            return
+        self._allocation = self._arena.allocate(vertices, normals, colors, texcoords, indices)
+        ## the allocation stands in for both buffers, destroying it twice frees it once
+        if self._geometry_key is not None:
+            defaultRegistry.storeBuffers(self._geometry_key, self._allocation, self._allocation)
+            self._shared_buffers = True
+
+
+    def drawElements(self, mode):
+        """Draw the indexed primitives of this actor, from its arena ranges when it has them"""
+        if self._allocation is not None:
+            GL.glDrawElementsBaseVertex(mode, self._num_indices, GL.GL_UNSIGNED_INT,
+                ctypes.c_void_p(self._allocation.firstIndex * np.dtype(np.uint32).itemsize), self._allocation.baseVertex)
+        else:
+            GL.glDrawElements(mode, self._num_indices, self._index_type, None)
+
+
+    def drawArrays(self, mode, count=None):
+        """Draw count vertices of this actor, all of them when None"""
+        first = self._allocation.baseVertex if self._allocation is not None else 0
+        GL.glDrawArrays(mode, first, self._num_vertices if count is None else count)
+
 
     def setUniformBindings(self, wireframe=False):
-        """Sets up uniform shader bindings"""
+        """Sets up the uniforms of this actor, camera and light come from the FrameData block"""
         normalMatrix = self._transform.normalMatrix()
-        self._active_shader.setUniformValue("modelMatrix", self._transform)
-        self._active_shader.setUniformValue("viewMatrix", self._scene.camera.viewMatrix)
-        self._active_shader.setUniformValue("projectionMatrix", self._scene.camera.projectionMatrix)
+        ## quantized positions are mapped back to object space before the transform
+        if self._dequantize is not None:
+            self._active_shader.setUniformValue("modelMatrix", self._transform * self._dequantize)
+        else:
+            self._active_shader.setUniformValue("modelMatrix", self._transform)
         self._active_shader.setUniformValue("normalMatrix", normalMatrix)
 
         if self.texture() is not None:
@@ -526,24 +940,22 @@ class Actor(QObject):
             self._active_shader.setUniformValue("material.specular", self._warningMaterial.specularColor)
             self._active_shader.setUniformValue("material.shininess", self._warningMaterial.shininess)     
         
-        ## bind lights
-        camera_position = QVector4D(self._scene.camera.position[0], self._scene.camera.position[1], self._scene.camera.position[2], 1.0)
-        if self._scene.light.headlight:
-            if self._scene.light.directional:
-                self._active_shader.setUniformValue("lightPosition", QVector4D(0.0, 0.0, 1.0, 0.0))
-            else:
-                self._active_shader.setUniformValue("lightPosition", QVector4D(0.0, 0.0, 0.0, 1.0))
-        else:
-            self._active_shader.setUniformValue("lightPosition", self._scene.camera.viewMatrix * self._scene.light.position)
-
-        self._active_shader.setUniformValue("light.ambient", self._scene.light.ambientColor)
-        self._active_shader.setUniformValue("light.diffuse", self._scene.light.diffuseColor)
-        self._active_shader.setUniformValue("light.specular", self._scene.light.specularColor)
-        self._active_shader.setUniformValue("lightAttenuation", self._scene.light.attenuation)
+        ## shape of procedural geometry
+        if self._procedural is not None:
+            surface, uResolution, vResolution, radius, height = self._procedural
+            self._active_shader.setUniformValue("surfaceType", surface)
+            self._active_shader.setUniformValue("uResolution", uResolution)
+            self._active_shader.setUniformValue("vResolution", vResolution)
+            self._active_shader.setUniformValue("radius", float(radius))
+            self._active_shader.setUniformValue("height", float(height))
 
 
     ## This should set up any required state before any actual rendering happens.
     def beginRendering(self, draw_style, lighting, shading, passNumber):
+        ## pick the level of detail once per frame
+        if self._detail is not None and passNumber == 0:
+            self.updateLevel(self._scene.frameMatrices())
+
         ## determine right shader to bind
         if lighting:
             if draw_style == GL.GL_LINE:
@@ -585,8 +997,12 @@ class Actor(QObject):
             #self.glEnable(GL.GL_BLEND)
             self._texture.bind()
 
-        ## bind shader
-        self._vao.bind()
+        ## bind vertex array, actors of one arena pool share theirs
+        if self._allocation is not None:
+            self._scene.bindPool(self._allocation.pool)
+        else:
+            self._scene.bindPool(None)
+            self._vao.bind()
 
 
     def render(self):
@@ -597,8 +1013,13 @@ class Actor(QObject):
     def endRendering(self):
         """Finished rendering, clean yourself up"""
 
-        ## unbind vao
-        self._vao.release()
+        ## unbind vao, arena vertex arrays stay bound for the next actor of their pool
+        if self._allocation is None:
+            self._vao.release()
+
+        ## the slice drawn is free again once the commands issued so far complete
+        if self._ring is not None:
+            self._ring.fence()
 
         ## unbind texture
         if self._texture is not None:
@@ -619,7 +1040,32 @@ class Actor(QObject):
 
 
     def destroy(self):
+        ## levels not drawn last are freed first
+        current = self.levelState()
+        for state in self._detail_states.values():
+            self.setLevelState(state)
+            self.destroyLevel()
+        self._detail_states = {}
+        self.setLevelState(current)
+        self.destroyLevel()
+
+
+    def destroyLevel(self):
+        """Free the vertex array and buffers of the current level"""
         self._vao.destroy()
+        if self._ring is not None:
+            self._ring.destroy()
+            self._ring = None
+        if self._geometry_key is not None:
+            ## shared buffers are freed with their last user
+            defaultRegistry.release(self._geometry_key, self._shared_buffers)
+            self._geometry_key = None
+            self._shared_buffers = False
+            self._allocation = None
+            return
+        if self._allocation is not None:
+            self._allocation.destroy()
+            self._allocation = None
         self._vbo.destroy()
         self._ibo.destroy()
         
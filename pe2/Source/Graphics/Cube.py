@@ -6,6 +6,9 @@ from Source.Graphics.Actor import Actor
 
 class Cube(Actor):
 
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals']
+
     ## initialization
     def __init__(self, scene,  **kwargs):
         """Initialize actor."""
@@ -112,10 +115,15 @@ class Cube(Actor):
             0.0,  1.0,  0.0], dtype=np.float32)
 
 
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Cube',)
+
+
     def initialize(self):
         """Creates cube's geometry"""
         if self._vertices is None:
-            self.generateGeometry()
+            self.acquireGeometry()
 
         ## create object
         self.create(self._vertices, normals=self._normals)
@@ -123,6 +131,6 @@ class Cube(Actor):
 
     def render(self):
         """Render cube"""
-        GL.glDrawArrays(self._render_mode, 0, len(self._vertices))
+        self.drawArrays(self._render_mode, len(self._vertices))
 
     
@@ -2,9 +2,14 @@ import math
 import numpy as np
 from OpenGL import GL
 from Source.Graphics.Actor import Actor
+from Source.Graphics.level_of_detail import LevelOfDetail
+from Source.Graphics.parametric import parametricSurface, capSurface, combine, flip
 
 class Cylinder(Actor):
 
+    ## attributes set by generateGeometry, shared by identical instances
+    SharedGeometry = ['_vertices', '_normals', '_indices']
+
     ## initialization
     def __init__(self, renderer,  **kwargs):
         """Initialize actor."""
@@ -16,6 +21,14 @@ class Cylinder(Actor):
 
         self._vertices = None
 
+        ## resolutions picked from the size on screen, starting with the coarsest
+        if kwargs.get("lods", None):
+            self._detail = LevelOfDetail(kwargs.get("lods"))
+            self._resolution = self._detail.resolutions[0]
+
+        ## generate the surface in the vertex shader instead of uploading it
+        self._gpu = kwargs.get("gpu", False)
+
         ## create actor
         self.initialize()
         
@@ -33,86 +46,64 @@ class Cylinder(Actor):
     
     def generateGeometry(self):
         """Creates cone geometry"""
-
-        ## circle coordinates in x-z plane
         h2 = self._height * 0.5
-        angle = np.linspace(0.0, 2.0*math.pi, self._resolution, endpoint=False)
-        angle = np.append(angle, [0.0])
-
-        ## circle in x-z plane
-        x = -np.sin(angle) * self._radius
-        y = np.zeros(self._resolution+1)
-        z = -np.cos(angle) * self._radius
-
-        ## normal vectors
-        nx = -np.sin(angle)
-        ny = np.zeros(self._resolution+1)
-        nz = -np.cos(angle)
-
-        ## top and bottom circles
-        #top = np.vstack((x,y+h2,z)).reshape(3,-1).T.astype(np.float32)
-        #bot = np.vstack((x,y-h2,z)).reshape(3,-1).T.astype(np.float32)
-    
-        ## top cap
-        vertices, normals = [[0.0, h2, 0.0]], [[0.0, 1.0, 0.0]]
-        for i in list(range(self._resolution+1)):
-            vertices.append([x[i], h2, z[i]])
-            normals.append([0.0, 1.0, 0.0])
-        vertices_top = np.array(vertices, dtype=np.float32)
-        normals_top = np.array(normals, dtype=np.float32)
-        self._num_vertices_top = len(vertices_top)
-
-        ## side
-        vertices, normals = [], []
-        for i in list(range(self._resolution)):
-            vertices.append([x[i], h2, z[i]])
-            normals.append([nx[i], ny[i], nz[i]])
-
-            vertices.append([x[i], -h2, z[i]])
-            normals.append([nx[i], ny[i], nz[i]])
-            
-            vertices.append([x[i+1], h2, z[i+1]])
-            normals.append([nx[i+1], ny[i+1], nz[i+1]])
-
-            vertices.append([x[i], -h2, z[i]])
-            normals.append([nx[i], ny[i], nz[i]])
-
-            vertices.append([x[i+1], -h2, z[i+1]])
-            normals.append([nx[i+1], ny[i+1], nz[i+1]])
-
-            vertices.append([x[i+1], h2, z[i+1]])
-            normals.append([nx[i+1], ny[i+1], nz[i+1]])
-
-        vertices_side = np.array(vertices, dtype=np.float32)
-        normals_side = np.array(normals, dtype=np.float32)
-        self._num_vertices_side = len(vertices_side)
-
-        ##  bottom cap
-        vertices, normals = [[0.0, -h2, 0.0]], [[0.0, -1.0, 0.0]]
-        for i in list(reversed(range(self._resolution+1))):
-            vertices.append([x[i], -h2, z[i]])
-            normals.append([0.0, -1.0, 0.0])
-        vertices_bot = np.array(vertices, dtype=np.float32)
-        normals_bot = np.array(normals, dtype=np.float32)
-        self._num_vertices_bot = len(vertices_bot)
-
-        self._vertices = np.concatenate((vertices_top, vertices_side, vertices_bot))
-        self._normals = np.concatenate((normals_top, normals_side, normals_bot))
+
+        def circle(u, y):
+            """Circle in x-z plane"""
+            return np.stack((-np.sin(u) * self._radius, np.full(u.shape, y), -np.cos(u) * self._radius), axis=-1)
+
+        def side(u, v):
+            """Vertical lines from the top, v = 0, to the bottom circle"""
+            positions = circle(u, h2 - v * self._height)
+            normals = np.stack((-np.sin(u), np.zeros(u.shape), -np.cos(u)), axis=-1)
+            return positions, normals
+
+        around = (self._resolution, 1, (0.0, 2.0 * math.pi))
+        mesh = combine(
+            parametricSurface(capSurface(lambda u: circle(u, h2), [0.0, h2, 0.0], [0.0, 1.0, 0.0]), *around, poles=(True, False)),
+            parametricSurface(side, *around),
+            flip(parametricSurface(capSurface(lambda u: circle(u, -h2), [0.0, -h2, 0.0], [0.0, -1.0, 0.0]), *around, poles=(True, False))))
+        self._vertices = mesh['vertices']
+        self._normals = mesh['normals']
+        self._indices = mesh['indices']
+
+
+    def boundingRadius(self):
+        """Returns the radius of a sphere around the untransformed geometry"""
+        return math.sqrt(self._radius * self._radius + 0.25 * self._height * self._height)
+
+
+    def setLevelResolution(self, resolution):
+        """Sets the resolution of the next geometry, or of the procedural one"""
+        self._resolution = resolution
+        self._vertices = None
+        if self._procedural is not None:
+            self.setProceduralResolution(resolution, 1)
+
+
+    def geometryKey(self):
+        """Returns the registry key of this primitive's geometry"""
+        return ('Cylinder', self._radius, self._height, self._resolution)
 
 
     def initialize(self):
         """Creates cone geometry"""
+        if self._gpu:
+            self.createProcedural(Actor.Surface.Cylinder, self._resolution, 1, self._radius, self._height)
+            return
+
         if self._vertices is None:
-            self.generateGeometry()
+            self.acquireGeometry()
 
         ## create object
-        self.create(self._vertices, normals=self._normals)
+        self.create(self._vertices, normals=self._normals, indices=self._indices)
 
        
     def render(self):
         """Render cube"""
-        GL.glDrawArrays(GL.GL_TRIANGLE_FAN, 0, self._num_vertices_top)
-        GL.glDrawArrays(GL.GL_TRIANGLES, self._num_vertices_top, self._num_vertices_side)
-        GL.glDrawArrays(GL.GL_TRIANGLE_FAN, self._num_vertices_top + self._num_vertices_side, self._num_vertices_bot)
+        if self._procedural is not None:
+            self.drawArrays(GL.GL_TRIANGLES)
+        else:
+            self.drawElements(GL.GL_TRIANGLES)
 
     
\ No newline at end of file
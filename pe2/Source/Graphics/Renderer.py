@@ -20,7 +20,7 @@ from Source.Graphics.Gnomon import Gnomon
 from Source.Graphics.World import World
 
 # import actors
-from Source.Graphics.obj_polyhedron import Obj_Polyhedron
+from Source.Graphics.obj_polyhedron import Obj_Polyhedron, loadGeometry
 from Source.Graphics.Icosahedron import Icosahedron
 from Source.Graphics.Floor import Floor
 
@@ -61,6 +61,7 @@ class Renderer(QOpenGLWidget):
 
         self.currentActor_ = None
         self._shift_isPressed = False
+        self._preloader = None
 
     def shiftPressed(self):
         self._shift_isPressed = True
@@ -253,6 +254,8 @@ class Renderer(QOpenGLWidget):
     def resizeGL(self, width, height):
         """ Called by the Qt libraries whenever the window is resized"""
         self._world.camera.setAspectRatio(width / float(height if height > 0.0 else 1.0))
+        ## Qt sets the viewport to the framebuffer, in device pixels
+        self._world.setViewportSize(width * self.devicePixelRatio(), height * self.devicePixelRatio())
 
 
     def pan(self, point, state='start'):
@@ -399,6 +402,9 @@ class Renderer(QOpenGLWidget):
     def setActors(self, objects):
         self._objs = objects
 
+    def setPreloader(self, preloader):
+        self._preloader = preloader
+
     def lightingChanged(self, state):
         self._world.setLighting(state)
         self.update()
@@ -436,10 +442,34 @@ class Renderer(QOpenGLWidget):
         if (index > len(self._objs)):
             print("!!!!! Fora da Lista !!!!!!")
             return
+        self.loadModelAsync(self._objs[index - 1]).add_done_callback(self.modelLoaded)
+
+    def loadModelAsync(self, filename, **kwargs):
+        """Parse a model on a worker thread behind a placeholder box, returns a future of the actor"""
+        transform = kwargs.get("transform", QMatrix4x4())
+        scale = kwargs.get("scale", 0.15)
+        lod = kwargs.get("lod", False)
+
+        def create(geometry):
+            self.makeCurrent()
+            return Obj_Polyhedron(self._world, filename, transform=transform, geometry=geometry, lod=lod)
+
+        ## preloaded models only need the upload
+        geometry = self._preloader.geometry(filename) if self._preloader is not None else None
+        if geometry is not None:
+            return self._world.addActorAsync(lambda: geometry, create)
+
         self.makeCurrent()
-        xform1 = QMatrix4x4()
-        aux =  Obj_Polyhedron(self._world, self._objs[index - 1], transform=xform1)
-        self._world.addActor(aux)
+        placeholder = Cube(self._world, transform=QMatrix4x4(transform), material=Material(diffuse=QVector3D(0.6, 0.6, 0.6)))
+        load = lambda: loadGeometry(filename + '.obj', filename + '.mtl', scale, lod=lod)
+        return self._world.addActorAsync(load, create, placeholder=placeholder)
+
+    def modelLoaded(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            print("Failed to load model: {}".format(future.exception()))
+        self.update()
 
     def delActor(self):
         self.RemoveLines()
@@ -603,8 +633,10 @@ class Renderer(QOpenGLWidget):
         if (type(self.currentActor_) is not Obj_Polyhedron): return
         old = self.currentActor_._lines
         if (old != None): 
+            self.makeCurrent()
             for l in old:
                 self._world.removeActor(l)
+                l.destroy()
         self.currentActor_._lines = None
 
     def TransformActor(self, amt):
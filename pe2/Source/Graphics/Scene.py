@@ -1,8 +1,10 @@
 import math
+import numpy as np
 
-from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QObject, pyqtSignal
 from PyQt5.QtGui import QVector3D, QVector4D, QMatrix4x4, QQuaternion
 from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from OpenGL import GL
 from Source.Graphics.Ray import Ray
@@ -12,10 +14,14 @@ from Source.Graphics.Actor import Actor
 from Source.Graphics.Group import Group
 from Source.Graphics.Floor import Floor
 from Source.Graphics.Background import Background
+from Source.Graphics.Shaders import Shaders
 
 ##  Base scene class
 class Scene(QObject):
 
+    ## emitted by loader threads, delivered on the thread owning the scene
+    loaded = pyqtSignal(object)
+
     class DrawStyle:
         Point = GL.GL_POINT
         Wireframe = GL.GL_LINE
@@ -46,6 +52,16 @@ class Scene(QObject):
         self._light = kwargs.get("light", None) 
         self._lighting = kwargs.get("lighting", True) 
         self._shading = kwargs.get("shading", Scene.Shading.Smooth)
+        self._viewport_size = (0, 0)
+        ## uniform buffer of the FrameData block, filled once per frame
+        self._frame_data = None
+        ## view, projection and their product, computed once per frame
+        self._frame_matrices = None
+        ## arena pool whose vertex array is bound, None when any other may be
+        self._bound_pool = None
+        self._loaders = kwargs.get("loaders", 2)
+        self._loader = None
+        self.loaded.connect(self.finishLoading)
 
 
     @property
@@ -103,6 +119,45 @@ class Scene(QObject):
             self.selectActor(actor)
 
 
+    def addActorAsync(self, load, create, placeholder=None, select=False):
+        """Run load() on a worker thread, then add create(result) on the GUI thread; returns a future of the actor"""
+        if self._loader is None:
+            self._loader = ThreadPoolExecutor(max_workers=self._loaders, thread_name_prefix="loader")
+
+        ## the placeholder stands in for the actor until it is uploaded
+        if placeholder is not None:
+            placeholder.setPickable(False)
+            self.addActor(placeholder)
+
+        future = Future()
+        work = self._loader.submit(load)
+        future.add_done_callback(lambda f: work.cancel() if f.cancelled() else None)
+        work.add_done_callback(lambda w: self.loaded.emit((future, w, create, placeholder, select)))
+        return future
+
+
+    def finishLoading(self, pending):
+        """Replace the placeholder of a finished load by its actor"""
+        future, work, create, placeholder, select = pending
+        if placeholder is not None:
+            if placeholder.name in self._actors:
+                self.removeActor(placeholder)
+            ## free its buffers whether the load finished or was cancelled
+            self._viewer.makeCurrent()
+            placeholder.destroy()
+
+        ## cancelled futures stay pending until here, so cancel() works until the upload
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            actor = create(work.result())
+        except Exception as error:
+            future.set_exception(error)
+            return
+        self.addActor(actor, select)
+        future.set_result(actor)
+
+
     def addSystemActor(self, actor):
         """Add actor to the system list"""
         self._systemActors[actor.name] = actor
@@ -174,6 +229,44 @@ class Scene(QObject):
         return self._camera
 
 
+    def viewportSize(self):
+        """Returns the width and height in pixels of the viewport rendered to"""
+        return self._viewport_size
+
+
+    def frameMatrices(self):
+        """Returns the view, projection and view projection matrices of the frame being rendered"""
+        return self._frame_matrices
+
+
+    def bindPool(self, pool):
+        """Bind the vertex array of an arena pool unless it is bound already, None when an actor binds its own"""
+        if pool is not None and pool is not self._bound_pool:
+            pool.bind()
+        self._bound_pool = pool
+
+
+    def drawOrder(self, actors):
+        """Returns the actors with those of one arena pool drawn together, where the first of them was"""
+        order = []
+        pools = {}
+        for each in actors:
+            pool = each.arenaPool() if isinstance(each, Actor) and not isinstance(each, Group) else None
+            if pool is None:
+                order.append([each])
+            elif pool in pools:
+                pools[pool].append(each)
+            else:
+                pools[pool] = [each]
+                order.append(pools[pool])
+        return [each for group in order for each in group]
+
+
+    def setViewportSize(self, width, height):
+        """Record the width and height in pixels of the viewport, wherever it is set"""
+        self._viewport_size = (int(width), int(height))
+
+
     def setLight(self, light):
         """Sets the active light source for this viewer"""
         self._light = light
@@ -363,6 +456,33 @@ class Scene(QObject):
         pass
 
 
+    def updateFrameData(self):
+        """Upload the camera and light of this frame, read by every program through the FrameData block"""
+        viewMatrix = self._camera.viewMatrix
+        projectionMatrix = self._camera.projectionMatrix
+        self._frame_matrices = (viewMatrix, projectionMatrix, projectionMatrix * viewMatrix)
+        if self._light.headlight:
+            if self._light.directional:
+                lightPosition = QVector4D(0.0, 0.0, 1.0, 0.0)
+            else:
+                lightPosition = QVector4D(0.0, 0.0, 0.0, 1.0)
+        else:
+            lightPosition = viewMatrix * self._light.position
+        data = Shaders.packFrameData(viewMatrix, projectionMatrix, lightPosition, self._light.attenuation,
+            self._light.ambientColor, self._light.diffuseColor, self._light.specularColor)
+
+        if self._frame_data is None:
+            ## older PyOpenGL returns a single name, newer an array of one
+            self._frame_data = int(np.ravel(GL.glGenBuffers(1))[0])
+            GL.glBindBuffer(GL.GL_UNIFORM_BUFFER, self._frame_data)
+            GL.glBufferData(GL.GL_UNIFORM_BUFFER, data.nbytes, data, GL.GL_DYNAMIC_DRAW)
+        else:
+            GL.glBindBuffer(GL.GL_UNIFORM_BUFFER, self._frame_data)
+            GL.glBufferSubData(GL.GL_UNIFORM_BUFFER, 0, data.nbytes, data)
+        GL.glBindBuffer(GL.GL_UNIFORM_BUFFER, 0)
+        GL.glBindBufferBase(GL.GL_UNIFORM_BUFFER, Shaders.FrameDataBinding, self._frame_data)
+
+
     def render(self):
 
         ## set viewport region
@@ -371,7 +491,10 @@ class Scene(QObject):
         ## clear buffers
         GL.glClear(GL.GL_DEPTH_BUFFER_BIT)
 
-        for each in self.systemActors() + self.actors():
+        ## camera and light are shared by every actor of the frame
+        self.updateFrameData()
+
+        for each in self.drawOrder(self.systemActors() + self.actors()):
 
             if isinstance(each, Background):
 
@@ -390,5 +513,9 @@ class Scene(QObject):
                 ## render second pass of the scene
                 self.renderSecondPass(each)
 
+        ## actors of a mesh arena leave its vertex array bound for the next one
+        GL.glBindVertexArray(0)
+        self._bound_pool = None
+
 
 
@@ -1,11 +1,21 @@
+import re
+import numpy as np
 from PyQt5.QtCore import QObject
 from PyQt5.QtGui import QOpenGLShader, QOpenGLShaderProgram
+from OpenGL import GL
 
 ## singleton shader class 
 class Shaders(QObject):
 
     __instance = None
 
+    ## material table uniform block shared by models drawn in a single call
+    MaterialTableSize = 32
+    MaterialTableBinding = 1
+
+    ## camera and light uniform block written once per frame by the scene, see frameData
+    FrameDataBinding = 0
+
     def __new__(cls):
         if Shaders.__instance is None:
             Shaders.__instance = QObject.__new__(cls)
@@ -18,70 +28,114 @@ class Shaders(QObject):
 
         ## create background shader program
         self.__instance._backgroundShader = QOpenGLShaderProgram()
-        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeColorNoTransformVertexShader())
-        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeColorNoTransformVertexShader()))
+        self.__instance._backgroundShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._backgroundShader.link()
 
         ## create uniform material shader with no lighting 
         self.__instance._wireframeMaterialShader = QOpenGLShaderProgram()
-        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.wireframeMaterialVertexShader())
-        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.wireframeMaterialVertexShader()))
+        self.__instance._wireframeMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._wireframeMaterialShader.link()
 
         ## create uniform material shader with no lighting 
         self.__instance._uniformMaterialShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialVertexShader())
-        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialVertexShader()))
+        self.__instance._uniformMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._uniformMaterialShader.link()
 
         ## create uniform material with no lighting calculations
         self.__instance._attributeColorShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeColorTransformVertexShader())
-        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.simpleFragmentShader())
+        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeColorTransformVertexShader()))
+        self.__instance._attributeColorShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
         self.__instance._attributeColorShader.link()
 
         ## create Phong mesh shader
         self.__instance._uniformMaterialPhongShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialPhongVertexShader())
-        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.uniformMaterialPhongFragmentShader())
+        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexShader()))
+        self.__instance._uniformMaterialPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentShader()))
         self.__instance._uniformMaterialPhongShader.link()
 
         ## create color-based Phong mesh shader
         self.__instance._attributeColorPhongShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeMaterialPhongVertexShader())
-        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.attributeMaterialPhongFragmentShader())
+        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeMaterialPhongVertexShader()))
+        self.__instance._attributeColorPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.attributeMaterialPhongFragmentShader()))
         self.__instance._attributeColorPhongShader.link()
 
         ## create Phong mesh shader
         self.__instance._uniformMaterialPhongFlatShader = QOpenGLShaderProgram()
-        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.uniformMaterialPhongVertexFlatShader())
-        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.uniformMaterialPhongFragmentFlatShader())
+        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexFlatShader()))
+        self.__instance._uniformMaterialPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentFlatShader()))
         self.__instance._uniformMaterialPhongFlatShader.link()
 
         ## create color-based Phong mesh shader
         self.__instance._attributeColorPhongFlatShader = QOpenGLShaderProgram()
-        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.attributeMaterialPhongVertexFlatShader())
-        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.attributeMaterialPhongFragmentFlatShader())
+        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.attributeMaterialPhongVertexFlatShader()))
+        self.__instance._attributeColorPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.attributeMaterialPhongFragmentFlatShader()))
         self.__instance._attributeColorPhongFlatShader.link()
 
         ## create simple textured-based mesh shader
         self.__instance._texturedShader = QOpenGLShaderProgram()
-        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.texturedVertexShader())
-        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.texturedFragmentShader())
+        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.texturedVertexShader()))
+        self.__instance._texturedShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.texturedFragmentShader()))
         self.__instance._texturedShader.link()    
 
         ## create simple textured-based mesh flat shader
         self.__instance._texturedFlatShader = QOpenGLShaderProgram()
-        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.texturedVertexFlatShader())
-        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.texturedFragmentFlatShader())
+        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.texturedVertexFlatShader()))
+        self.__instance._texturedFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.texturedFragmentFlatShader()))
         self.__instance._texturedFlatShader.link()    
 
+        ## create material table shaders, one draw call for multi-material models
+        self.__instance._materialTablePhongShader = QOpenGLShaderProgram()
+        self.__instance._materialTablePhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexShader()))
+        self.__instance._materialTablePhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.materialTablePhongFragmentShader("smooth")))
+        self.__instance._materialTablePhongShader.link()
+
+        self.__instance._materialTablePhongFlatShader = QOpenGLShaderProgram()
+        self.__instance._materialTablePhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.uniformMaterialPhongVertexFlatShader()))
+        self.__instance._materialTablePhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.materialTablePhongFragmentShader("flat")))
+        self.__instance._materialTablePhongFlatShader.link()
+
+        self.__instance._materialTableShader = QOpenGLShaderProgram()
+        self.__instance._materialTableShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.materialTableVertexShader()))
+        self.__instance._materialTableShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.materialTableFragmentShader()))
+        self.__instance._materialTableShader.link()
+
+        ## GLSL 4.0 has no binding layout qualifier for blocks
+        for each in (self.__instance._materialTablePhongShader, self.__instance._materialTablePhongFlatShader, self.__instance._materialTableShader):
+            block = GL.glGetUniformBlockIndex(each.programId(), "MaterialTable")
+            GL.glUniformBlockBinding(each.programId(), block, Shaders.MaterialTableBinding)
+
         self.__instance._normalVisShader = QOpenGLShaderProgram()
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.normalVisVertexShader())
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Geometry, Shaders.normalVisGeometryShader())
-        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.normalVisFragmentShader())
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.normalVisVertexShader()))
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Geometry, Shaders.frameData(Shaders.normalVisGeometryShader()))
+        self.__instance._normalVisShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.normalVisFragmentShader()))
         self.__instance._normalVisShader.link()
 
+        ## create shaders drawing procedural surfaces without vertex buffers
+        self.__instance._proceduralMaterialShader = QOpenGLShaderProgram()
+        self.__instance._proceduralMaterialShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialVertexShader())))
+        self.__instance._proceduralMaterialShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.simpleFragmentShader()))
+        self.__instance._proceduralMaterialShader.link()
+
+        self.__instance._proceduralPhongShader = QOpenGLShaderProgram()
+        self.__instance._proceduralPhongShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialPhongVertexShader())))
+        self.__instance._proceduralPhongShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentShader()))
+        self.__instance._proceduralPhongShader.link()
+
+        self.__instance._proceduralPhongFlatShader = QOpenGLShaderProgram()
+        self.__instance._proceduralPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Vertex, Shaders.frameData(Shaders.procedural(Shaders.uniformMaterialPhongVertexFlatShader())))
+        self.__instance._proceduralPhongFlatShader.addShaderFromSourceCode(QOpenGLShader.Fragment, Shaders.frameData(Shaders.uniformMaterialPhongFragmentFlatShader()))
+        self.__instance._proceduralPhongFlatShader.link()
+
+        ## GLSL 4.0 has no binding layout qualifier for blocks
+        for each in vars(self.__instance).values():
+            if isinstance(each, QOpenGLShaderProgram):
+                block = GL.glGetUniformBlockIndex(each.programId(), "FrameData")
+                if block != GL.GL_INVALID_INDEX:
+                    GL.glUniformBlockBinding(each.programId(), block, Shaders.FrameDataBinding)
+
 
     @classmethod
     def attributeColorTransformVertexShader(cls):
@@ -367,6 +421,139 @@ class Shaders(QObject):
         return fragmentShaderSource
 
 
+    @classmethod
+    def materialTableSource(cls):
+        return """
+        struct Material {
+            vec3 emission;
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;    
+            float shininess;
+        }; 
+
+        struct MaterialEntry {
+            vec4 emission;
+            vec4 ambient;
+            vec4 diffuse;
+            vec4 specular;      // shininess in w
+            ivec4 range;        // first and end triangle
+        };
+
+        layout(std140) uniform MaterialTable {
+            ivec4 materialCount;
+            MaterialEntry entries[%d];
+        };
+
+        // actor material, used where selection state overrides the table
+        uniform Material material;
+        uniform bool emissionOverride;
+        uniform bool materialOverride;
+
+        Material tableMaterial()
+        {
+            // triangle ranges are sorted, take the last one starting at or before this triangle
+            int m = 0;
+            for (int i = 1; i < materialCount.x; ++i) {
+                if (gl_PrimitiveID >= entries[i].range.x) m = i;
+            }
+            Material result;
+            result.emission = emissionOverride ? material.emission : entries[m].emission.rgb;
+            if (materialOverride) {
+                result.ambient = material.ambient;
+                result.diffuse = material.diffuse;
+                result.specular = material.specular;
+                result.shininess = material.shininess;
+            } else {
+                result.ambient = entries[m].ambient.rgb;
+                result.diffuse = entries[m].diffuse.rgb;
+                result.specular = entries[m].specular.rgb;
+                result.shininess = entries[m].specular.w;
+            }
+            return result;
+        }
+        """ % Shaders.MaterialTableSize
+
+
+    @classmethod
+    def materialTablePhongFragmentShader(cls, interpolation):
+        fragmentShaderSource = """
+        #version 400
+        """ + Shaders.materialTableSource() + """
+        struct Light {
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+        };
+
+        %s in vec4 vertexNormal;
+        smooth in vec4 vertexPosition;
+        smooth in vec3 lightDirection;
+        smooth in float attenuation;
+
+        uniform Light light;
+
+        uniform float selected;
+        out vec4 fragColor;
+
+        void main()
+        {
+            Material m = tableMaterial();
+
+            // ambient term
+            vec3 ambient = m.ambient * light.ambient;
+
+            // diffuse term
+            vec3 N = normalize(vertexNormal.xyz);
+            vec3 L = normalize(lightDirection);
+            vec3 diffuse = light.diffuse * m.diffuse * max(dot(N, L), 0.0);
+
+            // specular term
+            vec3 E = normalize(-vertexPosition.xyz);
+            vec3 R = normalize(-reflect(L, N)); 
+            vec3 specular = light.specular * m.specular * pow(max(dot(R, E), 0.0), m.shininess);
+
+            // final intensity
+            vec3 intensity = m.emission + clamp(ambient + attenuation * (diffuse + specular), 0.0, 1.0);
+            fragColor = vec4(intensity, 1.0) + vec4(selected, 0.0, 0.0, 0.0);
+        }
+        """ % interpolation
+        return fragmentShaderSource
+
+
+    @classmethod
+    def materialTableVertexShader(cls):
+        vertexShaderSource = """
+        #version 400
+        layout(location = 0) in vec3 position;
+        
+        uniform mat4 modelMatrix;
+        uniform mat4 viewMatrix;
+        uniform mat4 projectionMatrix;
+
+        void main()
+        {
+            gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(position, 1.0);
+        }
+        """
+        return vertexShaderSource
+
+
+    @classmethod
+    def materialTableFragmentShader(cls):
+        fragmentShaderSource = """
+        #version 400
+        """ + Shaders.materialTableSource() + """
+        out vec4 fragColor;
+
+        void main()
+        {
+            fragColor = vec4(tableMaterial().diffuse, 1.0);
+        }
+        """
+        return fragmentShaderSource
+
+
     @classmethod
     def attributeMaterialPhongVertexShader(cls):
         vertexShaderSource = """
@@ -814,6 +1001,138 @@ class Shaders(QObject):
             fragColor = vec4(1.0, 1.0, 0.0, 1.0);
         }"""
 
+    @classmethod
+    def proceduralSurface(cls):
+        ## vertex of a cone, cylinder or latitude-longitude sphere from gl_VertexID alone, replaces the vertex attributes
+        surfaceSource = """
+        uniform int surfaceType;
+        uniform int uResolution;
+        uniform int vResolution;
+        uniform float radius;
+        uniform float height;
+
+        const float PI = 3.14159265358979;
+
+        // two triangles per quad, quads numbered along u, then v, then band
+        const ivec2 corners[6] = ivec2[6](ivec2(0, 0), ivec2(0, 1), ivec2(1, 1), ivec2(0, 0), ivec2(1, 1), ivec2(1, 0));
+
+        void surfacePoint(out vec3 position, out vec3 normal)
+        {
+            int quad = gl_VertexID / 6;
+            int row = quad / uResolution;
+            int band = row / vResolution;
+
+            // bottom caps face down, their triangles are wound the other way
+            bool flipped = (surfaceType == 0 && band == 1) || (surfaceType == 1 && band == 2);
+            ivec2 corner = corners[flipped ? 5 - gl_VertexID % 6 : gl_VertexID % 6];
+            float step = 2.0 * PI / float(uResolution);
+            float u = float(quad % uResolution + corner.x) * step;
+            int line = row % vResolution + corner.y;
+            float t = float(line) / float(vResolution);
+            float h2 = 0.5 * height;
+
+            if (surfaceType == 0) {
+                vec3 rim = vec3(cos(u) * radius, -h2, sin(u) * radius);
+                if (band == 0) {
+                    // the apex takes the mean normal of the two rim corners of its triangle
+                    vec2 slope = vec2(height, radius) * inversesqrt(height * height + radius * radius);
+                    normal = vec3(cos(u) * slope.x, slope.y, sin(u) * slope.x);
+                    if (line == 0)
+                        normal = 0.5 * (normal + vec3(cos(u + step) * slope.x, slope.y, sin(u + step) * slope.x));
+                    position = mix(vec3(0.0, h2, 0.0), rim, t);
+                }
+                else {
+                    normal = vec3(0.0, -1.0, 0.0);
+                    position = mix(vec3(0.0, -h2, 0.0), rim, t);
+                }
+            }
+            else if (surfaceType == 1) {
+                vec3 rim = vec3(-sin(u) * radius, 0.0, -cos(u) * radius);
+                if (band == 0) {
+                    normal = vec3(0.0, 1.0, 0.0);
+                    position = mix(vec3(0.0, h2, 0.0), rim + vec3(0.0, h2, 0.0), t);
+                }
+                else if (band == 1) {
+                    normal = vec3(-sin(u), 0.0, -cos(u));
+                    position = rim + vec3(0.0, h2 - t * height, 0.0);
+                }
+                else {
+                    normal = vec3(0.0, -1.0, 0.0);
+                    position = mix(vec3(0.0, -h2, 0.0), rim - vec3(0.0, h2, 0.0), t);
+                }
+            }
+            else {
+                float polar = t * PI;
+                normal = vec3(sin(polar) * cos(u), sin(polar) * sin(u), cos(polar));
+                position = radius * normal;
+            }
+        }
+        """
+        return surfaceSource
+
+
+    @classmethod
+    def procedural(cls, vertexShaderSource):
+        """Returns a vertex shader with its position and normal attributes generated by proceduralSurface"""
+        vertexShaderSource = vertexShaderSource.replace("layout(location = 0) in vec3 position;", cls.proceduralSurface())
+        vertexShaderSource = vertexShaderSource.replace("layout(location = 1) in vec3 normal;", "")
+        return vertexShaderSource.replace("void main()\n        {", "void main()\n        {\n            vec3 position, normal;\n            surfacePoint(position, normal);", 1)
+
+
+    @classmethod
+    def frameDataBlock(cls):
+        ## camera and light shared by every program, 208 bytes in std140, see packFrameData
+        blockSource = """
+        layout(std140) uniform FrameData {
+            mat4 viewMatrix;
+            mat4 projectionMatrix;
+            vec4 lightPosition;
+            vec3 lightAttenuation;
+            Light light;
+        };
+        """
+        return blockSource
+
+
+    @classmethod
+    def frameData(cls, source):
+        """Returns a shader stage with its camera and light uniforms replaced by the FrameData block"""
+        declaration = re.compile(r"^[ \t]*uniform (mat4 viewMatrix|mat4 projectionMatrix|vec4 lightPosition|vec3 lightAttenuation|Light light);[ \t]*\n", re.M)
+        if not declaration.search(source):
+            return source
+        source = declaration.sub("", source)
+        ## the block holds a Light, declared after the stage's own definition or added after the version
+        struct = re.search(r"struct Light \{[^}]*\};", source)
+        if struct is None:
+            struct = re.search(r"#version[^\n]*\n", source)
+            return source[:struct.end()] + cls.frameLight() + cls.frameDataBlock() + source[struct.end():]
+        return source[:struct.end()] + cls.frameDataBlock() + source[struct.end():]
+
+
+    @classmethod
+    def frameLight(cls):
+        lightSource = """
+        struct Light {
+            vec3 ambient;
+            vec3 diffuse;
+            vec3 specular;
+        };
+        """
+        return lightSource
+
+
+    @staticmethod
+    def packFrameData(viewMatrix, projectionMatrix, lightPosition, lightAttenuation, ambient, diffuse, specular):
+        """Returns the FrameData block as std140 floats, matrices column major and vec3 padded to vec4"""
+        data = np.zeros(52, dtype=np.float32)
+        data[0:16] = viewMatrix.data()
+        data[16:32] = projectionMatrix.data()
+        data[32:36] = [lightPosition.x(), lightPosition.y(), lightPosition.z(), lightPosition.w()]
+        for offset, vector in ((36, lightAttenuation), (40, ambient), (44, diffuse), (48, specular)):
+            data[offset:offset + 3] = [vector.x(), vector.y(), vector.z()]
+        return data
+
+
     def backgroundShader(self):
         return self.__instance._backgroundShader
 
@@ -844,5 +1163,23 @@ class Shaders(QObject):
     def texturedFlatShader(self):
         return self.__instance._texturedFlatShader
 
+    def materialTablePhongShader(self):
+        return self.__instance._materialTablePhongShader
+
+    def materialTablePhongFlatShader(self):
+        return self.__instance._materialTablePhongFlatShader
+
+    def materialTableShader(self):
+        return self.__instance._materialTableShader
+
     def normalVisShader(self):
         return self.__instance._normalVisShader
+
+    def proceduralMaterialShader(self):
+        return self.__instance._proceduralMaterialShader
+
+    def proceduralPhongShader(self):
+        return self.__instance._proceduralPhongShader
+
+    def proceduralPhongFlatShader(self):
+        return self.__instance._proceduralPhongFlatShader
@@ -0,0 +1,348 @@
+import bisect
+import ctypes
+import numpy as np
+from OpenGL import GL
+from PyQt5.QtGui import QOpenGLBuffer, QOpenGLContext, QOpenGLVertexArrayObject
+
+
+class RangeAllocator:
+    """First fit free list of element ranges, freed ranges are merged with their free neighbours"""
+
+    def __init__(self, capacity):
+        """Initialize with every element free"""
+        self.capacity = capacity
+        ## sorted [offset, count] of free ranges
+        self._free = [[0, capacity]] if capacity else []
+
+
+    def allocate(self, count):
+        """Returns the offset of count free elements, None when no free range is large enough"""
+        for index, (offset, size) in enumerate(self._free):
+            if size >= count:
+                if size == count:
+                    del self._free[index]
+                else:
+                    self._free[index] = [offset + count, size - count]
+                return offset
+        return None
+
+
+    def free(self, offset, count):
+        """Return a range to the free list"""
+        if count == 0:
+            return
+        index = bisect.bisect(self._free, [offset, count])
+        self._free.insert(index, [offset, count])
+        ## merge with the next range, then with the previous one
+        if index + 1 < len(self._free) and offset + count == self._free[index + 1][0]:
+            self._free[index][1] += self._free.pop(index + 1)[1]
+        if index > 0 and self._free[index - 1][0] + self._free[index - 1][1] == offset:
+            self._free[index - 1][1] += self._free.pop(index)[1]
+
+
+    def grow(self, capacity):
+        """Add the elements up to a larger capacity as free"""
+        self.free(self.capacity, capacity - self.capacity)
+        self.capacity = capacity
+
+
+    def reset(self, used):
+        """Mark the first used elements allocated and the rest free, after compaction"""
+        self._free = [[used, self.capacity - used]] if used < self.capacity else []
+
+
+    @property
+    def freeCount(self):
+        """Returns the number of free elements"""
+        return sum(size for _, size in self._free)
+
+
+    @property
+    def largestFree(self):
+        """Returns the size of the largest free range"""
+        return max((size for _, size in self._free), default=0)
+
+
+    @property
+    def fragments(self):
+        """Returns the number of free ranges"""
+        return len(self._free)
+
+
+    def fragmentation(self):
+        """Returns the part of the free elements outside the largest free range, 0 when all are contiguous"""
+        free = self.freeCount
+        return 1.0 - self.largestFree / free if free else 0.0
+
+
+class MeshAllocation:
+    """Vertex and index ranges of one mesh in an arena pool, indices are relative to the base vertex"""
+
+    def __init__(self, pool, baseVertex, vertexCount, firstIndex, indexCount):
+        """Initialize allocation"""
+        self.pool = pool
+        self.baseVertex = baseVertex
+        self.vertexCount = vertexCount
+        self.firstIndex = firstIndex
+        self.indexCount = indexCount
+
+
+    def destroy(self):
+        """Free the ranges, once even when shared buffers are destroyed twice"""
+        if self.pool is not None:
+            self.pool.free(self)
+            self.pool = None
+
+
+class ArenaPool:
+    """Vertex array, interleaved float vertex buffer and index buffer shared by every mesh with the same attributes"""
+
+    ## locations every shader declares its attributes at
+    Locations = {'position': 0, 'normal': 1, 'color': 2, 'texcoord': 3}
+    Components = {'position': 3, 'normal': 3, 'color': 3, 'texcoord': 2}
+
+    ## elements the buffers start with, they double when full
+    Vertices = 65536
+    Indices = 3 * 65536
+
+    def __init__(self, names, vertices=Vertices, indices=Indices):
+        """Initialize with the attribute names stored per vertex"""
+        self.names = names
+        self.stride = sum(ArenaPool.Components[name] for name in names) * np.dtype(np.float32).itemsize
+        self._vertices = RangeAllocator(vertices)
+        self._indices = RangeAllocator(indices)
+        self._allocations = set()
+        self._vao = QOpenGLVertexArrayObject()
+        self._vbo = None
+        self._ibo = None
+        ## number of compactions and reallocations, for statistics
+        self._compactions = 0
+        self._growths = 0
+
+
+    def create(self):
+        """Allocate the buffers and record them in the vertex array"""
+        self._vao.create()
+        self._vbo, self._ibo = self.createBuffers(self._vertices.capacity, self._indices.capacity)
+        self.setAttributes()
+
+
+    def createBuffers(self, vertices, indices):
+        """Returns new vertex and index buffers of the given capacities"""
+        vbo = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        ibo = QOpenGLBuffer(QOpenGLBuffer.IndexBuffer)
+        for buffer, size in ((vbo, vertices * self.stride), (ibo, indices * np.dtype(np.uint32).itemsize)):
+            buffer.setUsagePattern(QOpenGLBuffer.StaticDraw)
+            buffer.create()
+            GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, buffer.bufferId())
+            GL.glBufferData(GL.GL_COPY_WRITE_BUFFER, max(size, 1), None, GL.GL_STATIC_DRAW)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, 0)
+        return vbo, ibo
+
+
+    def setAttributes(self):
+        """Point the vertex array at the current buffers"""
+        self._vao.bind()
+        self._vbo.bind()
+        offset = 0
+        for name in self.names:
+            location = ArenaPool.Locations[name]
+            GL.glVertexAttribPointer(location, ArenaPool.Components[name], GL.GL_FLOAT, GL.GL_FALSE, self.stride, ctypes.c_void_p(offset))
+            GL.glEnableVertexAttribArray(location)
+            offset += ArenaPool.Components[name] * np.dtype(np.float32).itemsize
+        self._ibo.bind()
+        self._vao.release()
+        self._vbo.release(QOpenGLBuffer.VertexBuffer)
+        self._ibo.release(QOpenGLBuffer.IndexBuffer)
+
+
+    def bind(self):
+        """Bind the vertex array, the scene skips it for consecutive meshes of the pool"""
+        self._vao.bind()
+
+
+    def allocate(self, data, indices):
+        """Upload interleaved vertices and their indices, returns their allocation"""
+        vertexCount = len(data)
+        indexCount = 0 if indices is None else len(indices)
+        baseVertex = self._vertices.allocate(vertexCount)
+        firstIndex = self._indices.allocate(indexCount) if indexCount else 0
+        if baseVertex is None or firstIndex is None:
+            if baseVertex is not None:
+                self._vertices.free(baseVertex, vertexCount)
+            if firstIndex is not None and indexCount:
+                self._indices.free(firstIndex, indexCount)
+            self.makeRoom(vertexCount, indexCount)
+            return self.allocate(data, indices)
+
+        allocation = MeshAllocation(self, baseVertex, vertexCount, firstIndex, indexCount)
+        self._allocations.add(allocation)
+        self.write(self._vbo, baseVertex * self.stride, data)
+        if indexCount:
+            self.write(self._ibo, firstIndex * np.dtype(np.uint32).itemsize, indices)
+        return allocation
+
+
+    @staticmethod
+    def write(buffer, offset, values):
+        """Write an array into a buffer without touching the vertex array bindings"""
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, buffer.bufferId())
+        GL.glBufferSubData(GL.GL_COPY_WRITE_BUFFER, offset, values.nbytes, values)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, 0)
+
+
+    def free(self, allocation):
+        """Return the ranges of an allocation"""
+        self._allocations.discard(allocation)
+        self._vertices.free(allocation.baseVertex, allocation.vertexCount)
+        self._indices.free(allocation.firstIndex, allocation.indexCount)
+
+
+    def makeRoom(self, vertexCount, indexCount):
+        """Compact when the free elements would fit once contiguous, grow the buffers otherwise"""
+        vertices, indices = self._vertices.capacity, self._indices.capacity
+        if self._vertices.freeCount >= vertexCount and self._indices.freeCount >= indexCount:
+            self.compact()
+            if self._vertices.largestFree >= vertexCount and self._indices.largestFree >= indexCount:
+                return
+        while vertices - self.usedVertices() < vertexCount:
+            vertices *= 2
+        while indices - self.usedIndices() < indexCount:
+            indices *= 2
+        self.relocate(vertices, indices, compact=False)
+
+
+    def usedVertices(self):
+        """Returns the number of allocated vertices"""
+        return self._vertices.capacity - self._vertices.freeCount
+
+
+    def usedIndices(self):
+        """Returns the number of allocated indices"""
+        return self._indices.capacity - self._indices.freeCount
+
+
+    def compact(self):
+        """Move every allocation to the front of the buffers, in their current order"""
+        self.relocate(self._vertices.capacity, self._indices.capacity, compact=True)
+
+
+    def relocate(self, vertices, indices, compact):
+        """Copy the allocations into new buffers, packed together when compacting, at the same offsets otherwise"""
+        vbo, ibo = self.createBuffers(vertices, indices)
+        indexSize = np.dtype(np.uint32).itemsize
+        nextVertex = nextIndex = 0
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, self._vbo.bufferId())
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, vbo.bufferId())
+        for each in sorted(self._allocations, key=lambda allocation: allocation.baseVertex):
+            target = nextVertex if compact else each.baseVertex
+            GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER,
+                each.baseVertex * self.stride, target * self.stride, each.vertexCount * self.stride)
+            each.baseVertex = target
+            nextVertex = target + each.vertexCount
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, self._ibo.bufferId())
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, ibo.bufferId())
+        for each in sorted(self._allocations, key=lambda allocation: allocation.firstIndex):
+            if not each.indexCount:
+                continue
+            target = nextIndex if compact else each.firstIndex
+            GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER,
+                each.firstIndex * indexSize, target * indexSize, each.indexCount * indexSize)
+            each.firstIndex = target
+            nextIndex = target + each.indexCount
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, 0)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, 0)
+
+        self._vbo.destroy()
+        self._ibo.destroy()
+        self._vbo, self._ibo = vbo, ibo
+        if compact:
+            self._vertices.reset(nextVertex)
+            self._indices.reset(nextIndex)
+            self._compactions += 1
+        else:
+            self._vertices.grow(vertices)
+            self._indices.grow(indices)
+            self._growths += 1
+        self.setAttributes()
+
+
+    def statistics(self):
+        """Returns the capacity, use and fragmentation of the vertex and index ranges"""
+        result = {'attributes': self.names, 'allocations': len(self._allocations),
+            'bytes': self._vertices.capacity * self.stride + self._indices.capacity * np.dtype(np.uint32).itemsize,
+            'compactions': self._compactions, 'growths': self._growths}
+        for name, allocator in (('vertices', self._vertices), ('indices', self._indices)):
+            result[name] = {'capacity': allocator.capacity, 'used': allocator.capacity - allocator.freeCount,
+                'freeRanges': allocator.fragments, 'largestFree': allocator.largestFree,
+                'fragmentation': allocator.fragmentation()}
+        return result
+
+
+    def destroy(self):
+        """Free the vertex array and buffers"""
+        self._vao.destroy()
+        if self._vbo is not None:
+            self._vbo.destroy()
+            self._ibo.destroy()
+        for each in self._allocations:
+            each.pool = None
+        self._allocations = set()
+
+
+class MeshArena:
+    """Sub-allocates the meshes of many actors from one pool per attribute set, drawn with base vertices"""
+
+    def __init__(self):
+        """Initialize arena"""
+        ## (attribute names, context) -> pool
+        self._pools = {}
+
+
+    def pool(self, names):
+        """Returns the pool of an attribute set in the current context, created on first use"""
+        slot = (names, QOpenGLContext.currentContext())
+        pool = self._pools.get(slot)
+        if pool is None:
+            pool = self._pools[slot] = ArenaPool(names)
+            pool.create()
+        return pool
+
+
+    def allocate(self, vertices, normals=None, colors=None, texcoords=None, indices=None):
+        """Interleave the attributes given and upload them with their indices, returns their allocation"""
+        values = {'position': vertices, 'normal': normals, 'color': colors, 'texcoord': texcoords}
+        names = tuple(name for name in ArenaPool.Locations if values[name] is not None)
+        count = np.asarray(vertices).size // 3
+        data = np.empty((count, sum(ArenaPool.Components[name] for name in names)), dtype=np.float32)
+        column = 0
+        for name in names:
+            components = ArenaPool.Components[name]
+            data[:, column:column + components] = np.asarray(values[name], dtype=np.float32).reshape(-1, components)
+            column += components
+        if indices is not None:
+            indices = np.ascontiguousarray(indices, dtype=np.uint32).ravel()
+        return self.pool(names).allocate(data, indices)
+
+
+    def compact(self):
+        """Compact every pool of the current context"""
+        for (_, context), pool in self._pools.items():
+            if context == QOpenGLContext.currentContext():
+                pool.compact()
+
+
+    def statistics(self):
+        """Returns the statistics of every pool of the current context"""
+        return [pool.statistics() for (_, context), pool in self._pools.items()
+            if context == QOpenGLContext.currentContext()]
+
+
+    def destroy(self):
+        """Free the pools of the current context"""
+        for slot in [slot for slot in self._pools if slot[1] == QOpenGLContext.currentContext()]:
+            self._pools.pop(slot).destroy()
+
+
+## arena shared by every actor created with arena=defaultArena
+defaultArena = MeshArena()
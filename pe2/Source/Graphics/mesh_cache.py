@@ -0,0 +1,167 @@
+import os
+import io
+import json
+import lzma
+import zlib
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+
+## bump whenever the layout of a cache entry changes
+CACHE_VERSION = b'mesh-cache-4'
+
+
+class MeshCache:
+    """Persistent cache of preprocessed meshes keyed by source content"""
+
+    Compressors = {
+        None: (None, None),
+        'zlib': (zlib.compress, zlib.decompress),
+        'lzma': (lzma.compress, lzma.decompress),
+    }
+
+    ## arrays stored as one .npy blob each
+    Arrays = ['vertices', 'normals', 'texcoords', 'indices', 'lodIndices']
+
+    def __init__(self, path='.mesh-cache', max_bytes=256 * 1024 * 1024, compression=None):
+        """Initialize cache directory"""
+        if compression not in MeshCache.Compressors:
+            raise ValueError("unknown mesh cache compression: {}".format(compression))
+        self._path = path
+        self._max_bytes = max_bytes
+        self._compression = compression
+
+
+    @property
+    def path(self):
+        """Returns the cache directory"""
+        return self._path
+
+
+    def key(self, obj_data, mtl_data, scale, lod=False):
+        """Returns the cache key for the given source bytes, scale and whether levels of detail are built"""
+        digest = hashlib.sha1(CACHE_VERSION)
+        for part in (obj_data, mtl_data, repr(float(scale)).encode(), b'lod' if lod else b''):
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+
+
+    def entryPath(self, key):
+        """Returns the directory of a cache entry"""
+        return os.path.join(self._path, key)
+
+
+    def load(self, key):
+        """Returns the cached mesh, memory mapped if uncompressed, or None"""
+        entry = self.entryPath(key)
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as file:
+                meta = json.load(file)
+            mesh = {}
+            for name in MeshCache.Arrays:
+                mesh[name] = self.readArray(entry, name, meta['compression'])
+        except (OSError, ValueError, KeyError, zlib.error, lzma.LZMAError):
+            ## drop broken entries so the next store can replace them
+            if os.path.exists(os.path.join(entry, 'meta.json')):
+                shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        ## touch entry so eviction sees it as recently used
+        os.utime(os.path.join(entry, 'meta.json'))
+
+        mesh['names'] = meta['names']
+        mesh['ranges'] = {name: list(r) for name, r in zip(meta['names'], meta['ranges'])}
+        mesh['materials'] = meta['materials']
+        mesh['lods'] = [{name: list(r) for name, r in zip(meta['names'], level)} for level in meta['lods']]
+        return mesh
+
+
+    def readArray(self, entry, name, compression):
+        """Load a single array blob"""
+        if compression is None:
+            return np.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
+        decompress = MeshCache.Compressors[compression][1]
+        with open(os.path.join(entry, name + '.npy.' + compression), 'rb') as file:
+            return np.load(io.BytesIO(decompress(file.read())))
+
+
+    def store(self, key, mesh):
+        """Write a mesh entry, then evict old entries above the size bound"""
+        os.makedirs(self._path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self._path)
+        try:
+            compress = MeshCache.Compressors[self._compression][0]
+            for name in MeshCache.Arrays:
+                array = np.ascontiguousarray(mesh[name])
+                if compress is None:
+                    np.save(os.path.join(staging, name + '.npy'), array)
+                else:
+                    blob = io.BytesIO()
+                    np.save(blob, array)
+                    with open(os.path.join(staging, name + '.npy.' + self._compression), 'wb') as file:
+                        file.write(compress(blob.getvalue()))
+            meta = {
+                'compression': self._compression,
+                'names': mesh['names'],
+                'ranges': [mesh['ranges'][name] for name in mesh['names']],
+                'materials': mesh['materials'],
+                'lods': [[level[name] for name in mesh['names']] for level in mesh['lods']]}
+            with open(os.path.join(staging, 'meta.json'), 'w') as file:
+                json.dump(meta, file)
+
+            ## publish atomically, a concurrent writer may have won the race
+            try:
+                os.replace(staging, self.entryPath(key))
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict()
+
+
+    def entries(self):
+        """Returns (last use, size, key) for every complete entry"""
+        result = []
+        if not os.path.isdir(self._path):
+            return result
+        for key in os.listdir(self._path):
+            entry = self.entryPath(key)
+            meta = os.path.join(entry, 'meta.json')
+            if key.startswith('.') or not os.path.exists(meta):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, each)) for each in os.listdir(entry))
+            result.append((os.path.getmtime(meta), size, key))
+        return result
+
+
+    def size(self):
+        """Returns the total size of the cache in bytes"""
+        return sum(size for _, size, _ in self.entries())
+
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its bound"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self._max_bytes:
+            _, size, key = entries.pop(0)
+            shutil.rmtree(self.entryPath(key), ignore_errors=True)
+            total -= size
+
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        shutil.rmtree(self._path, ignore_errors=True)
+
+
+## process wide cache used by Obj_Polyhedron, set up by main.py
+defaultCache = MeshCache()
+
+
+def setDefaultCache(cache):
+    """Replace the process wide mesh cache"""
+    global defaultCache
+    defaultCache = cache
@@ -0,0 +1,254 @@
+import numpy as np
+
+## weight of the planes that keep open and material boundaries in place
+BoundaryWeight = 1000.0
+
+## smallest cosine between a face normal before and after a collapse
+FlipThreshold = 0.2
+
+## triangle ratios of the generated levels, relative to the full mesh
+LodRatios = [0.5, 0.25, 0.125]
+
+
+def weldPositions(vertices):
+    """Returns unique positions and the position of every render vertex"""
+    positions, welded = np.unique(np.asarray(vertices, dtype=np.float64), axis=0, return_inverse=True)
+    return positions, welded.ravel()
+
+
+def faceNormals(positions, faces):
+    """Returns unit normals and areas of a triangle list"""
+    p0 = positions[faces[:, 0]]
+    normals = np.cross(positions[faces[:, 1]] - p0, positions[faces[:, 2]] - p0)
+    length = np.linalg.norm(normals, axis=1)
+    return normals / np.where(length > 0.0, length, 1.0)[:, None], 0.5 * length
+
+
+def planeQuadrics(normals, points, weights):
+    """Returns the weighted fundamental error quadrics of planes through points"""
+    planes = np.concatenate((normals, -(normals * points).sum(axis=1, keepdims=True)), axis=1)
+    return weights[:, None, None] * planes[:, :, None] * planes[:, None, :]
+
+
+def faceEdges(faces, count):
+    """Returns the unique edges of a triangle list, the edge of every face side and the edge use counts"""
+    a = faces.ravel()
+    b = faces[:, [1, 2, 0]].ravel()
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    keys, first, side, uses = np.unique(lo * count + hi, return_index=True, return_inverse=True, return_counts=True)
+    return np.stack((lo[first], hi[first]), axis=1), keys, side.ravel(), uses
+
+
+def boundaryEdges(faces, materials, side, uses, edges):
+    """Flags open, non-manifold and material boundary edges"""
+    owner = np.repeat(materials, 3)
+    low = np.full(len(edges), np.iinfo(np.int64).max)
+    high = np.full(len(edges), np.iinfo(np.int64).min)
+    np.minimum.at(low, side, owner)
+    np.maximum.at(high, side, owner)
+    return (uses != 2) | (low != high)
+
+
+def adjacency(first, second, count):
+    """Returns a CSR table of second grouped by first"""
+    order = np.argsort(first, kind='stable')
+    starts = np.searchsorted(first[order], np.arange(count + 1))
+    return second[order], starts
+
+
+def expand(starts, rows):
+    """Returns (row position, table index) pairs for the given CSR rows"""
+    lengths = starts[rows + 1] - starts[rows]
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[rows][owner] + offsets
+
+
+def initialQuadrics(positions, faces, materials):
+    """Accumulate face quadrics and boundary constraint planes on every position"""
+    normals, areas = faceNormals(positions, faces)
+    quadrics = np.zeros((len(positions), 4, 4))
+    faceQuadric = planeQuadrics(normals, positions[faces[:, 0]], areas)
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], faceQuadric)
+
+    ## planes perpendicular to boundary edges resist moving the boundary
+    edges, _, side, uses = faceEdges(faces, len(positions))
+    boundary = boundaryEdges(faces, materials, side, uses, edges)[side]
+    a = faces.ravel()[boundary]
+    b = faces[:, [1, 2, 0]].ravel()[boundary]
+    face = np.flatnonzero(boundary) // 3
+    direction = positions[b] - positions[a]
+    perpendicular = np.cross(direction, normals[face])
+    length = np.linalg.norm(perpendicular, axis=1)
+    perpendicular = perpendicular / np.where(length > 0.0, length, 1.0)[:, None]
+    edgeQuadric = planeQuadrics(perpendicular, positions[a], BoundaryWeight * (direction ** 2).sum(axis=1))
+    np.add.at(quadrics, a, edgeQuadric)
+    np.add.at(quadrics, b, edgeQuadric)
+    return quadrics
+
+
+def collapseCandidates(positions, faces, materials, quadrics):
+    """Returns valid half-edge collapses (source, target, removed faces) sorted by error"""
+    count = len(positions)
+    edges, keys, side, uses = faceEdges(faces, count)
+    boundary = boundaryEdges(faces, materials, side, uses, edges)
+    degree = np.bincount(edges[boundary].ravel(), minlength=count)
+
+    ## both directions of every edge, moving the source onto the target
+    source = np.concatenate((edges[:, 0], edges[:, 1]))
+    target = np.concatenate((edges[:, 1], edges[:, 0]))
+    onBoundary = np.tile(boundary, 2)
+    removed = np.tile(uses, 2)
+
+    ## boundary vertices may only slide along their own boundary, corners stay
+    valid = (removed <= 2) & ((degree[source] == 0) | ((degree[source] == 2) & onBoundary))
+    source, target, removed = source[valid], target[valid], removed[valid]
+
+    ## link condition, shared neighbours must be exactly the opposite corners
+    neighbours, starts = adjacency(np.concatenate((edges[:, 0], edges[:, 1])), np.concatenate((edges[:, 1], edges[:, 0])), count)
+    owner, slot = expand(starts, source)
+    other = neighbours[slot]
+    lo, hi = np.minimum(other, target[owner]), np.maximum(other, target[owner])
+    found = np.searchsorted(keys, lo * count + hi)
+    shared = (other != target[owner]) & (keys[np.minimum(found, len(keys) - 1)] == lo * count + hi)
+    valid = np.bincount(owner[shared], minlength=len(source)) == removed
+
+    ## reject collapses that fold a surviving face over
+    corners, cornerStarts = adjacency(faces.ravel(), np.arange(faces.size), count)
+    owner, slot = expand(cornerStarts, source)
+    face = corners[slot] // 3
+    keeps = (faces[face] != target[owner][:, None]).all(axis=1)
+    owner, face = owner[keeps], face[keeps]
+    before, _ = faceNormals(positions, faces[face])
+    moved = np.where(faces[face] == source[owner][:, None], target[owner][:, None], faces[face])
+    after, areas = faceNormals(positions, moved)
+    folded = ((before * after).sum(axis=1) < FlipThreshold) | (areas <= 0.0)
+    valid &= np.bincount(owner[folded], minlength=len(source)) == 0
+
+    source, target, removed = source[valid], target[valid], removed[valid]
+    point = np.concatenate((positions[target], np.ones((len(target), 1))), axis=1)
+    error = np.einsum('ni,nij,nj->n', point, quadrics[source] + quadrics[target], point)
+    order = np.argsort(error, kind='stable')
+    return source[order], target[order], removed[order], (neighbours, starts)
+
+
+def independentCollapses(source, target, table, count):
+    """Keeps collapses, cheapest first, whose one-ring regions do not overlap any other kept collapse"""
+    neighbours, starts = table
+    owner, slot = expand(starts, source)
+    region = np.concatenate((source, neighbours[slot]))
+    rank = np.concatenate((np.arange(len(source)), owner))
+    ## undecided 0, kept 1, dropped -1; every round keeps the cheapest undecided collapse of each free region
+    state = np.zeros(len(source), dtype=np.int8)
+    while True:
+        live = state[rank] == 0
+        if not live.any():
+            break
+        best = np.full(count, len(source))
+        np.minimum.at(best, region[live], rank[live])
+        blocked = np.bincount(rank[live][best[region[live]] != rank[live]], minlength=len(source))
+        kept = (state == 0) & (blocked == 0)
+        state[kept] = 1
+        taken = np.zeros(count, dtype=bool)
+        taken[region[kept[rank]]] = True
+        touched = np.bincount(rank[taken[region]], minlength=len(source)) > 0
+        state[(state == 0) & touched] = -1
+    return state == 1
+
+
+def retarget(vertices, normals, texcoords, welded, render, source, target):
+    """Move render corners at collapsed positions to the best matching render vertex of the target"""
+    remap = np.full(welded.max() + 1, -1)
+    remap[source] = target
+    corners = np.flatnonzero(remap[welded[render]] >= 0)
+    if len(corners) == 0:
+        return render
+    old = render.ravel()[corners]
+
+    ## candidates are the render vertices sharing the target position
+    candidates, starts = adjacency(welded, np.arange(len(welded)), len(remap))
+    owner, slot = expand(starts, remap[welded[old]])
+    choice = candidates[slot]
+    score = (normals[old[owner]] * normals[choice]).sum(axis=1) - np.abs(texcoords[old[owner]] - texcoords[choice]).sum(axis=1)
+    order = np.lexsort((-score, owner))
+    firsts = order[np.searchsorted(owner[order], np.arange(len(corners)))]
+    render = render.copy()
+    render.ravel()[corners] = choice[firsts]
+    return render
+
+
+def simplify(vertices, normals, texcoords, render, materials, target, positions=None, welded=None, quadrics=None):
+    """Collapse edges until at most target triangles remain, returns render triangles, their materials and the quadrics"""
+    if positions is None:
+        positions, welded = weldPositions(vertices)
+    if quadrics is None:
+        quadrics = initialQuadrics(positions, welded[render], materials)
+    quadrics = quadrics.copy()
+
+    while len(render) > target:
+        faces = welded[render]
+        source, target_, removed, table = collapseCandidates(positions, faces, materials, quadrics)
+        if len(source) == 0:
+            break
+
+        ## cheapest independent collapses first, as many as the remaining triangles need
+        need = len(render) - target
+        keep = independentCollapses(source, target_, table, len(positions))
+        source, target_, removed = source[keep], target_[keep], removed[keep]
+        last = max(1, np.searchsorted(np.cumsum(removed), need, side='right'))
+        source, target_ = source[:last], target_[:last]
+
+        np.add.at(quadrics, target_, quadrics[source])
+        render = retarget(vertices, normals, texcoords, welded, render, source, target_)
+
+        ## drop the faces that lost an edge
+        faces = welded[render]
+        alive = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+        render, materials = render[alive], materials[alive]
+
+    return render, materials, quadrics
+
+
+def buildLods(mesh, ratios=None):
+    """Returns the concatenated index buffer of every level of detail and per level material ranges"""
+    if ratios is None:
+        ratios = LodRatios
+    names = mesh['names']
+    indices = np.asarray(mesh['indices'], dtype=np.int64)
+    render = indices.reshape(-1, 3)
+    materials = np.zeros(len(render), dtype=np.int64)
+    for number, name in enumerate(names):
+        first, last = mesh['ranges'][name]
+        materials[first // 3:last // 3] = number
+
+    vertices = np.asarray(mesh['vertices'], dtype=np.float64)
+    normals = np.asarray(mesh['normals'], dtype=np.float64)
+    texcoords = np.asarray(mesh['texcoords'], dtype=np.float64)
+    positions, welded = weldPositions(vertices)
+    quadrics = initialQuadrics(positions, welded[render], materials) if len(render) > 0 else None
+
+    levels = []
+    ranges = []
+    offset = 0
+    total = len(render)
+    for ratio in ratios:
+        count = len(render)
+        ## each level continues from the quadrics the previous one accumulated
+        render, materials, quadrics = simplify(vertices, normals, texcoords, render, materials, int(total * ratio),
+                                     positions=positions, welded=welded, quadrics=quadrics)
+        ## stop once a level is not noticeably smaller than the previous one
+        if len(render) > 0.9 * count:
+            break
+        order = np.argsort(materials, kind='stable')
+        render, materials = render[order], materials[order]
+        ends = np.searchsorted(materials, np.arange(len(names)), side='right') * 3
+        starts = np.concatenate(([0], ends[:-1]))
+        ranges.append({name: [int(offset + a), int(offset + b)] for name, a, b in zip(names, starts, ends)})
+        levels.append(render.ravel())
+        offset += render.size
+
+    dtype = np.asarray(mesh['indices']).dtype
+    if len(levels) == 0:
+        return np.zeros(0, dtype=dtype), []
+    return np.concatenate(levels).astype(dtype), ranges
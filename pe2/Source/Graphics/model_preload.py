@@ -0,0 +1,152 @@
+import os
+import sys
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from Source.Graphics.obj_polyhedron import loadGeometry
+from Source.Graphics.obj_stream import StreamingBytes
+from Source.Graphics import mesh_cache
+
+## arrays handed over through shared memory, everything else is small enough to pickle
+SharedArrays = ['vertices', 'normals', 'texcoords', 'indices', 'lodIndices']
+
+
+def createBlock(size):
+    """Returns a new shared memory block the creating process does not unlink when it exits"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    if os.name == 'posix':
+        ## the tracker registered the POSIX name, the public name drops its leading slash
+        resource_tracker.unregister('/' + block.name, 'shared_memory')
+    return block
+
+
+def preloadModel(directory, name, scale, cache, lod=False):
+    """Parse a model in a worker process and leave its arrays in shared memory blocks"""
+    geometry = loadGeometry(name + '.obj', name + '.mtl', scale, cache=cache, directory=directory, lod=lod)
+    blocks = {}
+    for key in SharedArrays:
+        array = np.ascontiguousarray(geometry[key])
+        ## the main process owns the block from now on, worker exit must not unlink it
+        block = createBlock(max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[...] = array
+        del view
+        blocks[key] = (block.name, array.shape, array.dtype.str)
+        block.close()
+    return {
+        'blocks': blocks,
+        'names': geometry['names'],
+        'ranges': geometry['ranges'],
+        'materials': geometry['materials'],
+        'lods': geometry['lods']}
+
+
+class ModelPreloader(QObject):
+    """Parses every model of a directory in parallel worker processes"""
+
+    ## done, total, name of the last model
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal()
+
+    ## emitted by the executor thread, delivered on the thread owning the preloader
+    loaded = pyqtSignal(str, object)
+
+    def __init__(self, directory, names, **kwargs):
+        """Initialize preloader"""
+        super(ModelPreloader, self).__init__()
+        self._directory = directory
+        ## models too large to parse in memory are streamed when opened instead
+        self._names = [name for name in names if os.path.getsize(directory + name + '.obj') < StreamingBytes]
+        self._scale = kwargs.get("scale", 0.15)
+        self._lod = kwargs.get("lod", False)
+        self._workers = kwargs.get("workers", os.cpu_count())
+        self._executor = None
+        self._geometry = {}
+        self._blocks = []
+        ## futures by model name, and the models whose result was attached or freed already
+        self._futures = {}
+        self._handled = set()
+        self._done = 0
+        self._released = False
+        self.loaded.connect(self.attach)
+
+
+    def start(self):
+        """Submit every model to the process pool"""
+        if self._executor is not None or len(self._names) == 0:
+            return
+        ## spawn, forking a process running Qt threads is not safe
+        self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context('spawn'))
+        for name in self._names:
+            future = self._executor.submit(preloadModel, self._directory, name, self._scale, mesh_cache.defaultCache, self._lod)
+            future.add_done_callback(lambda f, name=name: self.loaded.emit(name, f))
+            self._futures[name] = future
+        self.progress.emit(0, len(self._names), "")
+
+
+    def attach(self, name, future):
+        """Wrap the shared memory blocks of a finished model"""
+        ## release frees the blocks of models it waited for, before their signal arrives
+        if name in self._handled:
+            return
+        self._handled.add(name)
+        self._done += 1
+        if future.cancelled():
+            pass
+        elif future.exception() is not None:
+            print("Failed to preload model {}: {}".format(name, future.exception()))
+        else:
+            result = future.result()
+            if self._released:
+                for block_name, _, _ in result['blocks'].values():
+                    shared_memory.SharedMemory(name=block_name).unlink()
+                return
+            geometry = {key: result[key] for key in ('names', 'ranges', 'materials', 'lods')}
+            for key, (block_name, shape, dtype) in result['blocks'].items():
+                block = shared_memory.SharedMemory(name=block_name)
+                self._blocks.append(block)
+                geometry[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            self._geometry[name] = geometry
+        self.progress.emit(self._done, len(self._names), name)
+        if self._done == len(self._names):
+            self._executor.shutdown(wait=False)
+            self.finished.emit()
+
+
+    def isFinished(self):
+        """Returns true once every model has been preloaded or failed"""
+        return self._done == len(self._names)
+
+
+    def geometry(self, name):
+        """Returns the preloaded geometry of a model, None if not ready"""
+        return self._geometry.get(name, None)
+
+
+    def release(self):
+        """Stop pending work and free the shared memory blocks, those of models still running included"""
+        self._released = True
+        if self._executor is not None:
+            ## models already running finish, their signal never arrives once the application closes
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            for name, future in self._futures.items():
+                if name in self._handled or future.cancelled() or future.exception() is not None:
+                    continue
+                self._handled.add(name)
+                for block_name, _, _ in future.result()['blocks'].values():
+                    shared_memory.SharedMemory(name=block_name).unlink()
+            self._futures = {}
+        self._geometry.clear()
+        for block in self._blocks:
+            block.unlink()
+            try:
+                block.close()
+            except BufferError:
+                ## arrays still referenced by live actors keep the mapping alive
+                pass
+        self._blocks = []
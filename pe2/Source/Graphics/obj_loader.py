@@ -0,0 +1,281 @@
+import numpy as np
+
+## ascii codes used to classify records
+NEWLINE, SPACE, TAB, RETURN, SLASH = 10, 32, 9, 13, 47
+
+
+class Records:
+    """Byte level view of an OBJ file grouped by record type"""
+
+    Kinds = ['v', 'vt', 'vn', 'f', 'usemtl']
+
+    def __init__(self, data):
+        self.data = data
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        self.buffer = buffer
+        newlines = np.flatnonzero(buffer == NEWLINE)
+        self.starts = np.concatenate(([0], newlines + 1))
+        self.ends = np.concatenate((newlines, [len(buffer)]))
+
+        ## first bytes of every line, padded for short lines
+        padded = np.concatenate((buffer, np.full(len(b'usemtl'), NEWLINE, dtype=np.uint8)))
+        first = padded[self.starts]
+        second = padded[self.starts + 1]
+        blank = (second == SPACE) | (second == TAB)
+        self.vertex = (first == ord('v')) & blank
+        self.texture = (first == ord('v')) & (second == ord('t'))
+        self.normal = (first == ord('v')) & (second == ord('n'))
+        self.face = (first == ord('f')) & blank
+        self.material = np.zeros(len(self.starts), dtype=bool)
+        candidates = np.flatnonzero(first == ord('u'))
+        keyword = np.frombuffer(b'usemtl', dtype=np.uint8)
+        self.material[candidates] = (padded[self.starts[candidates, None] + np.arange(len(keyword))] == keyword).all(axis=1)
+
+
+    def line(self, index):
+        """Returns the bytes of a single line"""
+        return self.data[self.starts[index]:self.ends[index]]
+
+
+    def runs(self):
+        """Yields (kind, first line, last line) for every run of records of the same type"""
+        kind = np.zeros(len(self.starts), dtype=np.int8)
+        for code, lines in enumerate((self.vertex, self.texture, self.normal, self.face, self.material)):
+            kind[lines] = code + 1
+        changes = np.flatnonzero(np.diff(kind)) + 1
+        firsts = np.concatenate(([0], changes))
+        lasts = np.concatenate((changes, [len(kind)])) - 1
+        for first, last in zip(firsts, lasts):
+            if kind[first] > 0:
+                yield Records.Kinds[kind[first] - 1], first, last
+
+
+    def block(self, first, last):
+        """Returns the bytes of a run of lines"""
+        return self.data[self.starts[first]:self.ends[last]]
+
+
+    def blankedBlock(self, first, last, width):
+        """Returns a copy of a run of lines with the first width bytes of every line blanked"""
+        start, end = self.starts[first], self.ends[last]
+        ## fromstring drops the last number of an array unless a separator follows it
+        block = np.full(end - start + 1, SPACE, dtype=np.uint8)
+        block[:-1] = self.buffer[start:end]
+        block[self.starts[first:last + 1, None] - start + np.arange(width)] = SPACE
+        return block
+
+
+    def floats(self, first, last, keyword, width):
+        """Parse a run of records into one (n, width) array"""
+        count = last - first + 1
+        ## blank the keywords in place, one copy instead of a replaced bytes object
+        block = self.blankedBlock(first, last, len(keyword) - 1)
+        block.setflags(write=False)
+        values = np.fromstring(block, dtype=np.float64, sep=' ')
+        if values.size % count:
+            raise ValueError("OBJ records with a varying number of components")
+        return values.reshape(count, -1)[:, :width]
+
+
+    def cornerCounts(self, first, last):
+        """Returns the number of corners of each face in a run"""
+        ## count whitespace separated corners on every face line
+        buffer = self.buffer[self.starts[first]:self.ends[last]]
+        space = (buffer == SPACE) | (buffer == TAB) | (buffer == RETURN)
+        tokens = np.zeros(len(buffer), dtype=np.int32)
+        tokens[1:] = space[:-1] & ~space[1:] & (buffer[1:] != NEWLINE)
+        lines = np.concatenate(([0], np.flatnonzero(buffer == NEWLINE) + 1))
+        return np.add.reduceat(tokens, lines)
+
+
+    def faces(self, first, last):
+        """Returns corner indices and the number of corners of each face in a run"""
+        counts = self.cornerCounts(first, last)
+
+        ## layout of the first corner: v, v/vt, v/vt/vn or v//vn
+        corner = self.line(first).split()[1]
+        width = corner.count(b'/') + 1
+        layout = [0, 2] if b'//' in corner else list(range(width))
+        ## blank the keywords and slashes in one copy of the block
+        numbers = self.blankedBlock(first, last, 1)
+        numbers[numbers == SLASH] = SPACE
+        numbers.setflags(write=False)
+        indices = np.fromstring(numbers, dtype=np.int64, sep=' ')
+        if indices.size != counts.sum() * len(layout):
+            raise ValueError("OBJ faces mix different v/vt/vn layouts")
+
+        ## unused slots are stored as 0, which resolves to 'missing'
+        corners = np.zeros((counts.sum(), 3), dtype=np.int64)
+        corners[:, layout] = indices.reshape(-1, len(layout))
+        return corners, counts
+
+
+def resolveIndices(indices, defined):
+    """Turn 1-based and negative OBJ references into 0-based indices, -1 if missing"""
+    return np.where(indices < 0, defined + indices, indices - 1)
+
+
+def streamRecords(data, scale=1.0, defined=None):
+    """Yields OBJ records in file order, one array per run of records of the same type"""
+    records = Records(data)
+    ## counts of v, vt and vn records before data, updated in place
+    if defined is None:
+        defined = [0, 0, 0]
+    for kind, first, last in records.runs():
+        if kind == 'v':
+            defined[0] += last - first + 1
+            yield kind, records.floats(first, last, b'v ', 3) * scale
+        elif kind == 'vt':
+            defined[1] += last - first + 1
+            yield kind, records.floats(first, last, b'vt ', 2)
+        elif kind == 'vn':
+            defined[2] += last - first + 1
+            yield kind, records.floats(first, last, b'vn ', 3)
+        elif kind == 'f':
+            ## relative indices count back from the records defined so far
+            corners, counts = records.faces(first, last)
+            for column in range(3):
+                corners[:, column] = resolveIndices(corners[:, column], defined[column])
+            yield kind, corners, counts
+        else:
+            for line in range(first, last + 1):
+                yield kind, records.line(line).split()[1].decode()
+
+
+def fanTriangles(counts):
+    """Returns corner offsets of a fan triangulation for each face"""
+    offsets = np.cumsum(counts) - counts
+    ntris = counts - 2
+    face = np.repeat(np.arange(len(counts)), ntris)
+    first = np.cumsum(ntris) - ntris
+    fan = np.arange(len(face)) - first[face] + 1
+    base = offsets[face]
+    return np.stack((base, base + fan, base + fan + 1), axis=1)
+
+
+def faceNormals(positions):
+    """Returns flat per-corner normals for an expanded triangle list"""
+    tris = positions.reshape(-1, 3, 3)
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = normals / np.where(length > 0.0, length, 1.0)
+    return np.repeat(normals, 3, axis=0)
+
+
+def concatenate(arrays, width):
+    """Concatenate a list of (n, width) arrays, possibly empty"""
+    if len(arrays) == 0:
+        return np.zeros((0, width))
+    return np.concatenate(arrays)
+
+
+def assembleObj(stream):
+    """Build indexed, material sorted vertex arrays from a stream of triangulated records"""
+    attributes = {'v': [], 'vt': [], 'vn': []}
+    groups = {None: []}
+    current = None
+    for record in stream:
+        if record[0] == 'usemtl':
+            current = record[1]
+            groups.setdefault(current, [])
+        elif record[0] == 'f':
+            groups[current].append(record[1])
+        else:
+            attributes[record[0]].append(record[1])
+    positions = concatenate(attributes['v'], 3)
+    texcoords = concatenate(attributes['vt'], 2)
+    normals = concatenate(attributes['vn'], 3)
+
+    ## triangles are grouped by material in first-use order
+    names = list(groups.keys())
+    sizes = [sum(len(triangles) for triangles in groups[name]) * 3 for name in names]
+    ends = np.cumsum(sizes)
+    ranges = {name: [int(end - size), int(end)] for name, size, end in zip(names, sizes, ends)}
+    triangles = [triangles for name in names for triangles in groups[name]]
+    expanded = concatenate(triangles, 3).reshape(-1, 3).astype(np.int64)
+
+    ## corners without a normal get a flat face normal, shared by coplanar faces
+    flat = len(normals) == 0 or (expanded[:, 2] < 0).any()
+    keys = expanded.copy()
+    if flat:
+        flatNormals = faceNormals(positions[expanded[:, 0]])
+        if len(keys) > 0:
+            keys[:, 2] = -2 - np.unique(flatNormals, axis=0, return_inverse=True)[1].ravel()
+    unique, indices = uniqueCorners(keys)
+    corners = expanded[unique]
+
+    ## gather attributes of the unique corners with fancy indexing
+    vertices = positions[corners[:, 0]]
+    if flat:
+        vertexNormals = flatNormals[unique]
+    else:
+        vertexNormals = normals[corners[:, 2]]
+    vertexTexCoords = np.zeros((len(vertices), 2))
+    if len(texcoords) > 0:
+        present = corners[:, 1] >= 0
+        vertexTexCoords[present] = texcoords[corners[present, 1]]
+
+    return {
+        'vertices': vertices.astype(np.float32),
+        'normals': vertexNormals.astype(np.float32),
+        'texcoords': vertexTexCoords.astype(np.float32),
+        'indices': indices.astype(np.uint16 if len(vertices) <= 0xFFFF else np.uint32),
+        'names': names,
+        'ranges': ranges}
+
+
+def uniqueCorners(keys):
+    """Returns the unique (v, vt, vn) rows in first-use order and the index of every row"""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ## one integer per row sorts far faster than structured rows, when the ranges fit in 63 bits
+    low = keys.min(axis=0)
+    span = keys.max(axis=0) - low + 1
+    if int(span[0]) * int(span[1]) * int(span[2]) < 2 ** 63:
+        triples = ((keys[:, 0] - low[0]) * span[1] + (keys[:, 1] - low[1])) * span[2] + (keys[:, 2] - low[2])
+    else:
+        triples = np.ascontiguousarray(keys).view([('v', keys.dtype), ('vt', keys.dtype), ('vn', keys.dtype)]).ravel()
+    _, first, inverse = np.unique(triples, return_index=True, return_inverse=True)
+
+    ## renumber so vertices appear in the order they are first drawn
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return first[order], rank[inverse.ravel()]
+
+
+def expandMesh(mesh):
+    """Returns a copy of an indexed mesh with one vertex per triangle corner"""
+    expanded = dict(mesh)
+    for name in ('vertices', 'normals', 'texcoords'):
+        expanded[name] = mesh[name][mesh['indices']]
+    expanded['indices'] = None
+    return expanded
+
+
+def bufferBytes(mesh):
+    """Returns the vertex and index buffer bytes of a mesh drawn expanded and drawn indexed"""
+    ## position, normal and texture coordinate floats per vertex
+    expanded = 4 * 8 * len(mesh['indices'])
+    indexed = 4 * 8 * len(mesh['vertices']) + mesh['indices'].nbytes
+    return expanded, indexed
+
+
+def parseMtl(data):
+    """Parse MTL bytes into a table of plain material properties"""
+    materials = {}
+    current = None
+    for line in data.splitlines():
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        key = fields[0].decode()
+        if key == 'newmtl':
+            current = materials[fields[1].decode()] = {}
+        elif current is not None and key in ('Ka', 'Kd', 'Ks', 'Ke'):
+            current[key] = [float(value) for value in fields[1:4]]
+        elif current is not None and key in ('Ns', 'Ni', 'd'):
+            current[key] = float(fields[1])
+        elif current is not None and key == 'illum':
+            current[key] = int(fields[1])
+    return materials
@@ -1,6 +1,6 @@
 import os
 import sys
-from shutil import copyfile
+import ctypes
 from PyQt5.QtGui import QVector3D
 from PIL import Image
 sys.path.append('../..')
@@ -8,11 +8,17 @@ import math
 import numpy as np
 from Source.Graphics.Material import Material
 from triangulate_obj_faces import processFace
+from Source.Graphics.obj_loader import assembleObj, bufferBytes, expandMesh, parseMtl
+from Source.Graphics.mesh_simplify import buildLods
+from Source.Graphics.obj_stream import ObjStream, StreamingBytes
+from Source.Graphics.Camera import Camera
+from Source.Graphics import mesh_cache
 from OpenGL import GL
 # from OpenGL.GL import *
 # from OpenGL.GLUT import *
 # from OpenGL.GLU import *
 from Source.Graphics.Actor import Actor
+from Source.Graphics.Shaders import Shaders
 
 # def read_texture(filename):
 #     glutInit()
@@ -35,8 +41,51 @@ from Source.Graphics.Actor import Actor
 #     return texture_id
 
 
+def loadGeometry(obj_file, mtl_file, scale, cache=None, directory='obj-models/buildings/', streaming=None, lod=False):
+    """Read, triangulate and parse a model without touching OpenGL, safe to run on a worker thread"""
+    fin_path = directory
+    with open(fin_path + mtl_file, 'rb') as file:
+        mtl_data = file.read()
+    if cache is None:
+        cache = mesh_cache.defaultCache
+    #
+    # Parses very large models window by window into files, only their upload is left
+    #
+    if streaming is None:
+        streaming = os.path.getsize(fin_path + obj_file) >= StreamingBytes
+    if streaming:
+        ## attribute files go next to the cache, on disk
+        stream = ObjStream(fin_path + obj_file, scale, directory=cache.path)
+        return {'stream': stream.scan().parse(), 'materials': parseMtl(mtl_data)}
+    #
+    # Looks the model up in the mesh cache first
+    #
+    with open(fin_path + obj_file, 'rb') as file:
+        obj_data = file.read()
+    key = cache.key(obj_data, mtl_data, scale, lod)
+    geometry = cache.load(key)
+    if geometry is None:
+        #
+        # Triangulates and parses the obj geometry in a single pass
+        #
+        geometry = assembleObj(processFace(obj_data, scale))
+        geometry['materials'] = parseMtl(mtl_data)
+        #
+        # Simplifies coarser levels only for models that ask for them, a full mesh loads without the wait
+        #
+        if lod:
+            geometry['lodIndices'], geometry['lods'] = buildLods(geometry)
+        else:
+            geometry['lodIndices'], geometry['lods'] = np.zeros(0, dtype=geometry['indices'].dtype), []
+        cache.store(key, geometry)
+    return geometry
+
+
 class Obj_Polyhedron(Actor):
 
+    ## smallest projected radius, as a fraction of half the viewport height, of each coarser level
+    LodScreenSizes = [0.25, 0.12, 0.06]
+
     ## initialization
     def __init__(self, renderer, filename, **kwargs):
         """Initialize actor."""
@@ -49,156 +98,212 @@ class Obj_Polyhedron(Actor):
         self._obj_file = filename + '.obj'
         self._mtl_file = filename + '.mtl'
         self._scale = 0.15 # obj file is too large
+        self._indexed = kwargs.get("indexed", True)
+        self._lod = kwargs.get("lod", False)
+        self._level = 0
         self.setPickFactor(1.10)
         self._vertices = None
         self._normals = None
         self._faces = None
+        self._geometry = kwargs.get("geometry", None)
+        self._streaming = kwargs.get("streaming", None)
+        self._stream = None
+        self._bufferBytes = None
+        self._materialTables = []
 
         ## create actor
         self.initialize()
 
     def generateGeometry(self):
-        # Init local variables
-        obj_file = 'temp.obj'
-        mtl_file = 'temp.mtl'
-        fout_path = 'Source/Graphics/'
-        fin_path = 'obj-models/buildings/'
-        vertices = []
-        faces = {}
-        indices = []
-        normals = []
-        names = []
-        textures = []
-        ranges = {}
-        materials = {None: Material()}
-        #
-        # Prepares files for I/O
+        if self._geometry is None:
+            self._geometry = loadGeometry(self._obj_file, self._mtl_file, self._scale, streaming=self._streaming, lod=self._lod)
+        geometry = self._geometry
+        self._geometry = None
+        if 'stream' in geometry:
+            self.generateStreamedGeometry(geometry)
+            return
         #
-        if (not os.path.exists(fout_path + obj_file)):
-            os.mknod(fout_path + obj_file)
-        if (os.path.exists(fout_path + mtl_file)):
-            os.remove(fout_path + mtl_file)
-        open(fout_path + obj_file, 'w').close() #erases content
-        copyfile(fin_path + self._mtl_file, fout_path + mtl_file) #copy whole file
+        # Draws indexed unless sharing vertices does not shrink the buffers
         #
-        # Gets mtl information from file
-        #
-        with open(fout_path + mtl_file, 'r') as file:
-            f = file.readlines()
-            i = 0
-            while (i < len(f)):
-                line = f[i].split()
-                i+=1
-                if(len(line) < 1): continue
-                if (line[0] == 'newmtl'):
-                    name = line[1]
-                    ns = ka = kd = ks = ke = ni = d = illum = None
-                    while (i < len(f)):
-                        line = f[i].split()
-                        if(len(line) < 1): break
-                        if (line[0] == 'Ns'):
-                            ns = float(line[1])
-                        elif (line[0] == 'Ka'):
-                            ka = QVector3D(float(line[1]), float(line[2]), float(line[3]))
-                        elif (line[0] == 'Kd'):
-                            kd = QVector3D(float(line[1]), float(line[2]), float(line[3]))
-                        elif (line[0] == 'Ks'):
-                            ks = QVector3D(float(line[1]), float(line[2]), float(line[3]))
-                        elif (line[0] == 'Ke'):
-                            ke = QVector3D(float(line[1]), float(line[2]), float(line[3]))
-                        elif (line[0] == 'Ni'):
-                            ni = float(line[1])
-                        elif (line[0] == 'd'):
-                            d = float(line[1])
-                        elif (line[0] == 'illum'):
-                            illum = int(line[1])
-                        else:
-                            break
-                        i += 1
-                    materials[name] = Material(emission=ke,
-                                               ambient=ka,
-                                               diffuse=kd,
-                                               specular=ks,
-                                               shininess=16)
-        #
-        # Gets obj geometry from file
-        #
-        processFace(fin_path + self._obj_file, fout_path + obj_file, self._scale)
-        with open(fout_path + obj_file, "r") as f:
-            curr_name = None
-            min_max = [0,0]
-            maxi = 0
-            aux_all = []
-            for line in f:
-                data = line.split()
-                if len(data) < 1:
-                    pass
-                elif data[0] == "f":
-                    maxi += 3
-                    a = data[1]
-                    a = a.split('/')
-                    b = data[2]
-                    b = b.split('/')
-                    c = data[3]
-                    c = c.split('/')
-                    aux = [a[0], a[1], a[2], 
-                            b[0], b[1], b[2],
-                            c[0], c[1], c[2]]
-                    aux_all.append([int(el) for el in aux])
-                elif data[0] == "v":
-                    vertices.append([data[1], data[2], data[3]])
-                elif data[0] == "vt":
-                    textures.append([data[1], data[2]])
-                elif data[0] == "vn":
-                    normals.append([[data[1], data[2], data[3]]])
-                elif data[0] == "vp":
-                    continue
-                elif data[0] == "l":
-                    print ("l not implemented")
-                elif data[0] == "usemtl":
-                    a = min_max[1]
-                    b = maxi
-                    names.append(curr_name)
-                    ranges[curr_name] = [a, b]
-                    faces[curr_name] = aux_all
-                    min_max = [a,b]
-                    aux_all = []
-                    curr_name = data[1]
-        #
-        # Creates the object properties
-        #
-        v_aux = []
-        n_aux = []
-        for m in names:
-            for j  in range(len(faces[m])):
-                for i in range(3):
-                    v_aux.append(vertices[faces[m][j][3*i] - 1])
-                    n_aux.append(normals[faces[m][j][3*i + 2] - 1])
-        self._vertices = np.array(v_aux, dtype="float32")
-        self._normals = np.array(n_aux, dtype="float32")
-        self._materials = materials
+        self._bufferBytes = bufferBytes(geometry)
+        expanded, indexed = self._bufferBytes
+        levels = geometry.get('lods', []) if self._lod else []
+        if not self._indexed or (indexed >= expanded and len(levels) == 0):
+            geometry = expandMesh(geometry)
+            levels = []
+        self._vertices = geometry['vertices']
+        self._normals = geometry['normals']
+        self._materials = self.createMaterials(geometry['materials'])
         self._num_vertices = len(self._vertices)
         self._num_normals = len(self._normals)
-        self._names = names
-        self._texCoords = np.array(textures, dtype="float32")
-        self._ranges = ranges
+        self._names = geometry['names']
+        self._texCoords = geometry['texcoords']
+        self._ranges = geometry['ranges']
+        self._indices = geometry['indices']
+        #
+        # Coarser levels follow the full mesh in the index buffer
+        #
+        self._levels = [self._ranges]
+        if len(levels) > 0:
+            offset = len(self._indices)
+            self._levels += [{m: [offset + a, offset + b] for m, (a, b) in level.items()} for level in levels]
+            self._indices = np.concatenate((self._indices, geometry['lodIndices'])).astype(self._indices.dtype)
+        self._center = QVector3D(*((self._vertices.min(axis=0) + self._vertices.max(axis=0)) / 2.0)) if self._num_vertices > 0 else QVector3D()
+        self._radius = float(np.linalg.norm(self._vertices - np.array([self._center.x(), self._center.y(), self._center.z()]), axis=1).max()) if self._num_vertices > 0 else 0.0
+
+    def generateStreamedGeometry(self, geometry):
+        """Size the buffers of a streamed model, the parsed vertices are read while uploading"""
+        stream = geometry['stream']
+        self._stream = stream
+        self._materials = self.createMaterials(geometry['materials'])
+        self._vertices = stream.vertexCount
+        self._normals = True
+        self._texCoords = True
+        self._num_vertices = stream.vertexCount
+        self._num_normals = stream.vertexCount
+        self._names = stream.names
+        self._ranges = stream.ranges
+        self._indices = None
+        self._levels = [self._ranges]
+        self._center = QVector3D()
+        self._radius = 0.0
+
+    def bufferBytes(self):
+        """Returns the buffer bytes of the model drawn expanded and drawn indexed, None when streamed"""
+        return self._bufferBytes
+
+    def createMaterials(self, table):
+        """Returns the materials of an MTL table, plus the default material"""
+        materials = {None: Material()}
+        for name, properties in table.items():
+            materials[name] = Material(emission=self.color(properties, 'Ke'),
+                                       ambient=self.color(properties, 'Ka'),
+                                       diffuse=self.color(properties, 'Kd'),
+                                       specular=self.color(properties, 'Ks'),
+                                       shininess=16)
+        return materials
+
+    def color(self, properties, key):
+        """Returns a material color from the MTL table, None if not given"""
+        if key not in properties:
+            return None
+        return QVector3D(*properties[key])
 
     def initialize(self):
         if self._vertices is None:
             self.generateGeometry()
 
+        ## draw all materials in one call when they fit the table
+        if len(self._names) <= Shaders.MaterialTableSize:
+            self._solid_shader = self._shader_collection.materialTablePhongShader()
+            self._solid_flat_shader = self._shader_collection.materialTablePhongFlatShader()
+            self._nolight_solid_shader = self._shader_collection.materialTableShader()
+            self._wireframe_shader = self._shader_collection.materialTableShader()
+            self._nolight_wireframe_shader = self._shader_collection.materialTableShader()
+            self._active_shader = self._solid_shader
+            self._materialTables = [self.createMaterialTable(level) for level in self._levels]
+
         ## create object
         self.create(self._vertices, 
                     colors=None,
                     normals=self._normals,
-                    texcoords=self._texCoords)
+                    texcoords=self._texCoords,
+                    indices=self._indices)
+
+        ## stream large models, parsed on the loading thread, into the allocated buffer batch by batch
+        if self._stream is not None:
+            for first, vertices, normals, texcoords in self._stream.uploads():
+                self.updateBuffer(vertices=vertices, normals=normals, texcoords=texcoords, first=first)
+            center, self._radius = self._stream.bounds()
+            self._center = QVector3D(*center)
+            self._stream.close()
+            self._stream = None
+
+
+    def createMaterialTable(self, ranges):
+        """Upload materials and their triangle ranges as a std140 MaterialTable block"""
+        ## header ivec4, then per material four vec4 colors and an ivec4 range
+        table = np.zeros(4 + 20 * Shaders.MaterialTableSize, dtype=np.float32)
+        ints = table.view(np.int32)
+        ints[0] = len(self._names)
+        entries = table[4:].reshape(-1, 20)
+        ## primitive ids restart at the first triangle of the level
+        start = ranges[self._names[0]][0]
+        for i, m in enumerate(self._names):
+            material = self._materials[m]
+            for j, color in enumerate((material.emissionColor, material.ambientColor, material.diffuseColor, material.specularColor)):
+                entries[i, 4 * j:4 * j + 3] = (color.x(), color.y(), color.z())
+            entries[i, 15] = material.shininess
+            entries[i, 16:18].view(np.int32)[:] = [(ranges[m][0] - start) // 3, (ranges[m][1] - start) // 3]
+
+        buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_UNIFORM_BUFFER, buffer)
+        GL.glBufferData(GL.GL_UNIFORM_BUFFER, table.nbytes, table, GL.GL_STATIC_DRAW)
+        GL.glBindBuffer(GL.GL_UNIFORM_BUFFER, 0)
+        return buffer
+
+
+    def selectLevel(self, frame):
+        """Pick the level of detail from the projected size of the bounding sphere, through the frame matrices"""
+        if len(self._levels) == 1:
+            return 0
+        camera = self._scene.camera
+        center = frame[0].map(self._transform.map(self._center))
+        scale = max(self._transform.column(i).toVector3D().length() for i in range(3))
+        radius = self._radius * scale
+        distance = -center.z()
+        if camera.lens == Camera.Lens.Perspective:
+            if distance <= radius:
+                return 0
+            extent = distance * math.tan(math.radians(camera.heightAngle / 2.0))
+        else:
+            extent = camera.height / 2.0
+        return Obj_Polyhedron.levelForSize(radius / max(extent, 1e-6), len(self._levels))
+
+
+    @classmethod
+    def levelForSize(cls, size, levels):
+        """Returns the level of detail for a projected radius relative to half the viewport height"""
+        level = sum(1 for threshold in Obj_Polyhedron.LodScreenSizes if size < threshold)
+        return min(level, levels - 1)
+
+
+    def setUniformBindings(self, wireframe=False):
+        """Sets up uniform shader bindings"""
+        super(Obj_Polyhedron, self).setUniformBindings(wireframe)
+        if len(self._materialTables) > 0:
+            self._active_shader.setUniformValue('emissionOverride', int(self.isHighlighted() or self.isEnabled()))
+            self._active_shader.setUniformValue('materialOverride', int(self._errorHighlight or self._warningHighlight))
+
+
+    def destroy(self):
+        super(Obj_Polyhedron, self).destroy()
+        if len(self._materialTables) > 0:
+            GL.glDeleteBuffers(len(self._materialTables), self._materialTables)
+            self._materialTables = []
 
 
     def render(self):
+        level = self.selectLevel(self._scene.frameMatrices())
+        ranges = self._levels[level]
+        size = 2 if self.indexType == GL.GL_UNSIGNED_SHORT else 4
+        if len(self._materialTables) > 0:
+            GL.glBindBufferBase(GL.GL_UNIFORM_BUFFER, Shaders.MaterialTableBinding, self._materialTables[level])
+            first, last = ranges[self._names[0]][0], ranges[self._names[-1]][1]
+            if self._indices is None:
+                GL.glDrawArrays(GL.GL_TRIANGLES, first, last - first)
+            else:
+                GL.glDrawElements(GL.GL_TRIANGLES, last - first, self.indexType, ctypes.c_void_p(first * size))
+            return
+
         for m in self._names:
             self._active_shader.setUniformValue('material.emission' , self._materials[m].emissionColor )
             self._active_shader.setUniformValue('material.ambient'  , self._materials[m].ambientColor )
             self._active_shader.setUniformValue('material.diffuse'  , self._materials[m].diffuseColor )
             self._active_shader.setUniformValue('material.specular' , self._materials[m].specularColor)
             self._active_shader.setUniformValue('material.shininess', self._materials[m].shininess    )
-            GL.glDrawArrays(GL.GL_TRIANGLES, self._ranges[m][0], self._ranges[m][1] - self._ranges[m][0])
\ No newline at end of file
+            first, last = ranges[m]
+            if self._indices is None:
+                GL.glDrawArrays(GL.GL_TRIANGLES, first, last - first)
+            else:
+                GL.glDrawElements(GL.GL_TRIANGLES, last - first, self.indexType, ctypes.c_void_p(first * size))
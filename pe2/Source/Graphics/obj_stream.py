@@ -0,0 +1,205 @@
+import os
+import mmap
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from Source.Graphics.obj_loader import Records, streamRecords, faceNormals
+from triangulate_obj_faces import triangulate
+
+## OBJ files at least this large are streamed instead of parsed in memory
+StreamingBytes = 256 * 2 ** 20
+
+## bytes of the file parsed at once, parsing takes a few dozen times as much memory
+WindowBytes = 4 * 2 ** 20
+
+## vertices per GPU upload, three float32 vec3 and a vec2 each
+BatchVertices = 2 ** 18
+
+
+def windows(data, size):
+    """Yields (start, end) byte ranges of at most about size bytes that end on a line break"""
+    start = 0
+    while start < len(data):
+        end = min(start + size, len(data))
+        if end < len(data):
+            newline = data.rfind(b'\n', start, end)
+            ## a line longer than the window extends it to the next break
+            if newline < 0:
+                newline = data.find(b'\n', end)
+            end = len(data) if newline < 0 else newline + 1
+        yield start, end
+        start = end
+
+
+def release(data, end):
+    """Drop the mapped pages before end from memory, they are read back if touched again"""
+    end -= end % mmap.PAGESIZE
+    if isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED') and end > 0:
+        data.madvise(mmap.MADV_DONTNEED, 0, end)
+
+
+@contextmanager
+def mapped(path):
+    """Map a whole file read only, pages are loaded on demand"""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+class ObjStream:
+    """Two pass OBJ reader over a memory mapped file with bounded memory use, parsed into disk backed vertex arrays"""
+
+    def __init__(self, path, scale=1.0, window=WindowBytes, directory=None):
+        """Initialize with the directory holding the attribute files while parsing, the model's own when None"""
+        self.path = path
+        self.scale = scale
+        self.window = window
+        ## disk, not a temporary directory that may live in memory, keeps files larger than memory bounded
+        self.directory = directory if directory is not None else os.path.dirname(os.path.abspath(path))
+        self.names = [None]
+        self.ranges = {None: [0, 0]}
+        self.vertexCount = 0
+        self.counts = [0, 0, 0]
+        self.flat = False
+        self.lower = np.full(3, np.inf)
+        self.upper = np.full(3, -np.inf)
+        self._files = None
+        self._arrays = None
+
+
+    def scan(self):
+        """First pass, count records and triangles per material to size the buffers"""
+        triangles = {None: 0}
+        current = None
+        with mapped(self.path) as data:
+            for start, end in windows(data, self.window):
+                records = Records(data[start:end])
+                for kind, first, last in records.runs():
+                    if kind == 'usemtl':
+                        for line in range(first, last + 1):
+                            current = records.line(line).split()[1].decode()
+                            triangles.setdefault(current, 0)
+                    elif kind == 'f':
+                        triangles[current] += int((records.cornerCounts(first, last) - 2).sum())
+                        ## faces of a run share the v/vt/vn layout of the first corner
+                        self.flat |= records.line(first).split(None, 2)[1].count(b'/') != 2
+                    else:
+                        self.counts[Records.Kinds.index(kind)] += last - first + 1
+                release(data, end)
+
+        ## like the in-memory loader, a single face without normals makes the whole model flat
+        self.flat |= self.counts[2] == 0
+
+        ## materials take contiguous vertex ranges in first-use order
+        self.names = list(triangles.keys())
+        end = 0
+        self.ranges = {}
+        for name in self.names:
+            self.ranges[name] = [end, end + 3 * triangles[name]]
+            end += 3 * triangles[name]
+        self.vertexCount = end
+        return self
+
+
+    def batches(self, batch=BatchVertices):
+        """Second pass, yields (first vertex, vertices, normals, texcoords) of at most batch vertices"""
+        cursors = {name: first for name, (first, _) in self.ranges.items()}
+        current = None
+        pending = []
+        size = 0
+        step = max(1, batch // 3)
+        defined = [0, 0, 0]
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix='.obj-stream-', dir=self.directory) as directory:
+            ## attributes live in disk backed arrays, faces may reference any of them
+            attributes = [np.lib.format.open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                                    dtype=np.float64, shape=(max(count, 1), width))
+                          for name, count, width in zip(('v', 'vt', 'vn'), self.counts, (3, 2, 3))]
+            with mapped(self.path) as data:
+                for start, end in windows(data, self.window):
+                    for record in streamRecords(data[start:end], self.scale, defined):
+                        if record[0] == 'usemtl':
+                            if record[1] != current:
+                                yield from self.flush(pending, cursors, current)
+                                current, size = record[1], 0
+                        elif record[0] == 'f':
+                            triangles = triangulate(record[1], record[2], attributes[0])
+                            for offset in range(0, len(triangles), step):
+                                corners = triangles[offset:offset + step].reshape(-1, 3)
+                                if size + len(corners) > batch:
+                                    yield from self.flush(pending, cursors, current)
+                                    size = 0
+                                pending.append(self.expand(corners, attributes))
+                                size += len(corners)
+                        else:
+                            column = ['v', 'vt', 'vn'].index(record[0])
+                            attributes[column][defined[column] - len(record[1]):defined[column]] = record[1]
+                            if column == 0:
+                                self.lower = np.minimum(self.lower, record[1].min(axis=0))
+                                self.upper = np.maximum(self.upper, record[1].max(axis=0))
+                    release(data, end)
+                yield from self.flush(pending, cursors, current)
+            ## close the mappings before the directory is removed
+            del attributes
+
+
+    def parse(self, batch=BatchVertices):
+        """Run the second pass into vertex, normal and texture coordinate files, safe on a worker thread"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = tempfile.TemporaryDirectory(prefix='.obj-stream-', dir=self.directory)
+        self._arrays = [np.lib.format.open_memmap(os.path.join(self._files.name, name + '.npy'), mode='w+',
+                                                  dtype=np.float32, shape=(max(self.vertexCount, 1), width))
+                        for name, width in (('vertices', 3), ('normals', 3), ('texcoords', 2))]
+        for first, *values in self.batches(batch):
+            for array, value in zip(self._arrays, values):
+                array[first:first + len(value)] = value
+        for array in self._arrays:
+            array.flush()
+        return self
+
+
+    def uploads(self, batch=BatchVertices):
+        """Yields (first vertex, vertices, normals, texcoords) slices of the parsed files, read from disk on demand"""
+        for first in range(0, self.vertexCount, batch):
+            yield (first,) + tuple(array[first:first + batch] for array in self._arrays)
+
+
+    def close(self):
+        """Remove the parsed files"""
+        self._arrays = None
+        if self._files is not None:
+            self._files.cleanup()
+            self._files = None
+
+
+    def expand(self, corners, attributes):
+        """Gather the attributes of (n, 3) v/vt/vn corners, with flat normals if any are missing"""
+        positions, texcoords, normals = attributes
+        vertices = positions[corners[:, 0]]
+        vertexNormals = faceNormals(vertices) if self.flat else normals[corners[:, 2]]
+        vertexTexCoords = np.where((corners[:, 1] >= 0)[:, None], texcoords[np.maximum(corners[:, 1], 0)], 0.0)
+        return vertices, vertexNormals, vertexTexCoords
+
+
+    def flush(self, pending, cursors, name):
+        """Yields the pending corners of a material as one upload and advances its cursor"""
+        if len(pending) == 0:
+            return
+        batch = [np.concatenate(arrays).astype(np.float32) for arrays in zip(*pending)]
+        pending.clear()
+        yield cursors[name], batch[0], batch[1], batch[2]
+        cursors[name] += len(batch[0])
+
+
+    def bounds(self):
+        """Returns the center and radius of the bounding box seen by the second pass"""
+        if self.vertexCount == 0 or not np.isfinite(self.lower).all():
+            return np.zeros(3), 0.0
+        center = (self.lower + self.upper) / 2.0
+        return center, float(np.linalg.norm(self.upper - center))
@@ -0,0 +1,151 @@
+import ctypes
+import numpy as np
+from OpenGL import GL
+from PyQt5.QtGui import QOpenGLContext
+
+
+class StreamBuffer:
+    """Buffer rewritten by the CPU every frame, split in slices so the GPU reads one while the next is written"""
+
+    ## frames in flight, one slice is written while the GPU may still read the two before it
+    Slices = 3
+    ## slice offsets are aligned for vertex attributes as well as uniform blocks
+    Alignment = 256
+    ## nanoseconds waited on a fence before flushing again
+    Timeout = 1000000
+
+    def __init__(self, size, slices=Slices, target=GL.GL_ARRAY_BUFFER, persistent=None):
+        """Initialize with the bytes written per frame, persistent mapping is used when None and available"""
+        self._sliceSize = -(-int(size) // StreamBuffer.Alignment) * StreamBuffer.Alignment
+        self._slices = slices
+        self._target = target
+        self._persistent = persistent
+        self._buffer = None
+        self._mapped = None
+        self._fences = [None] * slices
+        self._slice = slices - 1
+        ## frames that found their slice still read by the GPU
+        self.stalls = 0
+
+
+    @staticmethod
+    def hasPersistentMapping():
+        """Returns whether buffer storage can stay mapped while the GPU reads it, OpenGL 4.4 or ARB_buffer_storage"""
+        ## drivers export the entry point whatever the context version, only the context tells
+        context = QOpenGLContext.currentContext()
+        if context is None:
+            return False
+        return tuple(context.format().version()) >= (4, 4) or context.hasExtension(b'GL_ARB_buffer_storage')
+
+
+    @property
+    def sliceSize(self):
+        """Returns the bytes of one slice"""
+        return self._sliceSize
+
+
+    @property
+    def offset(self):
+        """Returns the byte offset of the slice written last"""
+        return self._slice * self._sliceSize
+
+
+    @property
+    def persistent(self):
+        """Returns whether the whole buffer stays mapped"""
+        return self._persistent
+
+
+    def bufferId(self):
+        """Returns the OpenGL name of the buffer"""
+        return self._buffer
+
+
+    def create(self):
+        """Allocate every slice, and map them all once when the storage allows it"""
+        if self._persistent is None:
+            self._persistent = StreamBuffer.hasPersistentMapping()
+        size = self._sliceSize * self._slices
+        ## older PyOpenGL returns a single name, newer an array of one
+        self._buffer = int(np.ravel(GL.glGenBuffers(1))[0])
+        GL.glBindBuffer(self._target, self._buffer)
+        if self._persistent:
+            flags = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+            GL.glBufferStorage(self._target, size, None, flags)
+            self._mapped = self.view(GL.glMapBufferRange(self._target, 0, size, flags), size)
+        else:
+            GL.glBufferData(self._target, size, None, GL.GL_STREAM_DRAW)
+        GL.glBindBuffer(self._target, 0)
+
+
+    @staticmethod
+    def view(pointer, size):
+        """Returns the bytes at a mapped pointer as a numpy array"""
+        address = pointer if isinstance(pointer, int) else ctypes.cast(pointer, ctypes.c_void_p).value
+        return np.frombuffer((ctypes.c_ubyte * size).from_address(address), np.uint8)
+
+
+    def bind(self):
+        """Bind the buffer to its target"""
+        GL.glBindBuffer(self._target, self._buffer)
+
+
+    def release(self):
+        """Unbind the buffer"""
+        GL.glBindBuffer(self._target, 0)
+
+
+    def map(self):
+        """Move to the next slice and return its bytes, waiting only if the GPU still reads it"""
+        self._slice = (self._slice + 1) % self._slices
+        self.waitFence(self._slice)
+        if self._persistent:
+            return self._mapped[self.offset:self.offset + self._sliceSize]
+        ## the fence already guarantees the slice is free, the driver must not synchronize again
+        self.bind()
+        access = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_UNSYNCHRONIZED_BIT | GL.GL_MAP_INVALIDATE_RANGE_BIT
+        return self.view(GL.glMapBufferRange(self._target, self.offset, self._sliceSize, access), self._sliceSize)
+
+
+    def unmap(self):
+        """Finish writing the slice, coherent persistent mappings need nothing"""
+        if not self._persistent:
+            GL.glUnmapBuffer(self._target)
+            self.release()
+
+
+    def fence(self):
+        """Mark the slice written last as read by the commands issued so far"""
+        if self._fences[self._slice] is not None:
+            GL.glDeleteSync(self._fences[self._slice])
+        self._fences[self._slice] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+
+    def waitFence(self, index):
+        """Block until the commands reading a slice are done"""
+        sync = self._fences[index]
+        if sync is None:
+            return
+        status = GL.glClientWaitSync(sync, 0, 0)
+        if status == GL.GL_TIMEOUT_EXPIRED:
+            self.stalls += 1
+            while status == GL.GL_TIMEOUT_EXPIRED:
+                status = GL.glClientWaitSync(sync, GL.GL_SYNC_FLUSH_COMMANDS_BIT, StreamBuffer.Timeout)
+        GL.glDeleteSync(sync)
+        self._fences[index] = None
+
+
+    def destroy(self):
+        """Free the buffer and its fences"""
+        for index, sync in enumerate(self._fences):
+            if sync is not None:
+                GL.glDeleteSync(sync)
+                self._fences[index] = None
+        if self._buffer is not None:
+            if self._persistent:
+                self.bind()
+                GL.glUnmapBuffer(self._target)
+                self.release()
+            GL.glDeleteBuffers(1, [self._buffer])
+            self._buffer = None
+            self._mapped = None
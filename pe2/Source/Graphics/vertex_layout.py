@@ -0,0 +1,121 @@
+import numpy as np
+from OpenGL import GL
+
+
+class VertexLayout:
+    """Encoding of every vertex attribute, and whether the attributes are interleaved or in planar blocks"""
+
+    ## attribute formats
+    Float = 'float'     ## 32 bit floats
+    Half = 'half'       ## 16 bit floats
+    Short = 'short'     ## 16 bit integers spanning the bounding box, positions only
+    Packed = 'packed'   ## 10 signed bits per component in one 32 bit word, unit vectors only
+    UByte = 'ubyte'     ## 8 bit integers spanning [0, 1], colors only
+
+    ## attributes in buffer order with their number of components
+    Attributes = [('position', 3), ('normal', 3), ('color', 3), ('texcoord', 2)]
+
+    def __init__(self, position=Float, normal=Float, color=Float, texcoord=Float, interleaved=True):
+        """Initialize with the format of every attribute"""
+        self.formats = {'position': position, 'normal': normal, 'color': color, 'texcoord': texcoord}
+        self.interleaved = interleaved
+
+
+    def key(self):
+        """Returns a hashable description, equal for layouts that encode meshes identically"""
+        return tuple(self.formats[name] for name, _ in VertexLayout.Attributes) + (self.interleaved,)
+
+
+    @classmethod
+    def compact(cls, interleaved=True):
+        """Returns the smallest layout, 16 bytes per vertex with normals and texture coordinates instead of 32"""
+        return cls(position=cls.Short, normal=cls.Packed, color=cls.UByte, texcoord=cls.Half, interleaved=interleaved)
+
+
+    def attributeFormat(self, name):
+        """Returns the numpy type, stored components, GL type and normalization of an attribute"""
+        components = dict(VertexLayout.Attributes)[name]
+        form = self.formats[name]
+        ## components are padded to whole 32 bit words, extra ones are dropped by the shaders
+        if form == VertexLayout.Half:
+            return np.float16, components + components % 2, GL.GL_HALF_FLOAT, False
+        if form == VertexLayout.Short:
+            return np.int16, components + components % 2, GL.GL_SHORT, True
+        if form == VertexLayout.Packed:
+            return np.uint32, 1, GL.GL_INT_2_10_10_10_REV, True
+        if form == VertexLayout.UByte:
+            return np.uint8, 4, GL.GL_UNSIGNED_BYTE, True
+        return np.float32, components, GL.GL_FLOAT, False
+
+
+    def vertexSize(self, name):
+        """Returns the bytes one vertex takes for an attribute"""
+        dtype, stored, _, _ = self.attributeFormat(name)
+        return np.dtype(dtype).itemsize * stored
+
+
+    def bounds(self, vertices):
+        """Returns the center and half extents positions are quantized against, None for float positions"""
+        if self.formats['position'] != VertexLayout.Short:
+            return None
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        low, high = vertices.min(axis=0), vertices.max(axis=0)
+        ## flat boxes keep a non zero extent so that the dequantization stays invertible
+        return (high + low) / 2.0, np.maximum((high - low) / 2.0, 1e-12)
+
+
+    def encodeAttribute(self, name, values, bounds=None):
+        """Returns the values of an attribute in its stored format, one row per vertex"""
+        dtype, stored, _, _ = self.attributeFormat(name)
+        form = self.formats[name]
+        values = np.asarray(values).reshape(-1, dict(VertexLayout.Attributes)[name])
+        if form == VertexLayout.Short:
+            center, extent = bounds
+            encoded = np.rint(np.clip((values - center) / extent, -1.0, 1.0) * 32767.0)
+        elif form == VertexLayout.Packed:
+            ## x in the low bits, w left at zero
+            bits = np.rint(np.clip(values, -1.0, 1.0) * 511.0).astype(np.int64) & 0x3FF
+            return (bits[:, 0] | (bits[:, 1] << 10) | (bits[:, 2] << 20)).astype(np.uint32).reshape(-1, 1)
+        elif form == VertexLayout.UByte:
+            encoded = np.full((len(values), 4), 255.0)
+            encoded[:, :values.shape[1]] = np.rint(np.clip(values, 0.0, 1.0) * 255.0)
+        else:
+            encoded = values
+        if encoded.shape[1] < stored:
+            encoded = np.concatenate((encoded, np.zeros((len(encoded), stored - encoded.shape[1]))), axis=1)
+        return np.ascontiguousarray(encoded, dtype=dtype)
+
+
+    def pack(self, encoded):
+        """Arrange encoded attributes in one buffer, returns it with (name, GL type, components, normalized, offset, stride) of each"""
+        names = [name for name, _ in VertexLayout.Attributes if name in encoded]
+        count = len(encoded[names[0]])
+        attributes = []
+        if self.interleaved:
+            dtype = np.dtype([(name, encoded[name].dtype, encoded[name].shape[1:]) for name in names])
+            data = np.empty(count, dtype=dtype)
+            for name in names:
+                data[name] = encoded[name]
+            for name in names:
+                _, stored, glType, normalized = self.attributeFormat(name)
+                attributes.append((name, glType, 4 if glType == GL.GL_INT_2_10_10_10_REV else stored, normalized,
+                    dtype.fields[name][1], dtype.itemsize))
+            return data, attributes
+
+        offset = 0
+        for name in names:
+            _, stored, glType, normalized = self.attributeFormat(name)
+            attributes.append((name, glType, 4 if glType == GL.GL_INT_2_10_10_10_REV else stored, normalized,
+                offset, self.vertexSize(name)))
+            offset += encoded[name].nbytes
+        return np.concatenate([encoded[name].view(np.uint8).ravel() for name in names]), attributes
+
+
+    def encode(self, vertices, normals=None, colors=None, texcoords=None, bounds=None):
+        """Returns the buffer contents, the attribute pointers and the quantization bounds of a mesh"""
+        if bounds is None:
+            bounds = self.bounds(vertices)
+        values = {'position': vertices, 'normal': normals, 'color': colors, 'texcoord': texcoords}
+        encoded = {name: self.encodeAttribute(name, value, bounds) for name, value in values.items() if value is not None}
+        data, attributes = self.pack(encoded)
+        return data, attributes, bounds
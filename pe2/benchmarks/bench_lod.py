@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Triangle throughput of a city of OBJ buildings with and without levels of detail."""
+## Run from the pe2 directory: python benchmarks/bench_lod.py [--gl]
+import os
+import sys
+import time
+import math
+import ctypes
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Source.Graphics.obj_polyhedron import Obj_Polyhedron, loadGeometry
+
+MODEL_DIR = 'obj-models/buildings/'
+
+
+def loadModels():
+    """Returns the parsed geometry and level ranges of every building"""
+    models = []
+    for file in sorted(os.listdir(MODEL_DIR)):
+        if not file.endswith('.obj') or not os.path.exists(MODEL_DIR + file[:-4] + '.mtl'):
+            continue
+        try:
+            geometry = loadGeometry(file, file[:-4] + '.mtl', 0.15, lod=True)
+        except ValueError as error:
+            print("skipping {}: {}".format(file, error))
+            continue
+        ## every level as one contiguous (first, count) index range
+        offset = len(geometry['indices'])
+        levels = [(0, offset)] + [(offset + min(a for a, _ in level.values()),
+                                   max(b for _, b in level.values()) - min(a for a, _ in level.values()))
+                                  for level in geometry['lods']]
+        vertices = np.asarray(geometry['vertices'])
+        center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2.0
+        models.append({
+            'name': file[:-4],
+            'vertices': vertices,
+            'indices': np.concatenate((geometry['indices'], geometry['lodIndices'])).astype(np.uint32),
+            'levels': levels,
+            'center': center,
+            'radius': float(np.linalg.norm(vertices - center, axis=1).max())})
+    return models
+
+
+def layoutCity(models, instances, spacing):
+    """Place instances on a square grid, cycling through the models"""
+    columns = int(math.ceil(math.sqrt(instances)))
+    index = np.arange(instances)
+    offsets = np.stack((index % columns, np.zeros(instances), index // columns), axis=1) * spacing
+    offsets -= offsets.mean(axis=0) * np.array([1.0, 0.0, 1.0])
+    return index % len(models), offsets
+
+
+def cameraPath(frames, extent):
+    """Returns (eye, target) pairs of a fly-over from street level across the city"""
+    t = np.linspace(0.0, 1.0, frames)
+    eyes = np.stack((np.full(frames, -extent), 0.8 + 3.0 * t, -extent + 2.0 * extent * t), axis=1)
+    targets = eyes + np.array([1.0, -0.3, 0.4])
+    return eyes, targets
+
+
+def lookAt(eye, target, up=np.array([0.0, 1.0, 0.0])):
+    forward = target - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    up = np.cross(side, forward)
+    view = np.identity(4)
+    view[0, :3], view[1, :3], view[2, :3] = side, up, -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def perspective(fovy, aspect, near, far):
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    projection = np.zeros((4, 4))
+    projection[0, 0], projection[1, 1] = f / aspect, f
+    projection[2, 2], projection[2, 3] = (far + near) / (near - far), 2.0 * far * near / (near - far)
+    projection[3, 2] = -1.0
+    return projection
+
+
+def selectLevels(models, which, offsets, view, fovy):
+    """Returns the level of every instance, using the rule of Obj_Polyhedron.selectLevel"""
+    centers = np.array([models[m]['center'] for m in which]) + offsets
+    radius = np.array([models[m]['radius'] for m in which])
+    counts = np.array([len(models[m]['levels']) for m in which])
+    distance = -(centers @ view[2, :3] + view[2, 3])
+    extent = np.maximum(distance, 1e-6) * math.tan(math.radians(fovy / 2.0))
+    size = np.where(distance <= radius, np.inf, radius / extent)
+    levels = (size[:, None] < np.array(Obj_Polyhedron.LodScreenSizes)[None, :]).sum(axis=1)
+    return np.minimum(levels, counts - 1)
+
+
+def countTriangles(models, which, levels):
+    return sum(models[m]['levels'][level][1] // 3 for m, level in zip(which, levels))
+
+
+VERTEX_SHADER = """
+#version 400
+layout(location = 0) in vec3 position;
+uniform mat4 modelViewProjection;
+void main()
+{
+    gl_Position = modelViewProjection * vec4(position, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 400
+out vec4 fragColor;
+void main()
+{
+    fragColor = vec4(0.8, 0.8, 0.8, 1.0);
+}
+"""
+
+
+def uploadModels(models):
+    """Create one vertex array per model, requires a current OpenGL 4.0 context"""
+    from OpenGL import GL
+    program = GL.glCreateProgram()
+    for kind, source in ((GL.GL_VERTEX_SHADER, VERTEX_SHADER), (GL.GL_FRAGMENT_SHADER, FRAGMENT_SHADER)):
+        shader = GL.glCreateShader(kind)
+        GL.glShaderSource(shader, source)
+        GL.glCompileShader(shader)
+        GL.glAttachShader(program, shader)
+    GL.glLinkProgram(program)
+    for model in models:
+        model['vao'] = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(model['vao'])
+        vbo, ibo = GL.glGenBuffers(2)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vbo)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, model['vertices'].nbytes, model['vertices'].astype(np.float32), GL.GL_STATIC_DRAW)
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+        GL.glEnableVertexAttribArray(0)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, ibo)
+        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, model['indices'].nbytes, model['indices'], GL.GL_STATIC_DRAW)
+    GL.glBindVertexArray(0)
+    return program
+
+
+def renderFrames(models, which, offsets, frames, useLod, program, fovy, aspect, extent):
+    """Draw the city along the camera path, returns seconds per frame and triangles drawn"""
+    from OpenGL import GL
+    location = GL.glGetUniformLocation(program, "modelViewProjection")
+    projection = perspective(fovy, aspect, 0.1, 4.0 * extent)
+    eyes, targets = cameraPath(frames, extent)
+    GL.glUseProgram(program)
+    GL.glEnable(GL.GL_DEPTH_TEST)
+    GL.glFinish()
+    start = time.perf_counter()
+    triangles = 0
+    for eye, target in zip(eyes, targets):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        view = lookAt(eye, target)
+        levels = selectLevels(models, which, offsets, view, fovy) if useLod else np.zeros(len(which), dtype=int)
+        viewProjection = projection @ view
+        for m, offset, level in zip(which, offsets, levels):
+            model = models[m]
+            first, count = model['levels'][level]
+            transform = viewProjection.copy()
+            transform[:, 3] += viewProjection[:, :3] @ offset
+            GL.glUniformMatrix4fv(location, 1, GL.GL_TRUE, transform.astype(np.float32))
+            GL.glBindVertexArray(model['vao'])
+            GL.glDrawElements(GL.GL_TRIANGLES, count, GL.GL_UNSIGNED_INT, ctypes.c_void_p(first * 4))
+            triangles += count // 3
+    GL.glFinish()
+    return (time.perf_counter() - start) / frames, triangles / frames
+
+
+def createContext(width, height):
+    """Create an offscreen OpenGL 4.0 core context with a framebuffer, None if unavailable"""
+    from PyQt5.QtGui import QGuiApplication, QOffscreenSurface, QOpenGLContext, QSurfaceFormat, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)
+    glformat = QSurfaceFormat()
+    glformat.setVersion(4, 0)
+    glformat.setProfile(QSurfaceFormat.CoreProfile)
+    context = QOpenGLContext()
+    context.setFormat(glformat)
+    if not context.create():
+        return None
+    surface = QOffscreenSurface()
+    surface.setFormat(context.format())
+    surface.create()
+    if not context.makeCurrent(surface):
+        return None
+    fboformat = QOpenGLFramebufferObjectFormat()
+    fboformat.setAttachment(QOpenGLFramebufferObject.Depth)
+    framebuffer = QOpenGLFramebufferObject(width, height, fboformat)
+    framebuffer.bind()
+    from OpenGL import GL
+    GL.glViewport(0, 0, width, height)
+    return (app, context, surface, framebuffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=500, help="number of buildings")
+    parser.add_argument("--frames", type=int, default=60, help="frames along the camera path")
+    parser.add_argument("--spacing", type=float, default=1.6, help="distance between buildings")
+    parser.add_argument("--gl", action="store_true", help="also draw the frames in an offscreen OpenGL context")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    start = time.perf_counter()
+    models = loadModels()
+    print("loaded {} models with {} levels in {:.2f}s".format(
+        len(models), sum(len(model['levels']) for model in models), time.perf_counter() - start))
+
+    fovy, aspect = 45.0, 16.0 / 9.0
+    which, offsets = layoutCity(models, args.instances, args.spacing)
+    extent = np.abs(offsets).max() + args.spacing
+    eyes, targets = cameraPath(args.frames, extent)
+    full = countTriangles(models, which, np.zeros(len(which), dtype=int))
+    reduced = np.mean([countTriangles(models, which, selectLevels(models, which, offsets, lookAt(eye, target), fovy))
+                       for eye, target in zip(eyes, targets)])
+    print("{} instances: {} triangles per frame without LOD, {:.0f} with LOD ({:.1%})".format(
+        args.instances, full, reduced, reduced / full))
+
+    if args.gl:
+        if createContext(1280, 720) is None:
+            print("no OpenGL 4.0 context available, skipping draw timings")
+            return
+        program = uploadModels(models)
+        for useLod in (False, True):
+            seconds, triangles = renderFrames(models, which, offsets, args.frames, useLod, program, fovy, aspect, extent)
+            print("{:>8}: {:7.2f} ms/frame, {:9.0f} triangles/frame, {:7.2f} Mtriangles/s".format(
+                "LOD" if useLod else "full", seconds * 1e3, triangles, triangles / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Time every stage of loading the models under obj-models and compare with a stored baseline."""
+## Run from the pe2 directory: python benchmarks/bench_obj_load.py [--baseline FILE] [--save-baseline]
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from triangulate_obj_faces import processFace
+from Source.Graphics.obj_loader import assembleObj, bufferBytes, expandMesh, parseMtl
+from Source.Graphics.mesh_simplify import buildLods
+from Source.Graphics.Actor import Actor
+
+MODEL_DIR = 'obj-models/'
+BASELINE = 'benchmarks/obj_load_baseline.json'
+
+## stages in load order, each takes the results so far and returns its own
+Stages = ['mtl', 'triangulate', 'parse', 'lods', 'expand', 'upload']
+
+
+class StubBuffer:
+    """Stands in for QOpenGLBuffer, copies written bytes into host memory like a driver would"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def allocate(self, size):
+        self.data = bytearray(size)
+
+    def write(self, offset, data, count):
+        self.data[offset:offset + count] = memoryview(data).cast('B')[:count]
+
+    def size(self):
+        return len(self.data)
+
+
+def upload(mesh):
+    """Write a mesh the way Actor.create fills its vertex and index buffers, straight from the arrays"""
+    vbo, ibo = StubBuffer(), StubBuffer()
+    arrays = [Actor.bufferData(mesh[key]) for key in ('vertices', 'normals', 'texcoords')]
+    vbo.allocate(sum(size for _, size in arrays))
+    offset = 0
+    for array, size in arrays:
+        vbo.write(offset, array, size)
+        offset += size
+    if mesh['indices'] is not None:
+        ## Obj_Polyhedron appends the coarser levels to the full mesh
+        indices, size = Actor.bufferData(np.concatenate((mesh['indices'], mesh['lodIndices'])).astype(mesh['indices'].dtype))
+        ibo.allocate(size)
+        ibo.write(0, indices, size)
+    return vbo, ibo
+
+
+def runStage(stage, obj_data, mtl_data, results, scale):
+    """Run one stage on the outputs of the previous ones"""
+    if stage == 'mtl':
+        return parseMtl(mtl_data)
+    if stage == 'triangulate':
+        return list(processFace(obj_data, scale))
+    if stage == 'parse':
+        return assembleObj(iter(results['triangulate']))
+    if stage == 'lods':
+        return buildLods(results['parse'])
+    if stage == 'expand':
+        return expandMesh(results['parse'])
+    mesh = dict(results['parse'])
+    mesh['lodIndices'] = results['lods'][0]
+    return upload(mesh)
+
+
+def outputBytes(value):
+    """Bytes held by the arrays and buffers of a stage result"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, StubBuffer):
+        return value.size()
+    if isinstance(value, dict):
+        return sum(outputBytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(outputBytes(item) for item in value)
+    return 0
+
+
+def measureFile(path, repeat, scale):
+    """Returns per stage median and p95 milliseconds, peak traced bytes and output bytes"""
+    with open(path, 'rb') as file:
+        obj_data = file.read()
+    mtl_path = path[:-4] + '.mtl'
+    mtl_data = b''
+    if os.path.exists(mtl_path):
+        with open(mtl_path, 'rb') as file:
+            mtl_data = file.read()
+
+    times = {stage: [] for stage in Stages}
+    for _ in range(repeat):
+        results = {}
+        for stage in Stages:
+            start = time.perf_counter()
+            results[stage] = runStage(stage, obj_data, mtl_data, results, scale)
+            times[stage].append(time.perf_counter() - start)
+
+    ## a separate traced run, tracing slows down allocation heavy stages
+    report = {}
+    results = {}
+    tracemalloc.start()
+    for stage in Stages:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        results[stage] = runStage(stage, obj_data, mtl_data, results, scale)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        report[stage] = {
+            'median_ms': float(np.median(times[stage]) * 1e3),
+            'p95_ms': float(np.percentile(times[stage], 95) * 1e3),
+            'peak_bytes': int(peak),
+            'output_bytes': int(outputBytes(results[stage]))}
+    tracemalloc.stop()
+    expanded, indexed = bufferBytes(results['parse'])
+    return {'input_bytes': len(obj_data) + len(mtl_data), 'stages': report,
+            'expanded_buffer_bytes': expanded, 'indexed_buffer_bytes': indexed}
+
+
+def compare(report, baseline, tolerance, floor):
+    """Returns descriptions of stages slower or hungrier than the baseline allows"""
+    regressions = []
+    for name, result in report['files'].items():
+        reference = baseline['files'].get(name, {})
+        if 'error' in result or 'stages' not in reference:
+            continue
+        for stage, values in result['stages'].items():
+            before = reference['stages'].get(stage)
+            if before is None:
+                continue
+            ## short stages need an absolute margin too, timer noise dominates them
+            if values['median_ms'] > before['median_ms'] * tolerance + floor:
+                regressions.append("{} {}: {:.2f} ms, baseline {:.2f} ms".format(
+                    name, stage, values['median_ms'], before['median_ms']))
+            if values['peak_bytes'] > before['peak_bytes'] * tolerance + 2 ** 16:
+                regressions.append("{} {}: peak {} bytes, baseline {}".format(
+                    name, stage, values['peak_bytes'], before['peak_bytes']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per file")
+    parser.add_argument("--scale", type=float, default=0.15, help="model scale, as used by the viewer")
+    parser.add_argument("--output", help="write the JSON report to a file instead of stdout")
+    parser.add_argument("--baseline", default=BASELINE, help="JSON report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed ratio over the baseline")
+    parser.add_argument("--floor", type=float, default=1.0, help="allowed milliseconds over the baseline")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'files': {}}
+    for directory, _, files in sorted(os.walk(MODEL_DIR)):
+        for file in sorted(files):
+            if not file.endswith('.obj'):
+                continue
+            path = os.path.join(directory, file)
+            name = os.path.relpath(path, MODEL_DIR)
+            try:
+                report['files'][name] = measureFile(path, args.repeat, args.scale)
+            except ValueError as error:
+                report['files'][name] = {'error': str(error)}
+            print("measured " + name, file=sys.stderr)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            file.write(text + '\n')
+        print("stored baseline " + args.baseline, file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline at " + args.baseline + ", run with --save-baseline to store one", file=sys.stderr)
+        return 0
+    with open(args.baseline) as file:
+        regressions = compare(report, json.load(file), args.tolerance, args.floor)
+    for regression in regressions:
+        print("regression: " + regression, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
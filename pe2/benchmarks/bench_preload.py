@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Time preloading every building with a cold mesh cache for growing numbers of worker processes."""
+## Run from the pe2 directory: python benchmarks/bench_preload.py [--workers N ...] [--repeat R]
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Source.Graphics.model_preload import preloadModel
+from Source.Graphics.obj_polyhedron import loadGeometry
+from Source.Graphics.obj_stream import StreamingBytes
+from Source.Graphics.mesh_cache import MeshCache
+
+MODEL_DIR = 'obj-models/buildings/'
+
+
+def modelNames():
+    """Returns the models the preloader would parse, those small enough to load in memory"""
+    return [file[:-4] for file in sorted(os.listdir(MODEL_DIR))
+            if file.endswith('.obj') and os.path.exists(MODEL_DIR + file[:-4] + '.mtl')
+            and os.path.getsize(MODEL_DIR + file) < StreamingBytes]
+
+
+def timeSerial(names, scale):
+    """Returns the seconds of parsing every model in this process, one after the other"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = MeshCache(directory)
+        start = time.perf_counter()
+        for name in names:
+            try:
+                loadGeometry(name + '.obj', name + '.mtl', scale, cache=cache, directory=MODEL_DIR)
+            except ValueError:
+                pass
+        return time.perf_counter() - start
+
+
+def timePool(names, scale, workers):
+    """Returns the seconds of preloading every model in a pool of workers, from spawning them to the last block"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = MeshCache(directory)
+        start = time.perf_counter()
+        ## spawn, like ModelPreloader, forking a process running Qt threads is not safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(preloadModel, MODEL_DIR, name, scale, cache) for name in names]
+            for future in futures:
+                if future.exception() is not None:
+                    continue
+                for block_name, _, _ in future.result()['blocks'].values():
+                    shared_memory.SharedMemory(name=block_name).unlink()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs='+', help="worker counts, powers of two up to the cores by default")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per worker count, the fastest is kept")
+    parser.add_argument("--scale", type=float, default=0.15, help="model scale, as used by the viewer")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    cores = os.cpu_count()
+    workers = args.workers or sorted({2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores} | {cores})
+    names = modelNames()
+    serial = min(timeSerial(names, args.scale) for _ in range(args.repeat))
+    report = {'cores': cores, 'models': len(names), 'serial_s': serial, 'pools': []}
+    for count in workers:
+        seconds = min(timePool(names, args.scale, count) for _ in range(args.repeat))
+        report['pools'].append({'workers': count, 'seconds': seconds, 'speedup': serial / seconds})
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,12 +6,16 @@ import argparse
 from OpenGL import GL
 from PyQt5 import Qt, QtCore
 from Source.GUI.MainWindow import MainWindow
+from Source.Graphics import mesh_cache
 
 def main():
 
 	parser = argparse.ArgumentParser()
 	parser.add_argument("--glversion", help="use specific OpenGL version")
 	parser.add_argument("--glsamples", help="use specific number of samples for rendering")
+	parser.add_argument("--rebuild-cache", action="store_true", help="discard cached meshes and parse all models again")
+	parser.add_argument("--cache-compression", choices=["zlib", "lzma"], help="compress cached meshes")
+	parser.add_argument("--cache-size", type=int, default=256, help="maximum size of the mesh cache in MB")
 
 	args = parser.parse_args()
 
@@ -29,6 +33,12 @@ def main():
 	else:
 		gl_samples = 8
 
+	## set up the on-disk mesh cache
+	cache = mesh_cache.MeshCache(max_bytes=args.cache_size * 1024 * 1024, compression=args.cache_compression)
+	if args.rebuild_cache:
+		cache.clear()
+	mesh_cache.setDefaultCache(cache)
+
 	## use desktop OpenGL and share contexts
 	QtCore.QCoreApplication.setAttribute(QtCore.Qt.AA_UseDesktopOpenGL)
 	QtCore.QCoreApplication.setAttribute(QtCore.Qt.AA_ShareOpenGLContexts)
@@ -1,26 +1,83 @@
-import argparse
-from tqdm import tqdm
-from shutil import copyfile
-import os 
-
-def processFace(infile, outfile, scale):
-	fout = open(outfile, "w")
-	with open(infile, "r") as fin:
-		for line in fin:
-			data = line.split()
-			if len(data) < 1:
-				pass
-			elif data[0] == "f":
-				if len(data[1:]) == 4: # quad face
-					fout.write("f " + data[1] + " " + data[2] + " " + data[3] + "\n")
-					fout.write("f " + data[3] + " " + data[4] + " " + data[1] + "\n")
-				else:    # triangle face
-					fout.write(line)
-			elif data[0] == "v":
-				fout.write("v " + str(float(data[1])*scale) + " " + 
-					                str(float(data[2])*scale) + " " +
-					                str(float(data[3])*scale) + "\n")
-			else:
-				fout.write(line)
-	fout.close()
+import numpy as np
+from Source.Graphics.obj_loader import streamRecords, fanTriangles
 
+
+def isConvex(polygons):
+	"""Returns which (F, n, 3) polygons are convex"""
+	following = np.roll(polygons, -1, axis=1)
+	normal = np.cross(polygons, following).sum(axis=1)
+	edges = following - polygons
+	turns = np.cross(edges, np.roll(edges, -1, axis=1))
+	return (np.einsum('fij,fj->fi', turns, normal) >= -1e-12).all(axis=1)
+
+
+def earClip(polygon):
+	"""Returns local corner triangles for a simple, possibly concave polygon"""
+	## project onto the plane most aligned with the polygon normal
+	normal = np.cross(polygon, np.roll(polygon, -1, axis=0)).sum(axis=0)
+	axes = [i for i in range(3) if i != np.argmax(np.abs(normal))]
+	points = polygon[:, axes]
+	area = np.cross(points, np.roll(points, -1, axis=0)).sum()
+	orientation = 1.0 if area >= 0.0 else -1.0
+
+	def cross(a, b, c):
+		return orientation * np.cross(points[b] - points[a], points[c] - points[b])
+
+	def inside(p, a, b, c):
+		return cross(a, b, p) >= 0 and cross(b, c, p) >= 0 and cross(c, a, p) >= 0
+
+	remaining = list(range(len(polygon)))
+	triangles = []
+	while len(remaining) > 3:
+		n = len(remaining)
+		for i in range(n):
+			a, b, c = remaining[i - 1], remaining[i], remaining[(i + 1) % n]
+			if cross(a, b, c) <= 0:
+				continue
+			if any(inside(p, a, b, c) for p in remaining if p not in (a, b, c)):
+				continue
+			triangles.append([a, b, c])
+			remaining.pop(i)
+			break
+		else:
+			## degenerate polygon, fall back to a fan over what is left
+			break
+	for i in range(1, len(remaining) - 1):
+		triangles.append([remaining[0], remaining[i], remaining[i + 1]])
+	return triangles
+
+
+def triangulate(corners, counts, positions):
+	"""Split faces into triangles: fan for convex faces, ear clipping for the rest"""
+	offsets = np.cumsum(counts) - counts
+	triangles = fanTriangles(counts)
+	polygons = np.flatnonzero(counts > 3)
+	if len(polygons) == 0:
+		return corners[triangles]
+
+	## fan triangles of each face are stored contiguously, in face order
+	firsts = np.cumsum(counts - 2) - (counts - 2)
+	for n in np.unique(counts[polygons]):
+		faces = polygons[counts[polygons] == n]
+		local = offsets[faces][:, None] + np.arange(n)
+		concave = faces[~isConvex(positions[corners[local, 0]])]
+		for face in concave:
+			clipped = earClip(positions[corners[offsets[face]:offsets[face] + n, 0]])
+			triangles[firsts[face]:firsts[face] + n - 2] = offsets[face] + np.array(clipped)
+	return corners[triangles]
+
+
+def processFace(data, scale):
+	"""Streams OBJ records with scaled vertices and faces split into triangles"""
+	positions = []
+	for record in streamRecords(data, scale):
+		if record[0] == 'v':
+			positions.append(record[1])
+			yield record
+		elif record[0] == 'f':
+			corners, counts = record[1], record[2]
+			if (counts > 3).any() and len(positions) > 1:
+				positions = [np.concatenate(positions)]
+			yield 'f', triangulate(corners, counts, positions[0] if positions else None)
+		else:
+			yield record